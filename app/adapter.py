@@ -1,27 +1,118 @@
 
+from itertools import compress
 from typing import List, Dict, Optional
 from app import adapter  # type: ignore  # for relative package resolution
 from pipeline import Pipeline
-from render.tree_builder import to_tree_for_gui
+from render.gui_adapter import EventIndex, EventView, shown_kinds, to_gui_event
+from render.tree_builder import to_tree_for_gui, expand_gui_node
+from data_io.source_index import SourceIndex, read_context
 
 class GuiSession:
-    def __init__(self, path: str, prefer_mtk: bool = True, show_normal: bool = False):
+    def __init__(self, path: str, prefer_mtk: bool | None = True, show_normal: bool = False, follow: bool = False,
+                 deferred: bool = False):
         self.path = path
         self.prefer_mtk = prefer_mtk
-        self._pipeline = Pipeline(prefer_mtk=prefer_mtk, show_normal_sim=True)  # parse all; filter later
-        self._results = self._pipeline.run_from_file(path)  # keep full results
+        # parse all; filter later. A growing (followed) log is never served from the extraction cache.
+        # deferred: load only classifies; detail trees are built when first shown,
+        # searched or exported (Pipeline.detail; its parse cache bounds how many are kept)
+        self._pipeline = Pipeline(prefer_mtk=prefer_mtk, show_normal_sim=True, cache=not follow, compact_trees=True,
+                                  deferred=deferred)
+        # follow mode: read what is there now, keep extractor state for later poll()s
+        self._follower = self._pipeline.follow(path) if follow else None
+        if self._follower is not None:
+            self._results = self._drain_follower()
+        else:
+            self._results = self._pipeline.run_from_file(path)  # keep full results
+        # offsets/lines come with the messages (and with the extraction cache on reopen)
+        self._source_index = SourceIndex.from_messages(r.message for r in self._results)
         self._show_normal = show_normal
         self._allowed_types: list[str] = []
+        self._directions: Optional[list[str]] = None
+        self._tags: Optional[list[str]] = None
+        self.reset = False
+        # kind/direction/tag codes per result, computed once; filter changes only recompute a mask
+        self._index = EventIndex(self._results)
         self._events = self._rebuild_events()
 
-    def _rebuild_events(self) -> List[Dict]:
-        from render.gui_adapter import to_gui_events
-        return to_gui_events(self._results, show_normal_sim=self._show_normal, allowed_types=self._allowed_types)
+    def _mask(self, start: int = 0) -> bytes:
+        kinds = shown_kinds(self._show_normal, self._allowed_types)
+        return self._index.mask(kinds, self._directions, self._tags, start=start)
+
+    def _rebuild_events(self) -> EventView:
+        return EventView(self._results, self._mask())
 
     @property
-    def events(self) -> List[Dict]:
+    def events(self) -> EventView:
+        """Filtered events as a read-only sequence of event dicts (built when read, not stored).
+
+        The same view grows in place as follow mode appends; filter changes and resets
+        replace it, so re-read this property after them.
+        """
         return self._events
 
+    @property
+    def detected(self):
+        """FormatGuess when loaded with prefer_mtk=None (auto-detect), else None."""
+        return self._pipeline.detected
+
+    @property
+    def parse_cache_stats(self) -> Optional[Dict]:
+        """hits / misses / size / hit_rate of the pipeline's parse memoization."""
+        cache = self._pipeline.parse_cache
+        return cache.stats() if cache is not None else None
+
+    @property
+    def following(self) -> bool:
+        return self._follower is not None
+
+    def _drain_follower(self) -> List:
+        res = self._follower.poll()
+        while self._follower.pending:
+            res.extend(self._follower.poll())
+        return res
+
+    def poll(self, max_bytes: Optional[int] = None) -> List[Dict]:
+        """Follow mode: parse newly appended data, return the new (filtered) events.
+
+        If the file was truncated or rotated, everything restarts from the top;
+        check ``reset`` after the call and replace the event list instead of appending.
+        """
+        self.reset = False
+        if self._follower is None:
+            return []
+        new = self._follower.poll() if max_bytes is None else self._follower.poll(max_bytes)
+        if self._follower.reset:
+            self.reset = True
+            self._results = []
+            self._source_index = SourceIndex()
+        return self._append_results(new)
+
+    def stop_follow(self) -> List[Dict]:
+        """Flush the pending group / unfinished chains and leave follow mode."""
+        if self._follower is None:
+            return []
+        new = self._follower.close()
+        self._follower = None
+        return self._append_results(new)
+
+    @property
+    def pending(self) -> bool:
+        return self._follower is not None and self._follower.pending
+
+    def _append_results(self, new: List) -> List[Dict]:
+        start = len(self._results)
+        self._results.extend(new)
+        for r in new:
+            self._source_index.add(r.message)
+        if self.reset:
+            self._index = EventIndex(self._results)
+            self._events = self._rebuild_events()
+            return list(self._events)
+        self._index.add(new)
+        mask = self._mask(start)
+        self._events.extend(mask)
+        return [to_gui_event(self._results[i], i) for i in compress(range(start, len(self._results)), mask)]
+
     def set_show_normal(self, flag: bool):
         self._show_normal = flag
         self._events = self._rebuild_events()
@@ -30,26 +121,73 @@ class GuiSession:
         self._allowed_types = kinds[:]
         self._events = self._rebuild_events()
 
+    def set_allowed_directions(self, directions: Optional[list[str]]):
+        """Keep only events whose direction is listed (None: no direction filter)."""
+        self._directions = None if directions is None else directions[:]
+        self._events = self._rebuild_events()
+
+    def set_allowed_tags(self, tags: Optional[list[str]]):
+        """Keep only events whose tag is listed, case-insensitively; "" is "no tag" (None: no tag filter)."""
+        self._tags = None if tags is None else tags[:]
+        self._events = self._rebuild_events()
+
     # Detail by index (left list index)
-    def get_tree_by_index(self, idx: int) -> Dict:
+    def get_tree_by_index(self, idx: int, lazy: bool = False) -> Dict:
         if idx < 0 or idx >= len(self._events):
             return {"text":"(invalid index)","children":[]}
-        # events are filtered; need to map back to the corresponding ParseResult
-        # Map using raw hex which is unique per message most of the time
-        raw = self._events[idx]["raw"]
-        for r in self._results:
-            if r.message.raw == raw:
-                return to_tree_for_gui(r)
-        return {"text":"(not found)","children":[]}
+        r = self._results[self._events.index_at(idx)]
+        return to_tree_for_gui(self._pipeline.detail(r), lazy=lazy)
+
+    # Detail of a result (event["index"])
+    def get_tree(self, index: int, lazy: bool = False) -> Dict:
+        """lazy=True: deep eSIM structures stay undecoded ("pending") until expand_tree_node()."""
+        if index < 0 or index >= len(self._results):
+            return {"text":"(not found)","children":[]}
+        return to_tree_for_gui(self._pipeline.detail(self._results[index]), lazy=lazy)
 
-    # Detail by raw hex (for minimal GUI change)
-    def get_tree_by_raw(self, raw: str) -> Dict:
-        raw = (raw or "").replace(" ", "").upper()
-        for r in self._results:
-            if r.message.raw == raw:
-                return to_tree_for_gui(r)
+    # Detail by raw hex: the first result with that APDU (kept for scripts; the GUI uses get_tree)
+    def get_tree_by_raw(self, raw: str, lazy: bool = False) -> Dict:
+        try:
+            data = bytes.fromhex((raw or "").replace(" ", ""))
+        except ValueError:
+            return {"text":"(not found)","children":[]}
+        for i, r in enumerate(self._results):
+            if r.message.data == data:  # compare bytes: don't build and cache every result's hex
+                return self.get_tree(i, lazy=lazy)
         return {"text":"(not found)","children":[]}
 
+    def expand_tree_node(self, node: Dict) -> List[Dict]:
+        return expand_gui_node(node)
+
+    # Command/response pairing of a result (event["index"])
+    def get_pair(self, index: int) -> Dict:
+        if index < 0 or index >= len(self._results):
+            return {"command": None, "responses": [], "sw": None}
+        r = self._results[index]
+        return {"command": r.command, "responses": list(r.responses), "sw": r.sw}
+
+    def partner_of(self, index: int) -> Optional[int]:
+        """rx -> its command; tx -> its first response (GET RESPONSE tx -> the original command)."""
+        if index < 0 or index >= len(self._results):
+            return None
+        r = self._results[index]
+        if r.message.direction == "tx" and r.responses and r.command is None:
+            return r.responses[0]
+        return r.command
+
+    # Raw log lines around a result (event["index"])
+    def get_source_context(self, index: int, before: int = 5, after: int = 20) -> Dict:
+        if index < 0 or index >= len(self._source_index):
+            return {"lines": [], "target": -1, "line": None}
+        offset, line = self._source_index.position(index)
+        if offset < 0 or line < 0:  # no text line behind it (e.g. a pcap frame)
+            return {"lines": [], "target": -1, "line": None}
+        # merged directory/glob input: each message remembers its own file
+        src = self._results[index].message.meta.get("file", self.path)
+        lines, target = read_context(src, offset, before, after)
+        return {"lines": lines, "target": target, "line": line}
+
 # convenience function
-def load_for_gui(path: str, prefer_mtk: bool = True, show_normal: bool = False) -> GuiSession:
-    return GuiSession(path, prefer_mtk=prefer_mtk, show_normal=show_normal)
+def load_for_gui(path: str, prefer_mtk: bool | None = True, show_normal: bool = False, follow: bool = False,
+                 deferred: bool = False) -> GuiSession:
+    return GuiSession(path, prefer_mtk=prefer_mtk, show_normal=show_normal, follow=follow, deferred=deferred)
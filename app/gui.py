@@ -0,0 +1,771 @@
+# Tk 图形界面（python main.py 启动）；解析 API 见 app.adapter，无需导入本模块
+import tkinter as tk
+from tkinter import ttk, filedialog, messagebox
+from typing import List, Dict, Optional, Sequence
+import re
+
+from app.adapter import load_for_gui, GuiSession
+from data_io.loaders import list_members, MEMBER_SEP
+
+# 颜色
+COLOR_PROACTIVE_RX = "#d62728"
+COLOR_PROACTIVE_TX = "#1f77b4"
+COLOR_ESIM_RX      = "#2ca02c"
+COLOR_ESIM_TX      = "#9467bd"
+COLOR_UNKNOWN      = "#7f7f7f"
+
+# 文件对话框：压缩日志按文件头识别，边读边解压
+LOG_FILETYPES = [("Text files", "*.txt"), ("Compressed logs", "*.gz *.xz *.bz2 *.zip"), ("Captures", "*.pcap *.pcapng *.cap"), ("All files", "*.*")]
+
+# 跟随模式轮询间隔（毫秒）；文件中还有积压数据时用较短间隔分批追上
+FOLLOW_INTERVAL_MS = 500
+FOLLOW_CATCHUP_MS = 10
+
+def color_for_direction(direction: str) -> str:
+    if direction == "UICC=>TERMINAL":   return COLOR_PROACTIVE_RX
+    if direction == "TERMINAL=>UICC":   return COLOR_PROACTIVE_TX
+    if direction == "ESIM=>LPA":        return COLOR_ESIM_RX
+    if direction == "LPA=>ESIM":        return COLOR_ESIM_TX
+    return COLOR_UNKNOWN
+
+class SearchDialog:
+    def __init__(self, parent, app_instance):
+        self.parent = parent
+        self.app = app_instance
+        self.dialog = None
+        self.search_var = tk.StringVar()
+        self.current_index = 0
+        self.search_results = []
+        self.last_pattern = ""
+        
+    def show(self):
+        """显示搜索对话框"""
+        if self.dialog and self.dialog.winfo_exists():
+            self.dialog.lift()
+            self.dialog.focus_force()
+            return
+            
+        self.dialog = tk.Toplevel(self.parent)
+        self.dialog.title("搜索")
+        self.dialog.geometry("400x100")
+        self.dialog.resizable(False, False)
+        self.dialog.transient(self.parent)
+        self.dialog.grab_set()
+        
+        # 居中显示
+        self.dialog.geometry("+%d+%d" % (
+            self.parent.winfo_rootx() + 50,
+            self.parent.winfo_rooty() + 50
+        ))
+        
+        # 创建界面
+        self._build_ui()
+        
+        # 绑定事件
+        self.dialog.bind("<Return>", lambda e: self.search_next())
+        self.dialog.bind("<Shift-Return>", lambda e: self.search_prev())
+        self.dialog.bind("<Escape>", lambda e: self.dialog.destroy())
+        
+        # 聚焦到搜索框
+        self.entry_search.focus_set()
+        
+        # 如果搜索框有内容，自动执行搜索
+        if self.search_var.get().strip():
+            self.perform_search()
+        
+    def _build_ui(self):
+        """构建搜索对话框界面"""
+        main_frame = tk.Frame(self.dialog)
+        main_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+        
+        # 搜索框
+        search_frame = tk.Frame(main_frame)
+        search_frame.pack(fill=tk.X, pady=(0, 10))
+        
+        tk.Label(search_frame, text="搜索:").pack(side=tk.LEFT)
+        self.entry_search = tk.Entry(search_frame, textvariable=self.search_var, width=30)
+        self.entry_search.pack(side=tk.LEFT, padx=(5, 10))
+        self.entry_search.bind("<KeyRelease>", self.on_search_text_changed)
+        
+
+        
+        # 按钮
+        button_frame = tk.Frame(main_frame)
+        button_frame.pack(fill=tk.X)
+        
+        self.btn_prev = tk.Button(button_frame, text="上一个", command=self.search_prev, state=tk.DISABLED)
+        self.btn_prev.pack(side=tk.LEFT, padx=(0, 5))
+        
+        self.btn_next = tk.Button(button_frame, text="下一个", command=self.search_next, state=tk.DISABLED)
+        self.btn_next.pack(side=tk.LEFT, padx=(0, 10))
+        
+        self.btn_close = tk.Button(button_frame, text="关闭", command=self.dialog.destroy)
+        self.btn_close.pack(side=tk.RIGHT)
+        
+        # 状态标签
+        self.status_label = tk.Label(main_frame, text="", fg="gray")
+        self.status_label.pack(anchor=tk.W)
+        
+    def on_search_text_changed(self, event=None):
+        """搜索文本改变时的处理"""
+        pattern = self.search_var.get().strip()
+        if pattern != self.last_pattern:
+            self.last_pattern = pattern
+            self.perform_search()
+            
+    def perform_search(self):
+        """执行搜索"""
+        pattern = self.search_var.get().strip()
+        if not pattern:
+            self.search_results = []
+            self.current_index = 0
+            self.update_buttons()
+            self.status_label.config(text="")
+            return
+            
+        try:
+            regex = re.compile(pattern, re.IGNORECASE)
+        except re.error:
+            self.status_label.config(text="无效的正则表达式", fg="red")
+            return
+            
+        self.search_results = []
+        
+        for idx, event in enumerate(self.app.events):
+            # 搜索标题
+            if regex.search(event.get("title", "")):
+                self.search_results.append(idx)
+                continue
+                
+            # 搜索详情内容（默认启用）
+            if self.app._session:
+                index = event["index"]
+                detail_text = self.app._detail_cache.get(index)
+                if detail_text is None:
+                    # 生成详情文本
+                    tree = self.app._session.get_tree(index)
+                    parts = []
+                    def walk(node):
+                        text = node.get("text")
+                        hint = node.get("hint")
+                        if text: parts.append(text)
+                        if hint: parts.append(hint)
+                        for child in node.get("children", []):
+                            walk(child)
+                    walk(tree)
+                    detail_text = "\n".join(parts)
+                    self.app._detail_cache[index] = detail_text
+                    
+                if regex.search(detail_text):
+                    self.search_results.append(idx)
+                    
+        self.current_index = 0
+        self.update_buttons()
+        self.update_status()
+        
+    def update_buttons(self):
+        """更新按钮状态"""
+        has_results = len(self.search_results) > 0
+        self.btn_prev.config(state=tk.NORMAL if has_results else tk.DISABLED)
+        self.btn_next.config(state=tk.NORMAL if has_results else tk.DISABLED)
+        
+    def update_status(self):
+        """更新状态显示"""
+        if not self.search_var.get().strip():
+            self.status_label.config(text="")
+        elif not self.search_results:
+            self.status_label.config(text="未找到匹配项", fg="red")
+        else:
+            self.status_label.config(
+                text=f"找到 {len(self.search_results)} 个匹配项 (第 {self.current_index + 1} 个)",
+                fg="blue"
+            )
+            
+    def search_next(self):
+        """搜索下一个"""
+        if not self.search_results:
+            return
+            
+        self.current_index = (self.current_index + 1) % len(self.search_results)
+        self.highlight_result()
+        self.update_status()
+        
+    def search_prev(self):
+        """搜索上一个"""
+        if not self.search_results:
+            return
+            
+        self.current_index = (self.current_index - 1) % len(self.search_results)
+        self.highlight_result()
+        self.update_status()
+        
+    def highlight_result(self):
+        """高亮显示搜索结果"""
+        if not self.search_results:
+            return
+            
+        target_idx = self.search_results[self.current_index]
+        
+        # 滚动到目标项
+        self.app.tree_events.selection_set(str(target_idx))
+        self.app.tree_events.see(str(target_idx))
+        
+        # 触发选择事件以显示详情
+        self.app.tree_events.event_generate("<<TreeviewSelect>>")
+
+class App(tk.Tk):
+    def __init__(self):
+        super().__init__()
+        self.title("SIM APDU Viewer V1.0")
+        self.geometry("1200x760")
+
+        self._session: GuiSession | None = None
+        # events_all 是会话的筛选视图（按需生成行，不复制）；无搜索时 events 就是它，有搜索时是匹配结果列表
+        self.events_all: Sequence[Dict] = []
+        self.events: Sequence[Dict] = []
+        self._detail_cache: dict[int, str] = {}  # 结果下标 -> 详情文本
+        self._detail_pending: dict[str, dict] = {}  # 详情树中尚未解码的节点 iid -> 节点
+        self._search_dialog: Optional[SearchDialog] = None
+        self._follow_job = None
+        self._event_pos: dict[int, int] = {}  # 搜索结果列表中：result index -> 行号
+
+        self._build_widgets()
+        self._bind_shortcuts()
+
+    # ---------- UI ----------
+    def _build_widgets(self):
+        top = tk.Frame(self); top.pack(fill=tk.X, padx=8, pady=6)
+        tk.Button(top, text="打开日志（自动识别）", command=self.on_load_auto).pack(side=tk.LEFT, padx=4)
+        tk.Button(top, text="加载 MTK 原始日志", command=self.on_load_mtk).pack(side=tk.LEFT, padx=4)
+        tk.Button(top, text="加载 MTK 日志目录", command=self.on_load_mtk_dir).pack(side=tk.LEFT, padx=4)
+        tk.Button(top, text="加载 APDU 文本（每行）", command=self.on_load_apdu).pack(side=tk.LEFT, padx=4)
+        self.var_follow = tk.BooleanVar(value=False)
+        tk.Checkbutton(top, text="跟随文件增长", variable=self.var_follow,
+                       command=self.on_follow_toggled).pack(side=tk.LEFT, padx=4)
+
+        # 多选下拉菜单：筛选类别
+        self.var_filter_proactive = tk.BooleanVar(value=True)
+        self.var_filter_esim = tk.BooleanVar(value=True)
+        self.var_filter_normal = tk.BooleanVar(value=False)
+
+        self.menu_btn = tk.Menubutton(top, text="筛选类别 ▾", relief=tk.RAISED)
+        self.menu = tk.Menu(self.menu_btn, tearoff=0)
+        self.menu_btn.configure(menu=self.menu)
+        self.menu.add_checkbutton(label="proactive APDU", variable=self.var_filter_proactive, command=self.on_filter_changed)
+        self.menu.add_checkbutton(label="eSIM APDU", variable=self.var_filter_esim, command=self.on_filter_changed)
+        self.menu.add_checkbutton(label="other SIM APDU", variable=self.var_filter_normal, command=self.on_filter_changed)
+        self.menu_btn.pack(side=tk.LEFT, padx=8)
+
+        tk.Label(top, text="搜索:").pack(side=tk.LEFT, padx=(16, 4))
+        self.search_var = tk.StringVar(value="")
+        self.entry_search = tk.Entry(top, textvariable=self.search_var, width=36)
+        self.entry_search.pack(side=tk.LEFT)
+        self.entry_search.bind("<Return>", lambda e: self.apply_search())
+        tk.Button(top, text="Search", command=self.apply_search).pack(side=tk.LEFT, padx=6)
+        tk.Button(top, text="清除筛选", command=self.clear_filters).pack(side=tk.LEFT, padx=4)
+
+        self.var_search_detail = tk.BooleanVar(value=False)
+        tk.Checkbutton(top, text="搜索右侧详情", variable=self.var_search_detail,
+                       command=self.apply_search).pack(side=tk.LEFT, padx=8)
+
+        self.status = tk.StringVar(value="就绪")
+        tk.Label(top, textvariable=self.status).pack(side=tk.RIGHT)
+
+        main = tk.PanedWindow(self, orient=tk.HORIZONTAL, sashrelief=tk.RAISED)
+        main.pack(fill=tk.BOTH, expand=True, padx=6, pady=6)
+
+        # 左侧列表
+        left_frame = tk.Frame(main)
+        
+        # 创建滚动条框架
+        scroll_frame = tk.Frame(left_frame)
+        scroll_frame.pack(fill=tk.BOTH, expand=True)
+        
+        # 垂直滚动条
+        yscroll = ttk.Scrollbar(scroll_frame, orient="vertical")
+        yscroll.pack(side=tk.RIGHT, fill=tk.Y)
+        
+        # 水平滚动条
+        xscroll = ttk.Scrollbar(scroll_frame, orient="horizontal")
+        xscroll.pack(side=tk.BOTTOM, fill=tk.X)
+        
+        # 树形视图
+        self.tree_events = ttk.Treeview(scroll_frame, show="tree", 
+                                       yscrollcommand=yscroll.set, 
+                                       xscrollcommand=xscroll.set)
+        self.tree_events.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        
+        # 配置滚动条
+        yscroll.config(command=self.tree_events.yview)
+        xscroll.config(command=self.tree_events.xview)
+        
+        # 绑定事件
+        self.tree_events.bind("<<TreeviewSelect>>", self.on_select_event)
+        
+        # 配置列
+        self.tree_events.column("#0", anchor="w", stretch=True, width=800, minwidth=300)
+        self.tree_events.heading("#0", text="")
+        self.tree_events.bind("<Configure>", lambda e: self.tree_events.column("#0", width=max(self.tree_events.winfo_width()-4, 200)))
+        
+        main.add(left_frame, width=520)
+
+        # 右侧详情 + RAW
+        right_frame = tk.Frame(main)
+        self.tree_detail = ttk.Treeview(right_frame, show="tree")
+        self.tree_detail.pack(fill=tk.BOTH, expand=True)
+        tk.Label(right_frame, text="RAW:").pack(anchor="w")
+        self.txt_raw = tk.Text(right_frame, height=6, wrap="none")
+        self.txt_raw.pack(fill=tk.X, expand=False)
+        main.add(right_frame)
+
+        # ---------- 复制功能：右键菜单 & 快捷键 ----------
+        # 左侧菜单
+        self.menu_left = tk.Menu(self, tearoff=0)
+        self.menu_left.add_command(label="复制此行", command=self.copy_left_line)
+        self.menu_left.add_command(label="复制 RAW", command=self.copy_left_raw)
+        self.menu_left.add_command(label="查看原始日志上下文", command=self.show_source_context)
+        self.menu_left.add_command(label="跳转到配对的命令/响应", command=self.goto_pair)
+        self.menu_left.add_separator()
+        self.menu_left.add_command(label="复制右侧详情（全部）", command=self.copy_detail_all_from_left)
+        self.tree_events.bind("<Button-3>", self._popup_left)
+
+        # 右侧详情菜单
+        self.menu_detail = tk.Menu(self, tearoff=0)
+        self.menu_detail.add_command(label="复制所选节点", command=self.copy_detail_node)
+        self.menu_detail.add_command(label="复制所选子树", command=self.copy_detail_subtree)
+        self.menu_detail.add_separator()
+        self.menu_detail.add_command(label="复制全部详情", command=self.copy_detail_all)
+        self.tree_detail.bind("<Button-3>", self._popup_detail)
+        self.tree_detail.bind("<<TreeviewOpen>>", self._on_detail_open)
+
+        # RAW 菜单
+        self.menu_raw = tk.Menu(self, tearoff=0)
+        self.menu_raw.add_command(label="复制选中", command=lambda: self._to_clip(self.txt_raw.get("sel.first", "sel.last")) if self.txt_raw.tag_ranges("sel") else None)
+        self.menu_raw.add_command(label="复制全部", command=lambda: self._to_clip(self.txt_raw.get("1.0", "end-1c")))
+        self.txt_raw.bind("<Button-3>", lambda e: self.menu_raw.tk_popup(e.x_root, e.y_root))
+        self.txt_raw.bind("<Control-a>", lambda e: (self.txt_raw.tag_add("sel", "1.0", "end-1c"), "break"))
+
+        # Ctrl+C 快捷键
+        self.tree_events.bind("<Control-c>", lambda e: (self.copy_left_line(), "break"))
+        self.tree_detail.bind("<Control-c>", lambda e: (self.copy_detail_node(), "break"))
+
+    def _bind_shortcuts(self):
+        """绑定全局快捷键"""
+        # Ctrl+F 搜索
+        self.bind("<Control-f>", lambda e: self.show_search_dialog())
+        # 确保所有子控件都能响应Ctrl+F
+        self.bind_all("<Control-f>", lambda e: self.show_search_dialog())
+        
+    def show_search_dialog(self):
+        """显示搜索对话框"""
+        if not self._search_dialog:
+            self._search_dialog = SearchDialog(self, self)
+        self._search_dialog.show()
+
+    # ---------- 文件加载 ----------
+    def on_load_auto(self):
+        # 只读取开头一段样本判断格式，选错不必整份重新解析
+        fp = filedialog.askopenfilename(title="选择日志（自动识别格式）", filetypes=LOG_FILETYPES)
+        fp = self._pick_member(fp)
+        if not fp: return
+        self._load_session(fp, prefer_mtk=None, follow=self.var_follow.get())
+
+    def on_load_mtk(self):
+        fp = filedialog.askopenfilename(title="选择 MTK 原始日志", filetypes=LOG_FILETYPES)
+        fp = self._pick_member(fp)
+        if not fp: return
+        self._load_session(fp, prefer_mtk=True, follow=self.var_follow.get())
+
+    def on_load_mtk_dir(self):
+        # 轮转的多个日志文件：按时间戳归并，跨文件续接 E2 重组
+        fp = filedialog.askdirectory(title="选择 MTK 日志目录（多个轮转文件）")
+        if not fp: return
+        self._load_session(fp, prefer_mtk=True, follow=False)
+
+    def on_load_apdu(self):
+        fp = filedialog.askopenfilename(title="选择 APDU 文本（每行一条）", filetypes=LOG_FILETYPES)
+        fp = self._pick_member(fp)
+        if not fp: return
+        self._load_session(fp, prefer_mtk=False, follow=self.var_follow.get())
+
+    def _load_session(self, fp: str, prefer_mtk: bool | None, follow: bool):
+        try:
+            self._stop_follow()
+            self._session = load_for_gui(fp, prefer_mtk=prefer_mtk, show_normal=self.var_filter_normal.get(),
+                                         follow=follow, deferred=True)
+            # 初始化筛选
+            kinds = []
+            if self.var_filter_proactive.get(): kinds.append('proactive')
+            if self.var_filter_esim.get(): kinds.append('esim')
+            if self.var_filter_normal.get(): kinds.append('normal_sim')
+            self._session.set_allowed_types(kinds)
+            self.events_all = self._session.events
+            self._detail_cache.clear()
+            self.apply_search()
+            g = self._session.detected
+            fmt = f"，识别为 {g.name}（置信度 {g.confidence:.2f}）" if g else ""
+            st = self._session.parse_cache_stats
+            dup = f"，重复 APDU 复用解析 {st['hit_rate']:.0%}" if st and st["hits"] else ""
+            self.status.set(f"加载完成：{len(self.events_all)} 条{fmt}{dup}")
+            self._schedule_follow(FOLLOW_INTERVAL_MS)
+        except Exception as ex:
+            messagebox.showerror("错误", f"解析失败：\n{ex}")
+
+    def _pick_member(self, fp: str) -> str:
+        """zip 中有多个文件时让用户选择一个，返回 "archive.zip::member"；取消返回空串。"""
+        if not fp: return ""
+        try:
+            members = list_members(fp)
+        except Exception as ex:
+            messagebox.showerror("错误", f"无法读取压缩包：\n{ex}")
+            return ""
+        if len(members) <= 1:
+            return fp
+        dlg = tk.Toplevel(self)
+        dlg.title("选择压缩包中的日志")
+        dlg.transient(self)
+        dlg.grab_set()
+        lb = tk.Listbox(dlg, width=80, height=min(len(members), 20))
+        for name in members: lb.insert(tk.END, name)
+        lb.pack(fill=tk.BOTH, expand=True, padx=8, pady=8)
+        lb.selection_set(0)
+        chosen = {"name": ""}
+        def ok(e=None):
+            sel = lb.curselection()
+            if sel: chosen["name"] = members[sel[0]]
+            dlg.destroy()
+        lb.bind("<Double-Button-1>", ok)
+        dlg.bind("<Return>", ok)
+        dlg.bind("<Escape>", lambda e: dlg.destroy())
+        tk.Button(dlg, text="打开", command=ok).pack(pady=(0, 8))
+        self.wait_window(dlg)
+        return f"{fp}{MEMBER_SEP}{chosen['name']}" if chosen["name"] else ""
+
+    def on_filter_changed(self):
+        kinds = []
+        if self.var_filter_proactive.get(): kinds.append('proactive')
+        if self.var_filter_esim.get(): kinds.append('esim')
+        if self.var_filter_normal.get(): kinds.append('normal_sim')
+        if self._session:
+            self._session.set_allowed_types(kinds)
+            self.events_all = self._session.events
+            self._detail_cache.clear()
+            self.apply_search()
+
+    def clear_filters(self):
+        """清除所有筛选条件"""
+        # 清除搜索框
+        self.search_var.set("")
+        # 重置类别筛选为默认状态
+        self.var_filter_proactive.set(True)
+        self.var_filter_esim.set(True)
+        self.var_filter_normal.set(False)
+        # 重置搜索详情选项
+        self.var_search_detail.set(False)
+        # 应用更改
+        self.on_filter_changed()
+
+    # ---------- 搜索 ----------
+    def apply_search(self):
+        if not self._session: return
+        pattern = (self.search_var.get() or "").strip()
+        include_detail = self.var_search_detail.get()
+
+        if not pattern:
+            self.events = self.events_all
+            self.status.set(f"共 {len(self.events_all)} 条")
+        else:
+            try:
+                regex = re.compile(pattern, re.IGNORECASE)
+            except re.error as e:
+                messagebox.showerror("Regex Error", f"无效的正则表达式: {e}")
+                return
+
+            self.events = self._match_events(self.events_all, regex, include_detail)
+            self.status.set(f"匹配 {len(self.events)} / {len(self.events_all)} 条")
+
+        self._refresh_event_list()
+
+    def _match_events(self, events: List[Dict], regex, include_detail: bool) -> List[Dict]:
+        out = []
+        for e in events:
+            if regex.search(e.get("title", "")):
+                out.append(e); continue
+            if include_detail:
+                index = e["index"]
+                buf = self._detail_cache.get(index)
+                if buf is None:
+                    nd = self._session.get_tree(index)
+                    parts = []
+                    def walk(n):
+                        t = n.get("text"); h = n.get("hint")
+                        if t: parts.append(t)
+                        if h: parts.append(h)
+                        for c in n.get("children", []): walk(c)
+                    walk(nd)
+                    buf = "\n".join(parts)
+                    self._detail_cache[index] = buf
+                if regex.search(buf): out.append(e)
+        return out
+
+    # ---------- 跟随模式 ----------
+    def on_follow_toggled(self):
+        # 已加载的会话不能中途切换为跟随（需要保留提取状态），下次加载时生效
+        if not self.var_follow.get():
+            self._stop_follow()
+
+    def _schedule_follow(self, delay: int):
+        if self._session and self._session.following and self._follow_job is None:
+            self._follow_job = self.after(delay, self._follow_tick)
+
+    def _stop_follow(self):
+        if self._follow_job is not None:
+            self.after_cancel(self._follow_job)
+            self._follow_job = None
+        if self._session and self._session.following:
+            new = self._session.stop_follow()
+            if new: self._append_events(new)
+
+    def _follow_tick(self):
+        self._follow_job = None
+        s = self._session
+        if not s or not s.following: return
+        try:
+            new = s.poll()
+        except Exception as ex:
+            self.status.set(f"跟随出错：{ex}")
+            return
+        if s.reset:
+            # 文件被截断或轮转：整体刷新
+            self.events_all = s.events
+            self._detail_cache.clear()
+            self.apply_search()
+        elif new:
+            self._append_events(new)
+        self._schedule_follow(FOLLOW_CATCHUP_MS if s.pending else FOLLOW_INTERVAL_MS)
+
+    def _append_events(self, new: List[Dict]):
+        """把新事件按当前搜索条件过滤后成批追加到列表末尾，不重建已有条目。
+
+        新事件已在会话视图 events_all 中；无搜索时 events 就是该视图，只需补插列表行。
+        """
+        searching = self.events is not self.events_all
+        if searching:
+            pattern = (self.search_var.get() or "").strip()
+            try:
+                regex = re.compile(pattern, re.IGNORECASE)
+            except re.error:
+                return
+            new = self._match_events(new, regex, self.var_search_detail.get())
+            first = len(self.events)
+            self.events.extend(new)
+            for idx, e in enumerate(new, first):
+                self._event_pos[e.get("index", -1)] = idx
+        else:
+            first = len(self.events) - len(new)
+        if not new:
+            return
+        at_bottom = self.tree_events.yview()[1] >= 0.999
+        for idx, e in enumerate(new, first):
+            iid = self.tree_events.insert("", "end", iid=str(idx), text=f"[{e['direction']}] {e.get('title') or ''}")
+            self.tree_events.item(iid, tags=(e["direction"],))
+            self.tree_events.tag_configure(e["direction"], foreground=color_for_direction(e["direction"]))
+        if at_bottom:
+            self.tree_events.see(str(len(self.events) - 1))
+        if searching:
+            self.status.set(f"跟随中：匹配 {len(self.events)} / {len(self.events_all)} 条")
+        else:
+            self.status.set(f"跟随中：共 {len(self.events_all)} 条")
+
+    # ---------- 列表渲染 ----------
+    def _refresh_event_list(self):
+        self.tree_events.delete(*self.tree_events.get_children())
+        if self.events is not self.events_all:
+            self._event_pos = {e.get("index", -1): i for i, e in enumerate(self.events)}
+        for idx, e in enumerate(self.events):
+            text = f"[{e['direction']}] {e.get('title') or ''}"
+            iid = self.tree_events.insert("", "end", iid=str(idx), text=text)
+            color = color_for_direction(e["direction"])
+            self.tree_events.item(iid, tags=(e["direction"],))
+            self.tree_events.tag_configure(e["direction"], foreground=color)
+
+        self.tree_detail.delete(*self.tree_detail.get_children())
+        self._detail_pending.clear()
+        self.txt_raw.delete("1.0", tk.END)
+
+        if self.events:
+            self.tree_events.selection_set("0")
+            self.tree_events.event_generate("<<TreeviewSelect>>")
+        else:
+            self.status.set("无匹配结果")
+
+    # ---------- 选择 / 详情 ----------
+    def on_select_event(self, evt=None):
+        if not self._session: return
+        sel = self.tree_events.selection()
+        if not sel: return
+        idx = int(sel[0])
+        e = self.events[idx]
+        raw = e["raw"]
+
+        self.txt_raw.configure(state=tk.NORMAL)
+        self.txt_raw.delete("1.0", tk.END)
+        self.txt_raw.insert(tk.END, raw)
+        self.txt_raw.configure(state=tk.NORMAL)
+
+        tree = self._session.get_tree(e["index"], lazy=True)
+        self._populate_detail_tree(tree)
+
+    def _populate_detail_tree(self, node_dict):
+        self.tree_detail.delete(*self.tree_detail.get_children())
+        self._detail_pending.clear()
+        self._add_detail_node("", node_dict)
+        # 默认展开所有已解码的节点；延迟解码的节点保持折叠，展开时才解码
+        def expand_all(item=""):
+            for child in self.tree_detail.get_children(item):
+                if child in self._detail_pending: continue
+                self.tree_detail.item(child, open=True)
+                expand_all(child)
+        expand_all()
+
+    def _add_detail_node(self, parent, nd):
+        iid = self.tree_detail.insert(parent, "end", text=nd.get("text") or "")
+        if "pending" in nd:
+            self.tree_detail.insert(iid, "end", text="…")  # 占位，使节点显示可展开
+            self._detail_pending[iid] = nd
+        for ch in nd.get("children", []): self._add_detail_node(iid, ch)
+
+    def _load_detail_node(self, iid):
+        nd = self._detail_pending.pop(iid, None)
+        if nd is None: return
+        self.tree_detail.delete(*self.tree_detail.get_children(iid))
+        for ch in self._session.expand_tree_node(nd): self._add_detail_node(iid, ch)
+
+    def _on_detail_open(self, evt=None):
+        self._load_detail_node(self.tree_detail.focus())
+
+    # ---------- 右键菜单 / 复制 ----------
+    def _popup_left(self, e):
+        try:
+            iid = self.tree_events.identify_row(e.y)
+            if iid: self.tree_events.selection_set(iid)
+            self.menu_left.tk_popup(e.x_root, e.y_root)
+        finally:
+            self.menu_left.grab_release()
+
+    def _popup_detail(self, e):
+        try:
+            iid = self.tree_detail.identify_row(e.y)
+            if iid: self.tree_detail.selection_set(iid)
+            self.menu_detail.tk_popup(e.x_root, e.y_root)
+        finally:
+            self.menu_detail.grab_release()
+
+    def _to_clip(self, text: str | None):
+        if not text: return
+        self.clipboard_clear()
+        self.clipboard_append(text)
+        try: self.update()
+        except Exception: pass
+
+    def copy_left_line(self):
+        sel = self.tree_events.selection()
+        if not sel: return
+        self._to_clip(self.tree_events.item(sel[0], "text"))
+
+    def copy_left_raw(self):
+        sel = self.tree_events.selection()
+        if not sel: return
+        idx = int(sel[0])
+        self._to_clip(self.events[idx]["raw"])
+
+    def goto_pair(self):
+        """选中所选命令的响应，或所选响应对应的命令。"""
+        sel = self.tree_events.selection()
+        if not sel or not self._session: return
+        e = self.events[int(sel[0])]
+        partner = self._session.partner_of(e.get("index", -1))
+        if partner is None:
+            self.status.set("没有配对的命令/响应")
+            return
+        if self.events is self.events_all:
+            pos = self.events.position(partner)
+        else:
+            pos = self._event_pos.get(partner)
+        if pos is None:
+            pair = self._session.get_pair(partner)
+            self.status.set(f"配对的消息 #{partner} 未在当前列表中显示（SW {pair['sw'] or '-'}）")
+            return
+        iid = str(pos)
+        self.tree_events.selection_set(iid)
+        self.tree_events.see(iid)
+
+    def show_source_context(self):
+        """弹窗显示所选事件在原始日志中的前后若干行（按索引中的偏移直接定位）。"""
+        sel = self.tree_events.selection()
+        if not sel or not self._session: return
+        e = self.events[int(sel[0])]
+        try:
+            ctx = self._session.get_source_context(e.get("index", -1))
+        except Exception as ex:
+            messagebox.showerror("错误", f"读取原始日志失败：\n{ex}")
+            return
+        if not ctx["lines"]:
+            messagebox.showinfo("提示", "该事件没有来源位置信息")
+            return
+        dlg = tk.Toplevel(self)
+        dlg.title(f"原始日志 第 {ctx['line']} 行")
+        txt = tk.Text(dlg, width=120, height=28, wrap="none")
+        txt.pack(fill=tk.BOTH, expand=True)
+        first = ctx["line"] - ctx["target"]
+        for i, ln in enumerate(ctx["lines"]):
+            txt.insert(tk.END, f"{first + i:>8}  {ln}\n")
+        txt.tag_configure("target", background="#fff2a8")
+        row = ctx["target"] + 1
+        txt.tag_add("target", f"{row}.0", f"{row}.end")
+        txt.see(f"{row}.0")
+        txt.configure(state=tk.DISABLED)
+        dlg.bind("<Escape>", lambda ev: dlg.destroy())
+
+    def copy_detail_node(self):
+        sel = self.tree_detail.selection()
+        if not sel: return
+        iid = sel[0]
+        self._to_clip(self.tree_detail.item(iid, "text"))
+
+    def copy_detail_subtree(self):
+        sel = self.tree_detail.selection()
+        if not sel: return
+        iid = sel[0]
+        lines = []
+        def walk(node, depth=0):
+            self._load_detail_node(node)
+            lines.append("  "*depth + (self.tree_detail.item(node, "text") or ""))
+            for c in self.tree_detail.get_children(node):
+                walk(c, depth+1)
+        walk(iid)
+        self._to_clip("\n".join(lines))
+
+    def copy_detail_all(self):
+        lines = []
+        def walk(node, depth=0):
+            self._load_detail_node(node)
+            lines.append("  "*depth + (self.tree_detail.item(node, "text") or ""))
+            for c in self.tree_detail.get_children(node): walk(c, depth+1)
+        for r in self.tree_detail.get_children(""):
+            walk(r, 0)
+        self._to_clip("\n".join(lines))
+
+    def copy_detail_all_from_left(self):
+        # 从左侧当前项直接取解析树，避免右侧未展开/滚动影响
+        sel = self.tree_events.selection()
+        if not sel or not self._session: return
+        idx = int(sel[0])
+        nd = self._session.get_tree(self.events[idx]["index"])
+        lines = []
+        def walk(n, d=0):
+            lines.append("  "*d + (n.get("text") or ""))
+            for c in n.get("children", []):
+                walk(c, d+1)
+        walk(nd)
+        self._to_clip("\n".join(lines))
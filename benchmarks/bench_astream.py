@@ -0,0 +1,111 @@
+"""Pipeline.astream(): throughput and event-loop responsiveness vs. blocking run_from_file.
+
+A 1 ms ticker task runs next to the stream; the largest gap between its ticks is how long
+the loop was stalled. run_from_file called from a coroutine stalls it for the whole run.
+"--slow-consumer" sleeps per result batch to show that buffering stays bounded.
+The pairing check records command / responses / sw of each result when astream yields it
+(path input, and a reader returning small reads so steps end anywhere) and compares them
+with run_from_file.
+
+Usage: python benchmarks/bench_astream.py [--apdus N] [--log PATH] [--slow-consumer]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.synth import make_mtk_log  # noqa: E402
+from pipeline import ASTREAM_QUEUE, ASTREAM_STEP_MESSAGES, Pipeline  # noqa: E402
+
+
+async def _ticker(gaps, stop: asyncio.Event):
+    last = time.perf_counter()
+    while not stop.is_set():
+        await asyncio.sleep(0.001)
+        now = time.perf_counter()
+        gaps.append(now - last)
+        last = now
+
+
+async def _timed(run):
+    gaps, stop = [], asyncio.Event()
+    task = asyncio.create_task(_ticker(gaps, stop))
+    await asyncio.sleep(0)
+    t0 = time.perf_counter()
+    n = await run()
+    dt = time.perf_counter() - t0
+    stop.set()
+    await task
+    return n, dt, max(gaps, default=0.0)
+
+
+class _SmallReads:
+    def __init__(self, path: str, size: int):
+        self._f = open(path, "rb")
+        self._size = size
+
+    def read(self, n: int) -> bytes:
+        data = self._f.read(min(n, self._size))
+        if not data:
+            self._f.close()
+        return data
+
+
+def _pairing(r):
+    return r.message.raw, r.command, r.responses, r.sw
+
+
+async def _check_pairing(path: str):
+    ref = [_pairing(r) for r in Pipeline(prefer_mtk=None).run_from_file(path)]
+    for label, source in (("path", path), ("reader", _SmallReads(path, 997))):
+        got = [_pairing(r) async for r in Pipeline(prefer_mtk=None).astream(source)]
+        print(f"pairing at yield time ({label:<6}): {len(got)} results  identical={got == ref}")
+
+
+async def _main(path: str, slow: bool):
+    async def blocking():
+        return len(Pipeline(prefer_mtk=None).run_from_file(path))
+
+    async def streamed():
+        n = 0
+        async for _ in Pipeline(prefer_mtk=None).astream(path):
+            n += 1
+            if slow and n % ASTREAM_STEP_MESSAGES == 0:
+                await asyncio.sleep(0.05)
+        return n
+
+    for label, run in (("run_from_file", blocking), ("astream", streamed)):
+        n, dt, stall = await _timed(run)
+        print(f"{label:<14}: {n} results, {n / dt / 1e3:7.1f} k/s, longest loop stall {stall * 1e3:7.1f} ms")
+    await _check_pairing(path)
+    if slow:
+        print(f"(slow consumer: at most {ASTREAM_QUEUE} steps of {ASTREAM_STEP_MESSAGES} messages are buffered)")
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--apdus", type=int, default=50000)
+    ap.add_argument("--log", help="use an existing log instead of a synthetic one")
+    ap.add_argument("--slow-consumer", action="store_true")
+    args = ap.parse_args()
+
+    path = args.log
+    tmp = None
+    if not path:
+        tmp = tempfile.NamedTemporaryFile("w", suffix=".txt", delete=False)
+        tmp.write(make_mtk_log(args.apdus, noise_ratio=0.5, menu_ratio=0.2))
+        tmp.close()
+        path = tmp.name
+    try:
+        asyncio.run(_main(path, args.slow_consumer))
+    finally:
+        if tmp is not None:
+            os.unlink(tmp.name)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""Comprehension-TLVs decoded per second by parsers.proactive.common on D0 / TERMINAL RESPONSE / ENVELOPE payloads.
+
+Payloads are what ProactiveParser hands to the handlers (bytes after the D0 length / APDU header).
+
+Usage: python benchmarks/bench_cat_tlv.py [--count N] [--repeat R]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from parsers.proactive.common import iter_comp_tlvs, parse_comp_tlvs_to_nodes  # noqa: E402
+
+
+def _tlv(tag: int, value: bytes) -> bytes:
+    n = len(value)
+    return bytes([tag]) + (bytes([0x81, n]) if n > 127 else bytes([n])) + value
+
+
+def _d0(r: random.Random) -> bytes:
+    k = r.random()
+    head = lambda cmd, q: _tlv(0x81, bytes([1, cmd, q])) + _tlv(0x82, b"\x81\x82")  # noqa: E731
+    if k < 0.3:  # SET UP MENU
+        items = b"".join(_tlv(0x0F, bytes([i]) + b"Item%02d" % i) for i in range(1, r.randint(3, 9)))
+        return head(0x25, 0) + _tlv(0x85, b"Main") + items
+    if k < 0.5:  # DISPLAY TEXT
+        return head(0x21, 0x81) + _tlv(0x8D, b"\x04" + b"x" * r.randint(10, 150)) + _tlv(0x84, b"\x01\x05")
+    if k < 0.7:  # OPEN CHANNEL
+        return (head(0x40, 0x03) + _tlv(0x35, b"\x02\x03\x04\x03\x04\x1f\x02") + _tlv(0x39, b"\x05\x78")
+                + _tlv(0x47, b"\x08internet") + _tlv(0x3C, b"\x02\x1f\x90") + _tlv(0x3E, b"\x21\x0a\x00\x00\x01"))
+    if k < 0.85:  # SEND DATA
+        return head(0x43, 0x01) + _tlv(0xB6, bytes(r.randrange(256) for _ in range(r.randint(20, 200))))
+    return head(0x26, r.choice((0, 1, 3, 6)))  # PROVIDE LOCAL INFORMATION
+
+
+def _terminal_response(r: random.Random) -> bytes:
+    head = _tlv(0x81, bytes([1, r.choice((0x21, 0x25, 0x26, 0x40, 0x43)), 0])) + _tlv(0x82, b"\x82\x81")
+    head += _tlv(0x83, r.choice((b"\x00", b"\x20\x02", b"\x32")))
+    k = r.random()
+    if k < 0.4:
+        return head
+    if k < 0.7:  # local information
+        return (head + _tlv(0x93, b"\x64\xf0\x00\x12\x34\x56\x78\x9a\xbc") + _tlv(0x14, b"\x35\x12\x34\x56\x78\x90\x12\x30")
+                + _tlv(0xBF, b"\x08") + _tlv(0xA6, b"\x42\x50\x61\x21\x43\x65\x00"))
+    return head + _tlv(0xB8, b"\x81\x00") + _tlv(0xB9, b"\x05\x78") + _tlv(0xB7, b"\xff")
+
+
+def _envelope(r: random.Random) -> bytes:
+    # contents of event download / menu selection / location status envelopes
+    k = r.random()
+    if k < 0.4:
+        return _tlv(0x99, b"\x03") + _tlv(0x82, b"\x82\x81") + _tlv(0x9B, b"\x00") + _tlv(0x93, b"\x64\xf0\x00\x12\x34\x56\x78")
+    if k < 0.7:
+        return _tlv(0x82, b"\x01\x81") + _tlv(0x90, bytes([r.randint(1, 8)]))
+    return _tlv(0x99, b"\x0a") + _tlv(0x82, b"\x82\x81") + _tlv(0xB8, b"\x81\x05") + _tlv(0xFD, b"\x64\xf0\x00\x12\x34")
+
+
+CORPORA = {"D0": _d0, "TERMINAL RESPONSE": _terminal_response, "ENVELOPE": _envelope}
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--count", type=int, default=20000, help="payloads per corpus")
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+
+    for name, gen in CORPORA.items():
+        r = random.Random(1)
+        payloads = [gen(r) for _ in range(args.count)]
+        n_tlvs = sum(1 for p in payloads for _ in iter_comp_tlvs(p))
+        best = None
+        for _ in range(args.repeat):
+            t0 = time.perf_counter()
+            for p in payloads:
+                parse_comp_tlvs_to_nodes(p)
+            dt = time.perf_counter() - t0
+            best = dt if best is None else min(best, dt)
+        print(f"{name:<18}: {n_tlvs / args.count:4.1f} TLVs/payload, {n_tlvs / best / 1e6:6.2f} M TLVs/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""Time to the first event list: full parsing vs. deferred (classify-only) loading.
+
+Messages are extracted once up front (GuiSession reads them from the extraction cache when a
+log is reopened); the timed part is parse/classify + pairing + to_gui_events with compact
+trees, as GuiSession does. The deferred run then opens --open events, as a user clicking
+through the list would, building each tree on first view. "--no-parse-cache" stands for logs
+with few repeated APDUs.
+
+Usage: python benchmarks/bench_deferred.py [--apdus N] [--log PATH] [--open K] [--no-parse-cache]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.synth import make_mtk_log  # noqa: E402
+from pipeline import DEFAULT_PARSE_CACHE_SIZE, Pipeline  # noqa: E402
+from render.gui_adapter import to_gui_events  # noqa: E402
+from render.tree_builder import to_tree_for_gui  # noqa: E402
+
+
+def _load(msgs, deferred: bool, cache_size: int):
+    pl = Pipeline(show_normal_sim=True, compact_trees=True, parse_cache_size=cache_size, deferred=deferred)
+    t0 = time.perf_counter()
+    results = pl._run_messages(msgs)
+    events = to_gui_events(results, show_normal_sim=True)
+    return pl, results, events, time.perf_counter() - t0
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--apdus", type=int, default=300000)
+    ap.add_argument("--menus", type=float, default=0.2, help="share of FETCHes of unique SET UP MENUs")
+    ap.add_argument("--log", help="use an existing MTK log instead of a synthetic one")
+    ap.add_argument("--open", type=int, default=1000, help="events whose detail tree is opened afterwards")
+    ap.add_argument("--no-parse-cache", action="store_true")
+    args = ap.parse_args()
+
+    path = args.log
+    tmp = None
+    if not path:
+        tmp = tempfile.NamedTemporaryFile("w", suffix=".txt", delete=False)
+        tmp.write(make_mtk_log(args.apdus, noise_ratio=0.5, menu_ratio=args.menus))
+        tmp.close()
+        path = tmp.name
+    try:
+        cache_size = 0 if args.no_parse_cache else DEFAULT_PARSE_CACHE_SIZE
+        t0 = time.perf_counter()
+        msgs = list(Pipeline(prefer_mtk=None)._extract(path, "mtk"))
+        t_extract = time.perf_counter() - t0
+        _, full, full_events, t_full = _load(msgs, False, cache_size)
+        pl, lazy, lazy_events, t_lazy = _load(msgs, True, cache_size)
+        print(f"{len(full)} messages, {len(full_events)} events (extraction {t_extract:.2f} s, not counted)")
+        print(f"full parse : {t_full:6.2f} s to first list")
+        print(f"deferred   : {t_lazy:6.2f} s to first list  x{t_full / t_lazy:.2f}  "
+              f"same events={lazy_events == full_events}")
+        step = max(1, len(lazy_events) // max(1, args.open))
+        picked = [e["index"] for e in lazy_events[::step][:args.open]]
+        t0 = time.perf_counter()
+        same = all(to_tree_for_gui(pl.detail(lazy[i])) == to_tree_for_gui(full[i]) for i in picked)
+        dt = time.perf_counter() - t0
+        print(f"open       : {len(picked)} trees, {dt / max(1, len(picked)) * 1e6:.0f} µs each  same trees={same}")
+    finally:
+        if tmp is not None:
+            os.unlink(tmp.name)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""rsp.asn schema decoding (parsers.esim.schema) vs. the hand-written BFxx handlers.
+
+Reports the cold compile time of rsp.asn against loading the on-disk cache, then
+µs per container for the tags that have a hand-written handler, decoded both ways.
+
+Usage: python benchmarks/bench_esim_schema.py [--repeat R]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.asn1 import compile_module, load_schema  # noqa: E402
+from core.models import MsgType  # noqa: E402
+from core.registry import resolve  # noqa: E402
+from core.tlv import parse_ber_tlvs  # noqa: E402
+from parsers.esim import schema  # noqa: E402
+
+
+def _tlv(tag: str, *values: bytes) -> bytes:
+    v = b"".join(values)
+    n = len(v)
+    ln = bytes([n]) if n < 0x80 else bytes([0x81, n]) if n < 0x100 else bytes([0x82]) + n.to_bytes(2, "big")
+    return bytes.fromhex(tag) + ln + v
+
+
+ICCID = bytes.fromhex("98102143658709214365")
+
+
+def _profile(i: int) -> bytes:
+    return _tlv("E3", _tlv("5A", ICCID), _tlv("4F", bytes.fromhex("A00000055910100001") + bytes([i])),
+                _tlv("9F70", bytes([i & 1])), _tlv("90", b"nick%d" % i), _tlv("91", b"Operator"),
+                _tlv("92", b"Profile %d" % i), _tlv("95", b"\x02"))
+
+
+def _notification(i: int) -> bytes:
+    return _tlv("BF2F", _tlv("80", bytes([i])), _tlv("81", b"\x07\x80"), _tlv("0C", b"smdp.example.com"),
+                _tlv("5A", ICCID))
+
+
+# (tag, direction, container) — direction as EsimParser passes it
+SAMPLES = [
+    ("BF2D", "ESIM=>LPA", _tlv("BF2D", _tlv("A0", *[_profile(i) for i in range(5)]))),
+    ("BF28", "ESIM=>LPA", _tlv("BF28", _tlv("A0", *[_notification(i) for i in range(4)]))),
+    ("BF22", "ESIM=>LPA", _tlv("BF22", _tlv("81", b"\x02\x03\x00"), _tlv("82", b"\x02\x03\x00"),
+                                       _tlv("83", b"\x01\x02\x03"), _tlv("84", bytes.fromhex("810103820200008302FF00")),
+                                       _tlv("85", b"\x02\x1f\xff"), _tlv("0C", b"SAS-ACCREDITED-1"))),
+    ("BF31", "LPA=>ESIM", _tlv("BF31", _tlv("A0", _tlv("5A", ICCID)), _tlv("81", b"\xff"))),
+    ("BF32", "ESIM=>LPA", _tlv("BF32", _tlv("80", b"\x00"))),
+    ("BF2E", "ESIM=>LPA", _tlv("BF2E", _tlv("80", bytes(16)))),
+]
+
+
+def _best(fn, payload, direction, repeat: int, n: int) -> float:
+    best = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        for _ in range(n):
+            fn(payload, direction)
+        dt = (time.perf_counter() - t0) / n
+        best = dt if best is None else min(best, dt)
+    return best
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--count", type=int, default=5000)
+    args = ap.parse_args()
+
+    with open(schema.RSP_ASN, encoding="utf-8") as f:
+        text = f.read()
+    t0 = time.perf_counter()
+    compile_module(text, schema.FORMATS)
+    cold = time.perf_counter() - t0
+    with tempfile.TemporaryDirectory() as d:
+        path = os.path.join(d, "rsp.asn")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+        load_schema(path, schema.FORMATS)  # writes the cache
+        t0 = time.perf_counter()
+        load_schema(path, schema.FORMATS)
+        warm = time.perf_counter() - t0
+    print(f"rsp.asn: compile {cold * 1e3:.1f} ms, cached load {warm * 1e3:.1f} ms")
+
+    schema.rsp_schema()
+    for tag, direction, container in SAMPLES:
+        payload = parse_ber_tlvs(container)[0].value
+        handler = resolve(MsgType.ESIM, tag)()
+        hand = _best(handler.build, payload, direction, args.repeat, args.count)
+        generic = _best(lambda p, d: schema.decode_container(tag, p, d), payload, direction, args.repeat, args.count)
+        print(f"{tag} {schema.top_type(tag, direction):<24}: hand-written {hand * 1e6:6.1f} µs, "
+              f"schema {generic * 1e6:6.1f} µs")
+
+
+if __name__ == "__main__":
+    main()
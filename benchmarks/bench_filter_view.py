@@ -0,0 +1,63 @@
+"""Category toggles on a large session: rebuilding event dicts vs. index masks + EventView.
+
+Results of a synthetic log are repeated up to --events (toggle cost depends only on the count).
+"rebuild" is what GuiSession did before: to_gui_events over every result per toggle plus the
+GUI's copy of the list. "view" is GuiSession now: a mask from the EventIndex columns and a lazy
+EventView; reading the rows a list shows (--rows) is timed separately.
+
+Usage: python benchmarks/bench_filter_view.py [--events N] [--rows R] [--repeat K]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.synth import make_mtk_log  # noqa: E402
+from pipeline import Pipeline  # noqa: E402
+from render.gui_adapter import EventIndex, EventView, shown_kinds, to_gui_events  # noqa: E402
+
+TOGGLES = [["proactive", "esim"], ["proactive"], ["esim", "normal_sim"], ["proactive", "esim", "normal_sim"], []]
+
+
+def _best(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = fn()
+        best = min(best, time.perf_counter() - t0)
+    return best, out
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--events", type=int, default=1000000)
+    ap.add_argument("--rows", type=int, default=60, help="rows read after each toggle (a screenful)")
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+
+    with tempfile.NamedTemporaryFile("w", suffix=".txt", delete=False) as tmp:
+        tmp.write(make_mtk_log(20000, noise_ratio=0.5, menu_ratio=0.2))
+    try:
+        base = Pipeline(prefer_mtk=None, show_normal_sim=True, deferred=True).run_from_file(tmp.name)
+    finally:
+        os.unlink(tmp.name)
+    results = (base * (args.events // len(base) + 1))[:args.events]
+
+    t0 = time.perf_counter()
+    index = EventIndex(results)
+    print(f"{len(results)} results; EventIndex built once in {time.perf_counter() - t0:.2f} s")
+    print(f"{'allowed types':<34} {'rebuild':>10} {'view':>10} {'rows':>9}  events")
+    for allowed in TOGGLES:
+        t_old, ref = _best(lambda: to_gui_events(results, allowed_types=allowed)[:], 1)
+        t_new, view = _best(lambda: EventView(results, index.mask(shown_kinds(False, allowed))), args.repeat)
+        t_rows, rows = _best(lambda: view[:args.rows], args.repeat)
+        assert len(view) == len(ref) and rows == ref[:args.rows]
+        print(f"{','.join(allowed) or '(default)':<34} {t_old * 1e3:8.0f}ms {t_new * 1e3:8.1f}ms "
+              f"{t_rows * 1e3:7.2f}ms  {len(view)}")
+
+
+if __name__ == "__main__":
+    main()
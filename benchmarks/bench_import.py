@@ -0,0 +1,73 @@
+"""Cold-start import time of the headless API and of the GUI, each in a fresh interpreter.
+
+Every sample is a new `python -c` process (bytecode caches warm, as after the first run),
+timing only the import itself. Also reports whether tkinter got loaded and how many parser
+handler modules were imported up front (core.registry imports them on first use).
+
+Usage: python benchmarks/bench_import.py [--repeat R] [--profile]
+  --profile  also print the slowest imports (python -X importtime) for each target
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+TARGETS = [
+    ("headless: pipeline", "import pipeline"),
+    ("headless: app.adapter", "import app.adapter"),
+    ("headless: main (no GUI)", "import main"),
+    ("GUI: app.gui", "import app.gui"),
+]
+
+_PROBE = """
+import sys, time
+t0 = time.perf_counter()
+{stmt}
+dt = time.perf_counter() - t0
+handlers = sum(1 for m in sys.modules if m.startswith(("parsers.esim.tlvs.", "parsers.proactive.cmds.")))
+print(dt, "tkinter" in sys.modules, handlers)
+"""
+
+
+def _sample(stmt: str):
+    out = subprocess.run([sys.executable, "-c", _PROBE.format(stmt=stmt)], cwd=ROOT,
+                         capture_output=True, text=True, check=True).stdout.split()
+    return float(out[0]), out[1] == "True", int(out[2])
+
+
+def _slowest(stmt: str, n: int = 8):
+    err = subprocess.run([sys.executable, "-X", "importtime", "-c", stmt], cwd=ROOT,
+                         capture_output=True, text=True).stderr
+    rows = []
+    for line in err.splitlines():
+        parts = line.split("|")
+        if len(parts) == 3 and parts[1].strip().isdigit():
+            rows.append((int(parts[1]), parts[2].rstrip()))
+    return sorted(rows, reverse=True)[:n]
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--repeat", type=int, default=7)
+    ap.add_argument("--profile", action="store_true")
+    args = ap.parse_args()
+
+    for label, stmt in TARGETS:
+        try:
+            samples = [_sample(stmt) for _ in range(args.repeat)]
+        except subprocess.CalledProcessError as e:  # e.g. no tkinter in this Python build
+            print(f"{label:<26}: failed ({e.stderr.strip().splitlines()[-1]})")
+            continue
+        times = sorted(s[0] for s in samples)
+        _, tk, handlers = samples[0]
+        print(f"{label:<26}: min {times[0] * 1e3:6.1f} ms  median {times[len(times) // 2] * 1e3:6.1f} ms  "
+              f"tkinter={tk}  handler modules={handlers}")
+        if args.profile:
+            for us, name in _slowest(stmt):
+                print(f"    {us / 1e3:7.1f} ms  {name}")
+
+
+if __name__ == "__main__":
+    main()
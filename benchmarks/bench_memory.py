@@ -0,0 +1,75 @@
+"""Bytes held per parsed event: plain ParseNode trees vs. arena-packed trees (core.arena).
+
+Measured with tracemalloc over the full result list (messages, meta, results, trees).
+"--no-parse-cache" gives every event its own tree (the worst case);
+"--expand" decodes all lazy subtrees first, as a GUI user opening every node would.
+
+Usage: python benchmarks/bench_memory.py [--apdus N] [--log PATH] [--no-parse-cache] [--expand]
+"""
+import argparse
+import gc
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.synth import make_mtk_log  # noqa: E402
+from pipeline import DEFAULT_PARSE_CACHE_SIZE, Pipeline  # noqa: E402
+from render.tree_builder import to_tree_dict  # noqa: E402
+
+
+def _measure(path: str, compact: bool, cache_size: int, expand: bool):
+    gc.collect()
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    pl = Pipeline(prefer_mtk=None, parse_cache_size=cache_size, compact_trees=compact)
+    results = pl.run_from_file(path)
+    if expand:
+        for r in results:
+            to_tree_dict(r)
+    dt = time.perf_counter() - t0
+    pl.parse_cache = None  # count only what the result list itself keeps alive
+    gc.collect()
+    held, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return results, held, dt
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--apdus", type=int, default=50000)
+    ap.add_argument("--log", help="use an existing log instead of a synthetic MTK one")
+    ap.add_argument("--menus", type=float, default=0.3, help="share of transactions with a large (menu) tree")
+    ap.add_argument("--no-parse-cache", action="store_true")
+    ap.add_argument("--expand", action="store_true")
+    args = ap.parse_args()
+
+    path = args.log
+    tmp = None
+    if not path:
+        tmp = tempfile.NamedTemporaryFile("w", suffix=".txt", delete=False)
+        tmp.write(make_mtk_log(args.apdus, noise_ratio=0.5, menu_ratio=args.menus))
+        tmp.close()
+        path = tmp.name
+    cache_size = 0 if args.no_parse_cache else DEFAULT_PARSE_CACHE_SIZE
+    try:
+        plain = None
+        for compact in (False, True):
+            results, held, dt = _measure(path, compact, cache_size, args.expand)
+            trees = [to_tree_dict(r) for r in results]
+            if plain is None:
+                plain = trees
+            label = "arena" if compact else "plain"
+            print(f"{label}: {len(results)} events, {held / len(results):8.0f} bytes/event, "
+                  f"{dt:.2f}s, identical={trees == plain}")
+            del results, trees
+    finally:
+        if tmp is not None:
+            os.unlink(tmp.name)
+
+
+if __name__ == "__main__":
+    main()
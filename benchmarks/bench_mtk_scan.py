@@ -0,0 +1,59 @@
+"""Lines/s of the MTK extractor: legacy per-line regexes vs. prefiltered combined scanner.
+
+Usage: python benchmarks/bench_mtk_scan.py [--apdus N] [--noise 0.95]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.synth import make_mtk_log  # noqa: E402
+from data_io.extractors.mtk import MTKExtractor  # noqa: E402
+
+
+def _run(data: bytes, fast: bool, repeat: int):
+    best = None
+    msgs = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        msgs = list(MTKExtractor(fast_scan=fast).iter_messages(_Reader(data)))
+        dt = time.perf_counter() - t0
+        best = dt if best is None else min(best, dt)
+    return best, msgs
+
+
+class _Reader:
+    """Minimal in-memory binary reader (avoids measuring disk I/O)."""
+    def __init__(self, data: bytes):
+        self._mv = memoryview(data)
+        self._pos = 0
+
+    def read(self, n: int) -> bytes:
+        chunk = self._mv[self._pos:self._pos + n].tobytes()
+        self._pos += len(chunk)
+        return chunk
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--apdus", type=int, default=100000)
+    ap.add_argument("--noise", type=float, default=0.95)
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+
+    data = make_mtk_log(args.apdus, noise_ratio=args.noise).encode("utf-8")
+    n_lines = data.count(b"\n")
+    print(f"log: {len(data) / 1e6:.1f} MB, {n_lines} lines")
+
+    t_old, m_old = _run(data, fast=False, repeat=args.repeat)
+    t_new, m_new = _run(data, fast=True, repeat=args.repeat)
+    same = [(m.raw, m.direction) for m in m_old] == [(m.raw, m.direction) for m in m_new]
+    print(f"legacy regex scan : {n_lines / t_old:12,.0f} lines/s  ({t_old:.2f}s)")
+    print(f"prefiltered scan  : {n_lines / t_new:12,.0f} lines/s  ({t_new:.2f}s)")
+    print(f"speedup x{t_old / t_new:.1f}, {len(m_new)} messages, identical output: {same}")
+
+
+if __name__ == "__main__":
+    main()
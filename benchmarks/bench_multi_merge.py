@@ -0,0 +1,66 @@
+"""Rotated logs: merging the parts of a split MTK log must give the same messages as the whole log.
+
+The log is cut every --lines lines, wherever that falls: inside a multi-line APDU group,
+between an E2 chain's segments, or between a timestamp line and its group. Messages are
+compared on raw / direction / ts / gap (line, offset and file differ by construction).
+Small --lines values stress groups that span several parts and parts without timestamps.
+
+Usage: python benchmarks/bench_multi_merge.py [--apdus N] [--lines 3000,97,13] [--log PATH]
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.synth import make_mtk_log  # noqa: E402
+from data_io.extractors.mtk import MTKExtractor  # noqa: E402
+from data_io.multi import expand_inputs, iter_merged_mtk  # noqa: E402
+
+
+def _key(msgs):
+    return [(m.raw, m.direction, m.meta.get("ts"), m.meta.get("gap")) for m in msgs]
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--apdus", type=int, default=20000)
+    ap.add_argument("--lines", default="3000,97,13", help="lines per part")
+    ap.add_argument("--log", help="split an existing MTK log instead of a synthetic one")
+    args = ap.parse_args()
+
+    work = tempfile.mkdtemp()
+    try:
+        path = args.log
+        if not path:
+            path = os.path.join(work, "whole.txt")
+            with open(path, "w") as f:
+                f.write(make_mtk_log(args.apdus, noise_ratio=0.8, menu_ratio=0.1))
+        with open(path, "rb") as f:
+            lines = f.read().splitlines(True)
+        ex = MTKExtractor()
+        t0 = time.perf_counter()
+        whole = _key(ex.iter_file(path))
+        t_whole = time.perf_counter() - t0
+        print(f"{len(lines)} lines, {len(whole)} messages; whole file {t_whole:.2f} s")
+        for n in (int(x) for x in args.lines.split(",")):
+            parts = os.path.join(work, f"parts_{n}")
+            os.mkdir(parts)
+            for i in range(0, len(lines), n):
+                with open(os.path.join(parts, f"md_log_{i // n}.txt"), "wb") as f:
+                    f.writelines(lines[i:i + n])
+            t0 = time.perf_counter()
+            merged = _key(iter_merged_mtk(expand_inputs(parts), ex))
+            dt = time.perf_counter() - t0
+            print(f"{-(-len(lines) // n):>6} parts of {n:<5} lines: {dt:6.2f} s  {len(merged)} messages  "
+                  f"identical={merged == whole}")
+            shutil.rmtree(parts)
+    finally:
+        shutil.rmtree(work)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""Throughput of serial vs. process-pool MTK extraction (output must be identical).
+
+Usage: python benchmarks/bench_parallel_extract.py [--apdus N] [--workers 2,4,8] [--log PATH]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.synth import make_mtk_log  # noqa: E402
+from data_io.extractors.mtk import MTKExtractor  # noqa: E402
+
+
+def _key(msgs):
+    return [(m.raw, m.direction, m.meta) for m in msgs]
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--apdus", type=int, default=200000)
+    ap.add_argument("--noise", type=float, default=0.95)
+    ap.add_argument("--workers", default="2,4,8")
+    ap.add_argument("--log", help="use an existing MTK log instead of a synthetic one")
+    args = ap.parse_args()
+
+    path = args.log
+    tmp = None
+    if not path:
+        tmp = tempfile.NamedTemporaryFile("w", suffix=".txt", delete=False)
+        tmp.write(make_mtk_log(args.apdus, noise_ratio=args.noise))
+        tmp.close()
+        path = tmp.name
+    try:
+        size = os.path.getsize(path) / 1e6
+        ex = MTKExtractor()
+        t0 = time.perf_counter()
+        serial = _key(ex.iter_file(path))
+        t_serial = time.perf_counter() - t0
+        print(f"log {size:.0f} MB, {len(serial)} messages, {os.cpu_count()} CPUs")
+        print(f"serial      : {size / t_serial:8.1f} MB/s")
+        for w in (int(x) for x in args.workers.split(",")):
+            t0 = time.perf_counter()
+            par = _key(ex.iter_file(path, workers=w))
+            dt = time.perf_counter() - t0
+            print(f"workers={w:<3} : {size / dt:8.1f} MB/s  x{t_serial / dt:.2f}  identical={par == serial}")
+    finally:
+        if tmp is not None:
+            os.unlink(tmp.name)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""Throughput of serial vs. process-pool parsing, Pipeline(workers=N) (output must be identical).
+
+Messages are extracted once up front; only classify/parse/pair is timed. Pool start-up is
+reported separately (the pool is persistent, so it is paid once per Pipeline).
+"--no-parse-cache" makes every message a real parse, as on logs with few repeated APDUs.
+
+Usage: python benchmarks/bench_parallel_parse.py [--apdus N] [--workers 2,4,8] [--log PATH]
+                                                 [--no-parse-cache] [--compact]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.synth import make_mtk_log  # noqa: E402
+from pipeline import DEFAULT_PARSE_CACHE_SIZE, Pipeline  # noqa: E402
+from render.tree_builder import to_tree_dict  # noqa: E402
+
+
+def _key(results):
+    return [(r.msg_type, r.title, r.tag, r.command, r.responses, r.sw, r.warnings, r.errors, to_tree_dict(r))
+            for r in results]
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--apdus", type=int, default=100000)
+    ap.add_argument("--menus", type=float, default=0.3, help="share of FETCHes of unique SET UP MENUs")
+    ap.add_argument("--workers", default="2,4,8")
+    ap.add_argument("--log", help="use an existing MTK log instead of a synthetic one")
+    ap.add_argument("--no-parse-cache", action="store_true")
+    ap.add_argument("--compact", action="store_true", help="keep arena-packed trees (as the GUI does)")
+    args = ap.parse_args()
+
+    path = args.log
+    tmp = None
+    if not path:
+        tmp = tempfile.NamedTemporaryFile("w", suffix=".txt", delete=False)
+        tmp.write(make_mtk_log(args.apdus, noise_ratio=0.5, menu_ratio=args.menus))
+        tmp.close()
+        path = tmp.name
+    try:
+        opts = dict(prefer_mtk=None, compact_trees=args.compact,
+                    parse_cache_size=0 if args.no_parse_cache else DEFAULT_PARSE_CACHE_SIZE)
+        msgs = list(Pipeline(**opts)._extract(path, "mtk"))
+        t0 = time.perf_counter()
+        serial = Pipeline(**opts)._run_messages(msgs)
+        t_serial = time.perf_counter() - t0
+        ref = _key(serial)
+        print(f"{len(msgs)} messages, {os.cpu_count()} CPUs")
+        print(f"serial      : {len(msgs) / t_serial / 1e3:8.1f} k msg/s")
+        for w in (int(x) for x in args.workers.split(",")):
+            with Pipeline(workers=w, **opts) as pl:
+                t0 = time.perf_counter()
+                pl._run_messages(msgs[:1])  # start the pool
+                start = time.perf_counter() - t0
+                t0 = time.perf_counter()
+                par = pl._run_messages(msgs)
+                dt = time.perf_counter() - t0
+            print(f"workers={w:<3} : {len(msgs) / dt / 1e3:8.1f} k msg/s  x{t_serial / dt:.2f}  "
+                  f"(pool start {start * 1e3:.0f} ms)  identical={_key(par) == ref}")
+    finally:
+        if tmp is not None:
+            os.unlink(tmp.name)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""Synthetic MTK modem log generator shared by the benchmarks."""
+import random
+from typing import List
+
+
+def _spaced(h: str) -> str:
+    return " ".join(h[i:i+2] for i in range(0, len(h), 2))
+
+
+def _tx(out: List[str], h: str, per_line: int = 16):
+    for k, i in enumerate(range(0, len(h), 2 * per_line)):
+        out.append(f"APDU_tx {k}: {_spaced(h[i:i + 2 * per_line])}")
+
+
+def _rx(out: List[str], h: str):
+    out.append(f"APDU_rx 0: {_spaced(h)}")
+
+
+def _tlv(tag: str, value: str) -> str:
+    return f"{tag}{len(value) // 2:02X}{value}"
+
+
+def _setup_menu(r: random.Random) -> str:
+    """SET UP MENU proactive command with 4-10 items of random text (a 10-20 node parse tree)."""
+    items = "".join(_tlv("8F", f"{i:02X}" + bytes(r.choices(range(0x41, 0x5B), k=8)).hex().upper())
+                    for i in range(1, r.randint(4, 10) + 1))
+    body = _tlv("81", "012500") + _tlv("82", "8182") + _tlv("85", "4D61696E") + items
+    return _tlv("D0", body)  # at most 125 bytes: short length form
+
+
+def make_mtk_log(n_apdus: int, noise_ratio: float = 0.95, seed: int = 1, menu_ratio: float = 0.0) -> str:
+    """Return a log with ``n_apdus`` transactions, ~``noise_ratio`` of lines being non-APDU noise.
+
+    ``menu_ratio`` of the transactions are FETCHes of a unique SET UP MENU (larger parse trees).
+    """
+    r = random.Random(seed)
+    out: List[str] = []
+    ms = 0
+    # 每个事务平均约 3 行 APDU，按比例补足噪声行
+    noise_per_txn = max(0, int(round(3 * noise_ratio / (1 - noise_ratio)))) if noise_ratio < 1 else 0
+    for _ in range(n_apdus):
+        ms += r.randint(1, 500)
+        ts = f"2024-05-21 {ms // 3600000 % 24:02d}:{ms // 60000 % 60:02d}:{ms // 1000 % 60:02d}.{ms % 1000:03d}"
+        for _ in range(r.randint(0, 2 * noise_per_txn)):
+            out.append(f"[{ts}] [MD1][SIM] sim_task: poll event id={r.randint(0, 99999)} state=idle")
+        if menu_ratio and r.random() < menu_ratio:
+            _tx(out, "8012000060"); _rx(out, _setup_menu(r) + "9000")
+            continue
+        k = r.random()
+        if k < 0.35:
+            _tx(out, "80F2000C00"); _rx(out, "9000")
+        elif k < 0.5:
+            _tx(out, "8012000020")
+            _rx(out, "D01A810301210082028102" + "8D0F04" + "41" * 14 + "9000")
+        elif k < 0.6:
+            _tx(out, "801400000C810301210082028281830100"); _rx(out, "9000")
+        elif k < 0.75:
+            _tx(out, "81E2910003BF2E0000")
+            _rx(out, "BF2E1280" + "10" + "AB" * 16 + "9000")
+        elif k < 0.85:
+            val = "A0" + "81" + "F0" + "80" * 240
+            full = "BF36" + "82" + f"{len(val) // 2:04X}" + val
+            segs = [full[i:i + 240] for i in range(0, len(full), 240)]
+            for j, sg in enumerate(segs):
+                p1 = 0x91 if j == len(segs) - 1 else 0x11
+                _tx(out, f"81E2{p1:02X}{j:02X}{len(sg) // 2:02X}" + sg + "00")
+                _rx(out, "9000")
+        else:
+            _tx(out, "00A4040410A0000000871002FF49FF0589")
+            _rx(out, "6F1A8407A0000000871002A50F9000")
+    return "\n".join(out) + "\n"
@@ -1,7 +1,7 @@
 
-from typing import Tuple
-from core.models import MsgType, Message
-from core.utils import parse_apdu_header, first_tlv_tag_after_store_header
+from typing import Dict, NamedTuple, Optional, Tuple
+from core.models import Apdu, MsgType, Message
+from core.utils import first_tlv_tag_after_store_header, parse_apdu_header
 
 # Request titles mapping per spec
 RESP_TITLES = {  
@@ -92,32 +92,81 @@ REQ_TITLES = {
 
 
 
-def classify_message(msg: Message):
-    """Return (msg_type, direction_hint, tag, title). Direction uses ASCII '=>'."""
-    s = msg.raw
-    # ESIM => LPA (response from eUICC): BF..
-    if s.startswith('BF'):
-        tag = s[:4] if len(s) >= 4 else 'BF'
-        title = f"eSIM=>LPA: {RESP_TITLES.get(tag, tag)}"
-        return MsgType.ESIM, 'ESIM=>LPA', tag, title
-    # Proactive UICC => Terminal: D0..
-    if s.startswith('D0'):
-        return MsgType.PROACTIVE, 'UICC=>TERMINAL', 'D0', 'Proactive UICC (D0)'
-    # Parse header
-    cla, ins, _, _ = parse_apdu_header(s).cla, parse_apdu_header(s).ins, None, None
-    # Terminal => UICC proactive
-    if cla == 0x80 and ins in (0x10, 0x12, 0x14, 0xC2):
-        names = {0x10:'TERMINAL PROFILE',0x12:'FETCH',0x14:'TERMINAL RESPONSE',0xC2:'ENVELOPE'}
-        return MsgType.PROACTIVE, 'TERMINAL=>UICC', f'80{ins:02X}', f"Proactive: {names[ins]}"
-    # LPA => ESIM (STORE DATA E2)
-    if ins == 0xE2 and ((0x80 <= (cla or -1) <= 0x83) or (0xC0 <= (cla or -1) <= 0xCF)):
-        tag = first_tlv_tag_after_store_header(s) or 'E2'
+class Route(NamedTuple):
+    """一条消息的分类结果及对应的解析入口。"""
+    msg_type: MsgType
+    direction: str
+    tag: Optional[str]
+    title: str
+    key: Optional[str]  # 解析器内的处理入口：Proactive 为 D0/TERMINAL_RESPONSE/...，eSIM 为顶层 TLV 标签
+
+
+_NORMAL = Route(MsgType.NORMAL_SIM, 'UNKNOWN', None, 'SIM APDU', None)
+_D0 = Route(MsgType.PROACTIVE, 'UICC=>TERMINAL', 'D0', 'Proactive UICC (D0)', 'D0')
+
+
+def _esim_rsp(tag: str) -> Route:
+    return Route(MsgType.ESIM, 'ESIM=>LPA', tag, f"eSIM=>LPA: {RESP_TITLES.get(tag, tag)}", tag)
+
+
+# ESIM => LPA（eUICC 的响应）：BF xx，按第二个字节查表
+_BF_ROUTES = tuple(_esim_rsp(f"BF{b:02X}") for b in range(256))
+_BF_SHORT = _esim_rsp('BF')
+
+# Terminal => UICC proactive：(CLA << 8 | INS) -> Route
+_CMD_ROUTES: Dict[int, Route] = {
+    0x80 << 8 | ins: Route(MsgType.PROACTIVE, 'TERMINAL=>UICC', f'80{ins:02X}', f"Proactive: {name}", key)
+    for ins, name, key in ((0x10, 'TERMINAL PROFILE', 'TERMINAL_PROFILE'), (0x12, 'FETCH', 'FETCH'),
+                           (0x14, 'TERMINAL RESPONSE', 'TERMINAL_RESPONSE'), (0xC2, 'ENVELOPE', 'ENVELOPE'))
+}
+# LPA => ESIM（STORE DATA E2）的 CLA：80-83、C0-CF；路由再由报文头后的首个标签决定
+_STORE_DATA = frozenset((cla << 8 | 0xE2) for cla in (*range(0x80, 0x84), *range(0xC0, 0xD0)))
+_E2_ROUTES: Dict[int, Route] = {}
+_MULTI_BYTE_TAG = frozenset((0x9F, 0x5F, 0x7F, 0xBF))
+
+
+def _store_data_route(b: bytes) -> Route:
+    # 以报文头后首个标签的整数值查表（-1 表示没有数据），每种标签只建一次 Route
+    n = len(b)
+    k = -1 if n < 6 else (b[5] << 8 | b[6]) if b[5] in _MULTI_BYTE_TAG and n >= 7 else b[5]
+    r = _E2_ROUTES.get(k)
+    if r is None:
+        tag = first_tlv_tag_after_store_header(b)
         name = REQ_TITLES.get(tag)
         if name:
-            return MsgType.ESIM, 'LPA=>ESIM', tag, f"LPA=>ESIM: {name}"
-        return MsgType.ESIM, 'LPA=>ESIM', 'E2', 'eSIM STORE DATA (E2)'
-    # Others
-    return MsgType.NORMAL_SIM, 'UNKNOWN', None, 'SIM APDU'
+            r = Route(MsgType.ESIM, 'LPA=>ESIM', tag, f"LPA=>ESIM: {name}", tag)
+        else:
+            r = Route(MsgType.ESIM, 'LPA=>ESIM', 'E2', 'eSIM STORE DATA (E2)', tag)
+        _E2_ROUTES[k] = r  # 至多 256 个单字节标签加 4×256 个双字节标签
+    return r
+
+
+def route_message(msg: Message) -> Tuple[Route, Apdu]:
+    """分类并选出解析入口，同时返回解码好的报文头交给解析器，不再重复解码。"""
+    b = msg.data
+    hdr = parse_apdu_header(b)
+    if not b:
+        return _NORMAL, hdr
+    b0 = b[0]
+    if b0 == 0xBF:
+        return (_BF_ROUTES[b[1]] if len(b) > 1 else _BF_SHORT), hdr
+    if b0 == 0xD0:
+        return _D0, hdr
+    if len(b) < 4:
+        return _NORMAL, hdr
+    ci = b0 << 8 | b[1]
+    r = _CMD_ROUTES.get(ci)
+    if r is not None:
+        return r, hdr
+    if ci in _STORE_DATA:
+        return _store_data_route(b), hdr
+    return _NORMAL, hdr
+
+
+def classify_message(msg: Message):
+    """Return (msg_type, direction_hint, tag, title). Direction uses ASCII '=>'."""
+    r = route_message(msg)[0]
+    return r.msg_type, r.direction, r.tag, r.title
 
 # 在 classify/rules.py 的判定函数里追加/修正（示意）：
 
@@ -0,0 +1,201 @@
+"""解析树的紧凑存储：整棵树压成几列并列数组，而不是每个节点一个对象加一个 children 列表。
+
+节点按广度优先编号，同一父节点的子节点编号连续，所以只需 first/count 两列即可找回子节点；
+另存 parent 一列以便向上回溯。名称存全局名称表的下标；hint 多数为空，整棵树都没有 hint
+时不建这一列。
+
+ArenaNode 是只读视图，接口与 ParseNode 相同（name/value/hint/children），
+渲染、复制等只读遍历代码无需改动；需要可修改的树时用 to_node() 还原。
+尚未解码的 LazyParseNode 不会被强制解码，原对象直接留在树中。
+"""
+import array
+from sys import intern
+from typing import Dict, List, Optional, Union
+
+from core.models import LazyParseNode, ParseNode
+
+# 少于这么多节点的树保持原样：几列数组本身的开销比省下的还多
+MIN_PACK_NODES = 8
+
+_NAMES: List[str] = []
+_NAME_IDS: Dict[str, int] = {}
+
+
+def _name_id(name: str) -> int:
+    i = _NAME_IDS.get(name)
+    if i is None:
+        i = _NAME_IDS[name] = len(_NAMES)
+        _NAMES.append(intern(name))
+    return i
+
+
+def _external(n: ParseNode) -> bool:
+    """原样保留、不压入数组的节点：未解码的懒节点，以及名称不是字符串的节点。"""
+    return (isinstance(n, LazyParseNode) and not n.loaded) or type(n.name) is not str
+
+
+class TreeArena:
+    """一棵压缩后的树。整数列（名称下标、父节点、首个子节点、子节点数）首尾相接存在同一个
+    定长数组里，value/hint 各一个元组，都按最终大小一次分配，没有列表扩容留下的余量。"""
+    __slots__ = ("n", "cols", "values", "hints", "external")
+
+    def __init__(self, root: ParseNode):
+        nodes: List[ParseNode] = [root]
+        names: List[int] = []
+        parent: List[int] = [-1]
+        first: List[int] = []
+        count: List[int] = []
+        values: List[Optional[str]] = []
+        hints: List[Optional[str]] = []
+        external: Dict[int, ParseNode] = {}
+        i = 0
+        while i < len(nodes):
+            n = nodes[i]
+            if _external(n):
+                external[i] = n
+                names.append(0)
+                values.append(None)
+                hints.append(None)
+                first.append(0)
+                count.append(0)
+            else:
+                kids = n.children
+                names.append(_name_id(n.name))
+                values.append(n.value)
+                hints.append(n.hint)
+                first.append(len(nodes))
+                count.append(len(kids))
+                nodes.extend(kids)
+                parent.extend([i] * len(kids))
+            i += 1
+        self.n = len(nodes)
+        self.cols = array.array("i", names + parent + first + count)
+        self.values = tuple(values)
+        self.hints = tuple(hints) if any(h is not None for h in hints) else None
+        self.external = external or None
+
+    def __len__(self) -> int:
+        return self.n
+
+    def name_of(self, i: int) -> str:
+        return _NAMES[self.cols[i]]
+
+    def parent_of(self, i: int) -> int:
+        return self.cols[self.n + i]
+
+    def children_of(self, i: int) -> range:
+        start = self.cols[2 * self.n + i]
+        return range(start, start + self.cols[3 * self.n + i])
+
+    def node(self, i: int) -> Union["ArenaNode", ParseNode]:
+        ext = self.external
+        if ext is not None and i in ext:
+            return ext[i]
+        return ArenaNode(self, i)
+
+    def unpack(self) -> ParseNode:
+        """整棵树还原成 ParseNode：按编号倒序逐个建节点，子节点编号连续，children 即一段切片。"""
+        n, cols, values, ext = self.n, self.cols, self.values, self.external or {}
+        hints = self.hints or (None,) * n
+        nodes: List[Optional[ParseNode]] = [None] * n
+        new = ParseNode.__new__
+        for i in range(n - 1, -1, -1):
+            node = ext.get(i)
+            if node is None:
+                node = new(ParseNode)  # 名称取自名称表，已驻留，无需再走 __post_init__
+                node.name, node.value, node.hint = _NAMES[cols[i]], values[i], hints[i]
+                start = cols[2 * n + i]
+                node.children = nodes[start:start + cols[3 * n + i]]
+            nodes[i] = node
+        return nodes[0]
+
+    def __reduce__(self):
+        # 名称下标只在本进程的名称表里有效，跨进程传递时附上本树用到的名称（每个只传一次）
+        n = self.n
+        ids = self.cols[:n]
+        local = {k: j for j, k in enumerate(dict.fromkeys(ids))}
+        names = [_NAMES[k] for k in local]
+        return _rebuild, (names, array.array("i", [local[k] for k in ids]), self.cols[n:],
+                          self.values, self.hints, self.external)
+
+
+def _rebuild(names, name_idx, links, values, hints, external) -> TreeArena:
+    ids = [_name_id(name) for name in names]
+    arena = TreeArena.__new__(TreeArena)
+    arena.n = len(name_idx)
+    arena.cols = array.array("i", [ids[k] for k in name_idx])
+    arena.cols.extend(links)
+    arena.values, arena.hints, arena.external = values, hints, external
+    return arena
+
+
+class ArenaNode:
+    """TreeArena 中一个节点的只读视图；children 每次访问都新建视图列表，修改不会生效。"""
+    __slots__ = ("arena", "index")
+
+    def __init__(self, arena: TreeArena, index: int):
+        self.arena = arena
+        self.index = index
+
+    @property
+    def name(self) -> str:
+        return self.arena.name_of(self.index)
+
+    @property
+    def value(self) -> Optional[str]:
+        return self.arena.values[self.index]
+
+    @property
+    def hint(self) -> Optional[str]:
+        hints = self.arena.hints
+        return None if hints is None else hints[self.index]
+
+    @property
+    def children(self) -> List[Union["ArenaNode", ParseNode]]:
+        a = self.arena
+        return [a.node(j) for j in a.children_of(self.index)]
+
+    @property
+    def parent(self) -> Optional["ArenaNode"]:
+        p = self.arena.parent_of(self.index)
+        return None if p < 0 else ArenaNode(self.arena, p)
+
+    def to_node(self) -> ParseNode:
+        """还原成可修改的 ParseNode 树（未解码的懒节点仍原样引用）。"""
+        if self.index == 0:
+            return self.arena.unpack()
+        return ParseNode(name=self.name, value=self.value, hint=self.hint,
+                         children=[c.to_node() if isinstance(c, ArenaNode) else c for c in self.children])
+
+    def __eq__(self, other):
+        if not isinstance(other, (ArenaNode, ParseNode)):
+            return NotImplemented
+        return (self.name, self.value, self.children, self.hint) == \
+            (other.name, other.value, other.children, other.hint)
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return f"ArenaNode(name={self.name!r}, value={self.value!r}, hint={self.hint!r}, " \
+               f"children={len(self.children)})"
+
+
+def _has_nodes(root: ParseNode, n: int) -> bool:
+    """树中是否至少有 n 个可压缩节点（数到 n 即停）。"""
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        if _external(node):
+            continue
+        n -= 1
+        if n <= 0:
+            return True
+        stack.extend(node.children)
+    return False
+
+
+def pack_tree(root: Optional[ParseNode]) -> Optional[Union[ArenaNode, ParseNode]]:
+    """把 root 压成 TreeArena，返回根节点视图；小树或根本身不可压缩时原样返回。"""
+    if root is None or isinstance(root, ArenaNode) or not _has_nodes(root, MIN_PACK_NODES):
+        return root
+    return TreeArena(root).node(0)
@@ -0,0 +1,588 @@
+"""ASN.1 模块（子集）编译为按标签查找的 BER 解码表，并据此把 TLV 解码成 ParseNode 树。
+
+支持的语法：SEQUENCE / SET / CHOICE / SEQUENCE OF / SET OF、[n] / [APPLICATION n] /
+[PRIVATE n] 标签及 IMPLICIT / EXPLICIT、AUTOMATIC TAGS 自动标签、BIT STRING 命名位、
+INTEGER 命名数与 ENUMERATED、OCTET STRING、字符串与时间类型、BOOLEAN、NULL、
+OBJECT IDENTIFIER、类型引用及信息对象类字段（CLASS.&field）。约束、DEFAULT 值、
+OID 值赋值只做跳过。
+
+编译结果只含 dict / tuple / str / int，用 marshal 存在 ASN.1 文件旁的 __pycache__ 中，
+文件名带源文件内容哈希；源文件不变时启动只需读缓存，不再解析 ASN.1 文本。
+
+解码表（specs 列表，以下标互相引用）每项为：
+- (K_PRIM, 格式, 命名数/命名位 或 None)
+- (K_STRUCT, {标签: 字段})：SEQUENCE / SET 内容，或显式标签包着的 CHOICE
+- (K_LIST, {标签: 字段})：SEQUENCE OF 内容，子节点按序号命名
+- (K_WRAP, {标签: 字段})：显式标签包着的非 CHOICE 类型，解开后用外层名称
+- (K_ANY,)：开放类型，内容按原始 TLV 列出
+字段为 (名称, spec 下标, 是否未加标签的 CHOICE)；后者的 TLV 本身就是某个选项，
+再到该 CHOICE 的表中按同一标签查找。
+"""
+import marshal
+import os
+import re
+from functools import partial
+from typing import Dict, List, Optional, Tuple
+
+from core.models import LazyParseNode, ParseNode
+from core.tlv import Tlv, TlvInput, parse_ber_tlvs
+from core.utils import parse_iccid
+
+SCHEMA_VERSION = 1
+CACHE_SUFFIX = ".asnc"
+
+K_PRIM, K_STRUCT, K_LIST, K_WRAP, K_ANY = range(5)
+
+# 超过这么多字节的 OCTET STRING 只显示长度，内容放在 hint
+MAX_HEX_VALUE = 64
+
+
+class Asn1Error(ValueError):
+    pass
+
+
+# ---------------------------------------------------------------- 词法 / 语法
+
+_TOKEN_RE = re.compile(r"""
+    (?P<skip>\s+|--.*?(?:--|$))
+  | (?P<tok>::=|\.\.\.|\.\.|\[\[|\]\]|"[^"]*"|'[^']*'[BH]|-?\d+|&?[A-Za-z][A-Za-z0-9]*(?:-[A-Za-z0-9]+)*|[{}\[\](),.;|@!<>:^])
+""", re.M | re.X)
+
+_CLASSES = {"UNIVERSAL": 0x00, "APPLICATION": 0x40, "CONTEXT": 0x80, "PRIVATE": 0xC0}
+
+# 内置类型 -> (UNIVERSAL 标签号, 值格式)
+_BUILTIN = {
+    "BOOLEAN": (1, "bool"), "INTEGER": (2, "int"), "NULL": (5, "null"), "ENUMERATED": (10, "int"),
+    "UTF8String": (12, "utf8"), "NumericString": (18, "utf8"), "PrintableString": (19, "utf8"),
+    "IA5String": (22, "utf8"), "VisibleString": (26, "utf8"), "GraphicString": (25, "utf8"),
+    "UTCTime": (23, "time"), "GeneralizedTime": (24, "time"),
+}
+
+# 语法树节点（均为元组）：
+#   ("prim", 标签号, 格式, 命名表)      ("seq", 组件列表, 是否 SET, 自动标签)
+#   ("of", 元素类型, 元素名, 是否 SET)  ("choice", 组件列表, 自动标签)
+#   ("tagged", 类别, 标签号, 方式, 类型) ("ref", 类型名)  ("field", 类名, 字段名)  ("open",)
+
+# 常见导入类型（PKIX、PE 定义）在本地的等价描述，只求能正确匹配标签
+IMPORTED = {
+    "Certificate": ("prim", 16, "hex", None),
+    "CertificateList": ("prim", 16, "hex", None),
+    "SubjectKeyIdentifier": ("prim", 4, "hex", None),
+    "UICCCapability": ("prim", 3, "bits", None),
+    "Time": ("choice", [("utcTime", ("prim", 23, "time", None)),
+                        ("generalTime", ("prim", 24, "time", None))], False),
+}
+
+
+def tokenize(text: str) -> List[str]:
+    out = []
+    pos, n = 0, len(text)
+    while pos < n:
+        m = _TOKEN_RE.match(text, pos)
+        if m is None:
+            line = text.count("\n", 0, pos) + 1
+            raise Asn1Error(f"line {line}: unexpected {text[pos:pos + 20]!r}")
+        if m.group("tok"):
+            out.append(m.group("tok"))
+        pos = m.end()
+    return out
+
+
+class _Parser:
+    """递归下降解析；只保留类型赋值（含 CLASS 字段的类型），其余跳过。"""
+
+    def __init__(self, tokens: List[str]):
+        self.toks = tokens
+        self.i = 0
+        self.types: Dict[str, tuple] = {}
+        self.classes: Dict[str, Dict[str, tuple]] = {}
+        self.auto = False
+        self.default_explicit = True
+
+    def peek(self, k: int = 0) -> Optional[str]:
+        j = self.i + k
+        return self.toks[j] if j < len(self.toks) else None
+
+    def next(self) -> str:
+        if self.i >= len(self.toks):
+            raise Asn1Error("unexpected end of module")
+        tok = self.toks[self.i]
+        self.i += 1
+        return tok
+
+    def expect(self, tok: str):
+        got = self.next()
+        if got != tok:
+            raise Asn1Error(f"expected {tok!r}, got {got!r} (token {self.i})")
+
+    def skip_balanced(self):
+        close = {"(": ")", "{": "}", "[": "]"}[self.next()]
+        depth = 1
+        while depth:
+            tok = self.next()
+            if tok in ("(", "{", "["):
+                depth += 1
+            elif tok in (")", "}", "]"):
+                depth -= 1
+        return close
+
+    def skip_value(self):
+        if self.peek() == "{":
+            self.skip_balanced()
+        else:
+            self.next()
+
+    def module(self):
+        while self.next() != "DEFINITIONS":
+            pass
+        while (tok := self.next()) != "::=":
+            if tok in ("EXPLICIT", "IMPLICIT", "AUTOMATIC") and self.peek() == "TAGS":
+                self.auto = tok == "AUTOMATIC"
+                self.default_explicit = tok == "EXPLICIT"
+        self.expect("BEGIN")
+        while self.peek() != "END":
+            if self.peek() in ("IMPORTS", "EXPORTS"):
+                while self.next() != ";":
+                    pass
+                continue
+            self.assignment()
+
+    def assignment(self):
+        name = self.next()
+        if self.peek() == "::=":
+            self.next()
+            if self.peek() == "CLASS":
+                self.next()
+                self.classes[name] = self.class_fields()
+            else:
+                self.types[name] = self.type()
+            return
+        # 值赋值：name Type ::= value
+        self.type()
+        self.expect("::=")
+        self.skip_value()
+
+    def class_fields(self) -> Dict[str, tuple]:
+        self.expect("{")
+        fields = {}
+        while self.peek() != "}":
+            fname = self.next()
+            typ = ("open",)
+            if self.peek() not in (",", "}", "UNIQUE", "OPTIONAL", "DEFAULT"):
+                typ = self.type()
+            while self.peek() in ("UNIQUE", "OPTIONAL", "DEFAULT"):
+                if self.next() == "DEFAULT":
+                    self.skip_value()
+            fields[fname] = typ
+            if self.peek() == ",":
+                self.next()
+        self.next()
+        if self.peek() == "WITH":  # WITH SYNTAX { ... }
+            self.next()
+            self.next()
+            self.skip_balanced()
+        return fields
+
+    def type(self) -> tuple:
+        if self.peek() == "[":
+            self.next()
+            cls = "CONTEXT"
+            if self.peek() in _CLASSES:
+                cls = self.next()
+            num = int(self.next())
+            self.expect("]")
+            mode = self.next() if self.peek() in ("IMPLICIT", "EXPLICIT") else None
+            return ("tagged", cls, num, mode, self.type())
+        tok = self.next()
+        if tok in ("SEQUENCE", "SET"):
+            if self.peek() == "{":
+                node = ("seq", self.components(), tok == "SET", self.auto)
+            else:
+                if self.peek() == "SIZE":
+                    self.next()
+                while self.peek() == "(":
+                    self.skip_balanced()
+                self.expect("OF")
+                elem_name = None
+                if self.peek()[:1].islower() and self.peek(1) not in (",", "}"):
+                    elem_name = self.next()
+                node = ("of", self.type(), elem_name, tok == "SET")
+        elif tok == "CHOICE":
+            node = ("choice", self.components(), self.auto)
+        elif tok in ("OCTET", "BIT"):
+            self.expect("STRING")
+            if tok == "OCTET":
+                node = ("prim", 4, "hex", None)
+            else:
+                node = ("prim", 3, "bits", self.named() if self.peek() == "{" else None)
+        elif tok == "OBJECT":
+            self.expect("IDENTIFIER")
+            node = ("prim", 6, "oid", None)
+        elif tok in _BUILTIN:
+            num, fmt = _BUILTIN[tok]
+            named = self.named(tok == "ENUMERATED") if self.peek() == "{" else None
+            node = ("prim", num, fmt, named)
+        elif tok == "ANY":
+            node = ("open",)
+        elif self.peek() == ".":
+            self.next()
+            node = ("field", tok, self.next())
+        else:
+            node = ("ref", tok)
+        while self.peek() == "(":
+            self.skip_balanced()
+        return node
+
+    def named(self, enumerated: bool = False) -> Dict[int, str]:
+        """{a(1), b(2)} 命名数/命名位；ENUMERATED 未给值的项依次编号。"""
+        self.expect("{")
+        out: Dict[int, str] = {}
+        nxt = 0
+        while (tok := self.next()) != "}":
+            if tok in (",", "..."):
+                continue
+            if self.peek() == "(":
+                self.next()
+                nxt = int(self.next())
+                self.expect(")")
+            elif not enumerated:
+                continue
+            while nxt in out:
+                nxt += 1
+            out[nxt] = tok
+            nxt += 1
+        return out
+
+    def components(self) -> List[Tuple[str, tuple]]:
+        self.expect("{")
+        comps: List[Tuple[str, tuple]] = []
+        while (tok := self.peek()) != "}":
+            self.next()
+            if tok in (",", "...", "[[", "]]"):
+                continue
+            if tok == "!":  # 扩展标记后的异常说明
+                self.skip_value()
+                continue
+            if tok == "COMPONENTS":
+                self.expect("OF")
+                comps.append((None, self.type()))
+                continue
+            typ = self.type()
+            if self.peek() == "OPTIONAL":
+                self.next()
+            elif self.peek() == "DEFAULT":
+                self.next()
+                self.skip_value()
+            comps.append((tok, typ))
+        self.next()
+        return comps
+
+
+# ---------------------------------------------------------------- 编译
+
+def tag_hex(cls: int, num: int, constructed: bool) -> str:
+    first = cls | (0x20 if constructed else 0)
+    if num < 31:
+        return f"{first | num:02X}"
+    out = []
+    while True:
+        out.append(num & 0x7F)
+        num >>= 7
+        if not num:
+            break
+    tail = [b | 0x80 for b in reversed(out[1:])] + [out[0]]
+    return f"{first | 0x1F:02X}" + "".join(f"{b:02X}" for b in tail)
+
+
+class _Info:
+    """类型在外层的编码特征：可能出现的标签、内容解码表下标。"""
+    __slots__ = ("tags", "spec", "choice", "open", "constructed")
+
+    def __init__(self, tags, spec, choice=False, open_=False, constructed=True):
+        self.tags = tags
+        self.spec = spec
+        self.choice = choice
+        self.open = open_
+        self.constructed = constructed
+
+
+class _Compiler:
+    def __init__(self, parser: _Parser, formats: Dict[str, str]):
+        self.ast = dict(IMPORTED)
+        self.ast.update(parser.types)
+        self.classes = parser.classes
+        self.default_explicit = parser.default_explicit
+        self.formats = formats
+        self.specs: List[tuple] = [(K_ANY,)]
+        self.info: Dict[str, _Info] = {}
+        self._busy = set()
+
+    def add(self, spec: tuple) -> int:
+        self.specs.append(spec)
+        return len(self.specs) - 1
+
+    def resolve(self, name: str) -> _Info:
+        info = self.info.get(name)
+        if info is not None:
+            return info
+        node = self.ast.get(name)
+        if node is None or name in self._busy:  # 未知或递归引用：按开放类型处理
+            return _Info((), 0, open_=True)
+        self._busy.add(name)
+        fmt = self.formats.get(name)
+        if fmt is not None:
+            node = self._with_format(node, fmt)
+        info = self.info[name] = self.compile(node)
+        self._busy.discard(name)
+        return info
+
+    def _with_format(self, node: tuple, fmt: str) -> tuple:
+        if node[0] == "prim":
+            return ("prim", node[1], fmt, node[3])
+        if node[0] == "tagged":
+            return node[:4] + (self._with_format(node[4], fmt),)
+        return node
+
+    def compile(self, node: tuple) -> _Info:
+        kind = node[0]
+        if kind == "prim":
+            _, num, fmt, named = node
+            constructed = num in (16, 17)
+            return _Info((tag_hex(0, num, constructed),), self.add((K_PRIM, fmt, named)),
+                         constructed=constructed)
+        if kind == "seq":
+            _, comps, is_set, auto = node
+            return _Info(("31" if is_set else "30",), self.add((K_STRUCT, self.fields(comps, auto))))
+        if kind == "of":
+            _, elem, elem_name, is_set = node
+            label = elem_name or (elem[1] if elem[0] == "ref" else "item")
+            return _Info(("31" if is_set else "30",), self.add((K_LIST, self.entries(label, self.compile(elem)))))
+        if kind == "choice":
+            _, comps, auto = node
+            alts = self.fields(comps, auto)
+            return _Info(tuple(alts), self.add((K_STRUCT, alts)), choice=True)
+        if kind == "tagged":
+            _, cls, num, mode, inner = node
+            ii = self.compile(inner)
+            explicit = mode == "EXPLICIT" or ii.choice or ii.open or (mode is None and self.default_explicit)
+            if not explicit:
+                return _Info((tag_hex(_CLASSES[cls], num, ii.constructed),), ii.spec, constructed=ii.constructed)
+            spec = ii.spec if ii.choice or ii.open else self.add((K_WRAP, self.entries(None, ii)))
+            return _Info((tag_hex(_CLASSES[cls], num, True),), spec)
+        if kind == "ref":
+            return self.resolve(node[1])
+        if kind == "field":
+            ftype = self.classes.get(node[1], {}).get(node[2])
+            return self.compile(ftype) if ftype is not None else _Info((), 0, open_=True)
+        return _Info((), 0, open_=True)
+
+    def fields(self, comps, auto: bool) -> Dict[str, tuple]:
+        comps = self._flatten(comps)
+        if auto and not any(t[0] == "tagged" for _, t in comps):
+            comps = [(name, ("tagged", "CONTEXT", k, None, t)) for k, (name, t) in enumerate(comps)]
+        out: Dict[str, tuple] = {}
+        for name, t in comps:
+            for tag, entry in self.entries(name, self.compile(t)).items():
+                out.setdefault(tag, entry)
+        return out
+
+    def _flatten(self, comps):
+        """展开 COMPONENTS OF。"""
+        out = []
+        for name, t in comps:
+            if name is None:
+                ref = self.ast.get(t[1]) if t[0] == "ref" else t
+                if ref is not None and ref[0] == "seq":
+                    out.extend(self._flatten(ref[1]))
+            else:
+                out.append((name, t))
+        return out
+
+    def entries(self, name: Optional[str], info: _Info) -> Dict[str, tuple]:
+        return {tag: (name, info.spec, info.choice) for tag in info.tags}
+
+    def tables(self) -> tuple:
+        types = {}
+        for name in self.ast:
+            info = self.resolve(name)
+            types[name] = (info.tags, info.spec, info.choice)
+        return self.specs, types
+
+
+def compile_module(text: str, formats: Optional[Dict[str, str]] = None) -> tuple:
+    """ASN.1 模块文本 -> (specs, types)；types[类型名] = (外层标签, spec 下标, 是否 CHOICE)。
+
+    formats 按类型名覆盖基本类型的显示格式，如 {"Iccid": "iccid"}。
+    """
+    parser = _Parser(tokenize(text))
+    parser.module()
+    return _Compiler(parser, formats or {}).tables()
+
+
+def cache_path(path: str, digest: str) -> str:
+    folder, base = os.path.split(os.path.abspath(path))
+    return os.path.join(folder, "__pycache__", f"{base}.{digest}{CACHE_SUFFIX}")
+
+
+_LOADED: Dict[tuple, "Asn1Schema"] = {}
+
+
+def load_schema(path: str, formats: Optional[Dict[str, str]] = None) -> "Asn1Schema":
+    """编译 path 处的 ASN.1 模块，结果按 (源文件内容, formats, 版本) 的哈希缓存在磁盘上。"""
+    with open(path, "rb") as f:
+        source = f.read()
+    formats = formats or {}
+    origin = (path, formats)
+    import hashlib  # 首次加载 rsp.asn 时才需要，不计入冷启动时间
+    h = hashlib.blake2b(source, digest_size=16)
+    h.update(repr((SCHEMA_VERSION, sorted(formats.items()))).encode())
+    cpath = cache_path(path, h.hexdigest())
+    try:
+        with open(cpath, "rb") as f:
+            schema = Asn1Schema(*marshal.loads(f.read()), origin)  # 整块读入再解，比 marshal.load(f) 快一个数量级
+    except (OSError, EOFError, ValueError, TypeError):
+        tables = compile_module(source.decode("utf-8"), formats)
+        try:
+            os.makedirs(os.path.dirname(cpath), exist_ok=True)
+            tmp = f"{cpath}.{os.getpid()}.tmp"
+            with open(tmp, "wb") as f:
+                f.write(marshal.dumps(tables))
+            os.replace(tmp, cpath)
+        except OSError:
+            pass  # 只读目录：没有缓存，下次仍重新编译
+        schema = Asn1Schema(*tables, origin)
+    _LOADED[(path, tuple(sorted(formats.items())))] = schema
+    return schema
+
+
+def _loaded_schema(path: str, formats: Dict[str, str]) -> "Asn1Schema":
+    """反序列化用：本进程已加载过的同一模块直接复用。"""
+    schema = _LOADED.get((path, tuple(sorted(formats.items()))))
+    return schema if schema is not None else load_schema(path, formats)
+
+
+# ---------------------------------------------------------------- 解码
+
+def _oid_text(b) -> str:
+    arcs, v = [], 0
+    for x in b:
+        v = (v << 7) | (x & 0x7F)
+        if not x & 0x80:
+            arcs.append(v)
+            v = 0
+    if not arcs:
+        return ""
+    first = arcs[0]
+    head = [min(first // 40, 2), first - 40 * min(first // 40, 2)]
+    return ".".join(map(str, head + arcs[1:]))
+
+
+def _bits_value(b, named: Optional[Dict[int, str]]) -> str:
+    if len(b) < 2:
+        return "none"
+    nbits = (len(b) - 1) * 8 - (b[0] & 7)
+    v = int.from_bytes(b[1:], "big") >> (b[0] & 7)
+    if not named:
+        return format(v, f"0{nbits}b") if nbits else ""
+    # 第 0 位是首字节的最高位
+    on = [named.get(i, f"bit{i}") for i in range(nbits) if v >> (nbits - 1 - i) & 1]
+    return ", ".join(on) or "none"
+
+
+def _prim_node(name: str, fmt: str, named, t: Tlv) -> ParseNode:
+    b = t.value
+    if fmt == "hex":
+        if len(b) > MAX_HEX_VALUE:
+            return ParseNode(name=name, value=f"len={t.length}", hint=t.hex_head(120))
+        return ParseNode(name=name, value=t.value_hex)
+    if fmt == "utf8" or fmt == "time":
+        return ParseNode(name=name, value=bytes(b).decode("utf-8", "replace"))
+    if fmt == "int":
+        v = int.from_bytes(b, "big", signed=True)
+        label = named.get(v) if named else None
+        return ParseNode(name=name, value=f"{label}({v})" if label else str(v))
+    if fmt == "bits":
+        return ParseNode(name=name, value=_bits_value(b, named), hint=t.value_hex)
+    if fmt == "bool":
+        return ParseNode(name=name, value="TRUE" if any(b) else "FALSE")
+    if fmt == "null":
+        return ParseNode(name=name)
+    if fmt == "oid":
+        return ParseNode(name=name, value=_oid_text(b), hint=t.value_hex)
+    if fmt == "iccid":
+        return ParseNode(name=name, value=parse_iccid(t.value_hex))
+    if fmt == "version":
+        if len(b) == 3:
+            return ParseNode(name=name, value=f"v{b[0]}.{b[1]}.{b[2]}")
+        return ParseNode(name=name, value=t.value_hex)
+    raise Asn1Error(f"unknown value format {fmt!r}")
+
+
+def _unknown(t: Tlv) -> ParseNode:
+    return ParseNode(name=f"TLV {t.tag}", value=f"len={t.length}", hint=t.hex_head(120))
+
+
+class Asn1Schema:
+    """编译好的解码表；decode() 把某类型的 TLV 内容解码成 ParseNode 树。"""
+    __slots__ = ("specs", "types", "origin")
+
+    def __init__(self, specs, types, origin: Optional[tuple] = None):
+        self.specs = specs
+        self.types = types
+        self.origin = origin  # load_schema 的参数；跨进程传递时只传它，由对方进程自行加载
+
+    def __reduce__(self):
+        if self.origin is None:
+            return Asn1Schema, (self.specs, self.types)
+        return _loaded_schema, self.origin
+
+    def decode(self, type_name: str, tag: str, content: TlvInput, name: Optional[str] = None) -> ParseNode:
+        """content 为类型 type_name、标签 tag 的 TLV 的值部分。"""
+        tags, sid, choice = self.types[type_name]
+        buf = memoryview(bytes.fromhex(content)) if isinstance(content, str) else memoryview(content)
+        t = Tlv(buf, tag, len(buf), 0, len(buf))
+        if choice:  # 未加标签的 CHOICE：tag 即所选项的标签
+            return self._entry(name or type_name, sid, True, t)
+        return self._node(name or type_name, sid, t)
+
+    def _entry(self, name: Optional[str], sid: int, via_choice: bool, t: Tlv) -> ParseNode:
+        if via_choice:
+            alt = self.specs[sid][1].get(t.tag)
+            if alt is None:
+                return ParseNode(name=name, children=[_unknown(t)])
+            return ParseNode(name=name, children=[self._entry(*alt, t)])
+        return self._node(name, sid, t)
+
+    def _node(self, name: str, sid: int, t: Tlv) -> ParseNode:
+        spec = self.specs[sid]
+        kind = spec[0]
+        if kind == K_PRIM:
+            return _prim_node(name, spec[1], spec[2], t)
+        if kind == K_ANY:
+            return ParseNode(name=name, children=[_unknown(x) for x in parse_ber_tlvs(t.value)])
+        fields = spec[1]
+        inner = parse_ber_tlvs(t.value)
+        if kind == K_WRAP:
+            e = fields.get(inner[0].tag) if len(inner) == 1 else None
+            if e is None:
+                return ParseNode(name=name, children=[_unknown(x) for x in inner])
+            return self._entry(name, e[1], e[2], inner[0])
+        node = ParseNode(name=name)
+        kids = node.children
+        if kind == K_STRUCT:
+            for x in inner:
+                e = fields.get(x.tag)
+                kids.append(_unknown(x) if e is None else self._entry(e[0], e[1], e[2], x))
+            return node
+        specs = self.specs
+        for i, x in enumerate(inner, 1):  # K_LIST
+            e = fields.get(x.tag)
+            if e is None:
+                kids.append(_unknown(x))
+                continue
+            label = f"{e[0]} {i}"
+            if e[2] or specs[e[1]][0] == K_PRIM:
+                kids.append(self._entry(label, e[1], e[2], x))
+            else:  # 结构化元素推迟到展开时解码
+                kids.append(LazyParseNode(label, partial(self._node, label, e[1], x)))
+        return node
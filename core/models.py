@@ -1,7 +1,10 @@
 
+from collections.abc import Mapping, MutableMapping
 from dataclasses import dataclass, field
 from enum import Enum
-from typing import Any, Dict, List, Optional
+from functools import partial
+from sys import intern
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
 
 class MsgType(str, Enum):
     PROACTIVE = "proactive"
@@ -9,13 +12,117 @@ class MsgType(str, Enum):
     NORMAL_SIM = "normal_sim"
     UNKNOWN = "unknown"
 
-@dataclass
+_META_SLOTS = ("source", "line", "frame", "offset", "ts", "file")
+_META_SLOT_SET = frozenset(_META_SLOTS)
+
+class SourceMeta(MutableMapping):
+    """Message.meta 的紧凑实现：每条消息都有的来源键各占一个槽位（未赋值即不存在），
+    其余键（gap、reassembled …）才放进字典。用法与 dict 相同，也与内容相同的 dict 相等。
+    """
+    __slots__ = _META_SLOTS + ("_extra",)
+
+    def __init__(self, items=()):
+        self._extra = None
+        for k, v in (items.items() if isinstance(items, Mapping) else items):
+            self[k] = v
+
+    def __getitem__(self, key):
+        if key in _META_SLOT_SET:
+            try:
+                return getattr(self, key)
+            except AttributeError:
+                raise KeyError(key) from None
+        if self._extra is None:
+            raise KeyError(key)
+        return self._extra[key]
+
+    def get(self, key, default=None):
+        if key in _META_SLOT_SET:
+            return getattr(self, key, default)
+        extra = self._extra
+        return default if extra is None else extra.get(key, default)
+
+    def __contains__(self, key) -> bool:
+        if key in _META_SLOT_SET:
+            return hasattr(self, key)
+        return self._extra is not None and key in self._extra
+
+    def __setitem__(self, key, value):
+        if key in _META_SLOT_SET:
+            setattr(self, key, value)
+        elif self._extra is None:
+            self._extra = {key: value}
+        else:
+            self._extra[key] = value
+
+    def __delitem__(self, key):
+        if key in _META_SLOT_SET:
+            try:
+                delattr(self, key)
+            except AttributeError:
+                raise KeyError(key) from None
+        elif self._extra is None:
+            raise KeyError(key)
+        else:
+            del self._extra[key]
+
+    def __iter__(self) -> Iterator[str]:
+        for key in _META_SLOTS:
+            if hasattr(self, key):
+                yield key
+        if self._extra is not None:
+            yield from self._extra
+
+    def __len__(self) -> int:
+        n = sum(1 for key in _META_SLOTS if hasattr(self, key))
+        return n + (len(self._extra) if self._extra is not None else 0)
+
+    def copy(self) -> "SourceMeta":
+        return SourceMeta(self)
+
+    def __reduce__(self):
+        return SourceMeta, (dict(self),)
+
+    def __repr__(self) -> str:
+        return repr(dict(self))
+
 class Message:
-    raw: str                     # hex string, no spaces, uppercase
-    direction: str               # 'tx' or 'rx'
-    meta: Dict[str, Any] = field(default_factory=dict)
+    """一条 APDU：data 为原始字节，raw（无空格大写十六进制）首次访问时才生成并缓存。
+
+    可以给 raw（规范化的十六进制，构造时转换一次）或直接给 data 字节。
+    """
+    __slots__ = ("data", "direction", "meta", "_raw")
+
+    def __init__(self, raw: Optional[str] = None, direction: str = "tx",
+                 meta: Optional[Mapping[str, Any]] = None, data: Optional[bytes] = None):
+        if data is None:
+            data = bytes.fromhex(raw or "")
+        self.data = data             # bytes
+        self.direction = direction   # 'tx' or 'rx'
+        self.meta = meta if type(meta) is SourceMeta else SourceMeta(meta or ())
+        self._raw = None
+
+    @property
+    def raw(self) -> str:
+        if self._raw is None:
+            self._raw = self.data.hex().upper()
+        return self._raw
+
+    def __eq__(self, other):
+        if not isinstance(other, Message):
+            return NotImplemented
+        return (self.data, self.direction, self.meta) == (other.data, other.direction, other.meta)
+
+    __hash__ = None
+
+    def __reduce__(self):
+        # 不序列化 raw 缓存（多进程提取时传回主进程）
+        return Message, (None, self.direction, self.meta, self.data)
 
-@dataclass
+    def __repr__(self) -> str:
+        return f"Message(raw={self.raw!r}, direction={self.direction!r}, meta={self.meta!r})"
+
+@dataclass(slots=True)
 class Apdu:
     cla: Optional[int] = None
     ins: Optional[int] = None
@@ -23,16 +130,89 @@ class Apdu:
     p2: Optional[int] = None
     lc: Optional[int] = None
     le: Optional[int] = None
-    data_hex: str = ""           # body without header if applicable
+    data: bytes = b""            # body without header if applicable
+
+    @property
+    def data_hex(self) -> str:
+        return self.data.hex().upper()
+
+    def __reduce__(self):
+        # 按位置参数序列化，比 slots 默认的 (类, 状态字典) 小而快（并行解析时结果要跨进程传回）
+        return Apdu, (self.cla, self.ins, self.p1, self.p2, self.lc, self.le, self.data)
 
-@dataclass
+@dataclass(slots=True)
 class ParseNode:
     name: str
     value: Optional[str] = None
     children: List["ParseNode"] = field(default_factory=list)
     hint: Optional[str] = None
 
-@dataclass
+    def __post_init__(self):
+        # 节点名大量重复（"TLV 80"、"seqNumber" …），各树共用同一个字符串对象
+        if type(self.name) is str:
+            self.name = intern(self.name)
+
+    def __reduce__(self):
+        return ParseNode, (self.name, self.value, self.children, self.hint)
+
+class LazyParseNode(ParseNode):
+    """子节点在首次访问 children 时才解码。
+
+    loader() 返回构建好的 ParseNode，取其 children（以及这里未给出的 value/hint）；
+    名称在构建前就已确定，树上未展开的节点因此无需解码即可显示。
+    """
+    __slots__ = ("_loader", "_children")
+
+    def __init__(self, name: str, loader: Callable[[], ParseNode], value: Optional[str] = None,
+                 hint: Optional[str] = None):
+        self._loader = loader
+        super().__init__(name=name, value=value, hint=hint)
+
+    @property
+    def loaded(self) -> bool:
+        return self._loader is None
+
+    @property
+    def children(self) -> List[ParseNode]:
+        if self._loader is not None:
+            loader, self._loader = self._loader, None
+            try:
+                built = loader()
+            except Exception as e:  # 解码推迟到展开时，错误只影响这一棵子树
+                built = ParseNode(name=self.name, children=[ParseNode(name="Decode error", value=str(e))])
+            self._children = built.children
+            if self.value is None:
+                self.value = built.value
+            if self.hint is None:
+                self.hint = built.hint
+        return self._children
+
+    @children.setter
+    def children(self, value: List[ParseNode]):
+        self._children = value
+
+    def __reduce__(self):
+        # 跨进程传递（并行解析）：已解码的按普通子树传；未解码的只传 loader，
+        # 其中引用原缓冲区的 memoryview 参数换成只含该段内容的 bytes
+        if self._loader is None:
+            return _loaded_lazy, (self.name, self.value, self._children, self.hint)
+        return LazyParseNode, (self.name, _portable_loader(self._loader), self.value, self.hint)
+
+
+def _portable_loader(loader: Callable[[], ParseNode]) -> Callable[[], ParseNode]:
+    if isinstance(loader, partial) and any(isinstance(a, memoryview) for a in loader.args):
+        args = [bytes(a) if isinstance(a, memoryview) else a for a in loader.args]
+        return partial(loader.func, *args, **loader.keywords)
+    return loader
+
+
+def _loaded_lazy(name, value, children, hint) -> LazyParseNode:
+    node = LazyParseNode(name, None, value, hint)
+    node._children = children
+    return node
+
+
+@dataclass(slots=True)
 class ParseResult:
     msg_type: MsgType
     message: Message
@@ -43,3 +223,11 @@ class ParseResult:
     tag: Optional[str] = None
     warnings: List[str] = field(default_factory=list)
     errors: List[str] = field(default_factory=list)
+    # command/response pairing (core.pairing), as indices into the result list
+    command: Optional[int] = None    # rx: the C-APDU it answers; GET RESPONSE tx: the command it continues
+    responses: Tuple[int, ...] = ()  # tx: its R-APDU(s), including data fetched by GET RESPONSE
+    sw: Optional[str] = None         # status word (tx: final SW of the transaction)
+
+    def __reduce__(self):
+        return ParseResult, (self.msg_type, self.message, self.apdu, self.root, self.title, self.direction_hint,
+                             self.tag, self.warnings, self.errors, self.command, self.responses, self.sw)
@@ -0,0 +1,68 @@
+"""命令/响应配对：单遍扫描结果序列，把每条 C-APDU 与其 R-APDU 关联起来。
+
+卡接口是半双工的，R-APDU 总是回答紧邻的上一条 C-APDU。按逻辑通道额外跟踪：
+- SW1=61/9F（数据待取）之后同一通道的 GET RESPONSE，其取回的数据归到原命令；
+- SW1=6C（Le 错误）之后同一通道重发的同一 INS 命令，同样视为原命令的延续。
+结果写入 ParseResult.command / responses / sw，按下标即可 O(1) 查找。
+"""
+from sys import intern
+from typing import Dict, Optional, Tuple
+
+from core.models import ParseResult
+from core.utils import logical_channel
+
+INS_GET_RESPONSE = 0xC0
+
+
+class Pairer:
+    def __init__(self, start: int = 0):
+        self.next_index = start   # 下一个结果在结果列表中的下标
+        # 等待回答的命令：(下标, 结果, 通道, 所属事务的原命令下标, 原命令结果)
+        self._open: Optional[Tuple[int, ParseResult, int, int, ParseResult]] = None
+        # 通道 -> (原命令下标, 原命令结果, 期望的后续 INS)
+        self._cont: Dict[int, Tuple[int, ParseResult, int]] = {}
+
+    def settled(self) -> int:
+        """此下标之前的结果不会再被修改：等待回答的命令、待取数据/待重发的原命令都在它之后。"""
+        i = self.next_index
+        if self._open is not None:
+            i = min(i, self._open[0], self._open[3])
+        for owner_i, _, _ in self._cont.values():
+            i = min(i, owner_i)
+        return i
+
+    def add(self, r: ParseResult) -> int:
+        """登记下一个结果，返回它的下标。"""
+        i = self.next_index
+        self.next_index += 1
+        data = r.message.data
+        if r.message.direction == "tx":
+            if len(data) < 2:
+                self._open = None
+                return i
+            channel = logical_channel(data[0])
+            owner_i, owner = i, r
+            cont = self._cont.pop(channel, None)
+            if cont is not None and data[1] == cont[2]:
+                owner_i, owner = cont[0], cont[1]
+                r.command = owner_i
+            self._open = (i, r, channel, owner_i, owner)
+            return i
+
+        sw = intern(data[-2:].hex().upper()) if len(data) >= 2 else None  # 取值很少，各结果共用
+        r.sw = sw
+        if self._open is None:
+            return i  # 没有对应命令（日志截断等）
+        ci, cr, channel, owner_i, owner = self._open
+        self._open = None
+        r.command = ci
+        cr.responses += (i,)
+        cr.sw = sw
+        if owner is not cr:
+            owner.responses += (i,)
+            owner.sw = sw
+        if sw and sw[:2] in ("61", "9F"):
+            self._cont[channel] = (owner_i, owner, INS_GET_RESPONSE)
+        elif sw and sw[:2] == "6C":
+            self._cont[channel] = (owner_i, owner, cr.message.data[1])
+        return i
@@ -1,17 +1,55 @@
+"""处理器注册表：(消息类型, 标签) -> 处理器类。
 
-from typing import Dict, Type
+处理器模块用 @register 登记自己。_MANIFEST 记下每个标签由哪个模块提供，该模块在这个标签
+第一次被解析时才导入，导入 parsers.base 时不必加载全部处理器；新增处理器模块时在清单里
+加一行（不在清单里的模块也可以，导入后 @register 照常生效）。
+处理器不保存状态，handler() 按标签缓存实例，不必每条消息新建一个。
+"""
+from importlib import import_module
+from typing import Any, Dict, Optional, Type
 from core.models import MsgType
 
+_MANIFEST: Dict[tuple, str] = {
+    (MsgType.PROACTIVE, "D0"): "parsers.proactive.cmds.parse_d0",
+    (MsgType.PROACTIVE, "TERMINAL_RESPONSE"): "parsers.proactive.cmds.parse_terminal_response",
+    (MsgType.PROACTIVE, "ENVELOPE"): "parsers.proactive.cmds.parse_envelope",
+    (MsgType.ESIM, "BF20"): "parsers.esim.tlvs.parse_bf22",
+    (MsgType.ESIM, "BF22"): "parsers.esim.tlvs.parse_bf22",
+    (MsgType.ESIM, "BF28"): "parsers.esim.tlvs.parse_bf28",
+    (MsgType.ESIM, "BF2D"): "parsers.esim.tlvs.parse_bf2d",
+    (MsgType.ESIM, "BF2E"): "parsers.esim.tlvs.parse_bf2e",
+    (MsgType.ESIM, "BF31"): "parsers.esim.tlvs.parse_bf31",
+    (MsgType.ESIM, "BF32"): "parsers.esim.tlvs.parse_bf32",
+    (MsgType.ESIM, "BF37"): "parsers.esim.tlvs.parse_bf37",
+    (MsgType.ESIM, "BF38"): "parsers.esim.tlvs.parse_bf38",
+}
+
 _REGISTRY: Dict[tuple, Type] = {}
+_INSTANCES: Dict[tuple, Any] = {}  # 调用方给出的 (类型, 标签) -> 实例；没有处理器的标签记为 None
 
 def register(msg_type: MsgType, key: str):
     def deco(cls):
         _REGISTRY[(msg_type, key.upper())] = cls
+        _INSTANCES.clear()  # 之前缓存的 None / 旧实例作废
         return cls
     return deco
 
-def resolve(msg_type: MsgType, key: str):
-    return _REGISTRY.get((msg_type, key.upper()))
+def resolve(msg_type: MsgType, key: str) -> Optional[Type]:
+    k = (msg_type, key.upper())
+    cls = _REGISTRY.get(k)
+    if cls is None and k in _MANIFEST:
+        import_module(_MANIFEST[k])
+        cls = _REGISTRY.get(k)
+    return cls
+
+def handler(msg_type: MsgType, key: str):
+    """key 对应处理器的共享实例；没有处理器时返回 None。"""
+    try:
+        return _INSTANCES[(msg_type, key)]
+    except KeyError:
+        cls = resolve(msg_type, key)
+        inst = _INSTANCES[(msg_type, key)] = cls() if cls is not None else None
+        return inst
 
 def all_keys():
-    return [k for k in _REGISTRY.keys()]
+    return list(dict.fromkeys([*_MANIFEST, *_REGISTRY]))
@@ -1,39 +1,87 @@
+"""BER-TLV 解析：输入只转换一次成字节缓冲区，Tlv 只记录在缓冲区中的偏移。
+
+嵌套解析对 Tlv.value（共享同一缓冲区的 memoryview 切片）再调用 parse_ber_tlvs，
+不复制数据、不来回转十六进制；value_hex 在首次访问时才生成。
+"""
+from typing import List, Union
+
+TlvInput = Union[str, bytes, bytearray, memoryview]
+
+_TAG1 = tuple(f"{b:02X}" for b in range(256))
+_MULTI_BYTE_TAG = frozenset((0x9F, 0x5F, 0x7F, 0xBF))
+
+
+def as_buffer(data: TlvInput) -> memoryview:
+    """十六进制字符串或字节类对象 -> memoryview（字节类对象不复制）。"""
+    if isinstance(data, str):
+        return memoryview(bytes.fromhex(data))
+    return data if isinstance(data, memoryview) else memoryview(data)
 
-from dataclasses import dataclass
-from typing import List, Tuple
 
-@dataclass
 class Tlv:
-    tag: str
-    length: int
-    value_hex: str
+    __slots__ = ("buf", "tag", "length", "start", "end", "_hex")
+
+    def __init__(self, buf: memoryview, tag: str, length: int, start: int, end: int):
+        self.buf = buf
+        self.tag = tag
+        self.length = length    # 声明长度；数据被截断时可能大于实际值长度
+        self.start = start      # 值在 buf 中的起止偏移
+        self.end = end
+        self._hex = None
+
+    @property
+    def value(self) -> memoryview:
+        """值的零拷贝视图，可直接传给 parse_ber_tlvs 解析嵌套结构。"""
+        return self.buf[self.start:self.end]
+
+    @property
+    def value_hex(self) -> str:
+        if self._hex is None:
+            self._hex = self.buf[self.start:self.end].hex().upper()
+        return self._hex
+
+    def hex_head(self, n: int) -> str:
+        """值的前 n 个十六进制字符，只转换需要的字节。"""
+        if self._hex is not None:
+            return self._hex[:n]
+        return self.buf[self.start:min(self.end, self.start + (n + 1) // 2)].hex().upper()[:n]
+
+    def __repr__(self) -> str:
+        return f"Tlv(tag={self.tag!r}, length={self.length}, value_hex={self.hex_head(40)!r})"
+
+    def __reduce__(self):
+        # memoryview 不能序列化：只带上值这一段的字节
+        return _tlv_from_value, (bytes(self.value), self.tag, self.length)
+
+
+def _tlv_from_value(value: bytes, tag: str, length: int) -> Tlv:
+    return Tlv(memoryview(value), tag, length, 0, len(value))
+
 
-def _read_len(bs: bytes, i: int):
-    if i >= len(bs): return 0, i
+def _read_len(bs, i: int, n: int):
+    if i >= n: return 0, i
     first = bs[i]; i += 1
     if first < 0x80: return first, i
-    n = first & 0x7F
     v = 0
-    for _ in range(n):
-        if i >= len(bs): break
+    for _ in range(first & 0x7F):
+        if i >= n: break
         v = (v<<8) | bs[i]; i += 1
     return v, i
 
-def _read_tag(bs: bytes, i: int):
-    if i >= len(bs): return "", i
-    t1 = bs[i]; i += 1
-    if t1 in (0x9F,0x5F,0x7F,0xBF) and i < len(bs):
-        t2 = bs[i]; i += 1
-        return f"{t1:02X}{t2:02X}", i
-    return f"{t1:02X}", i
 
-def parse_ber_tlvs(hexstr: str) -> List[Tlv]:
-    bs = bytes.fromhex(hexstr)
+def parse_ber_tlvs(data: TlvInput) -> List[Tlv]:
+    """解析一层 TLV 序列；data 为十六进制字符串、bytes 或 memoryview（如 Tlv.value）。"""
+    bs = as_buffer(data)
+    n = len(bs)
     i = 0; out: List[Tlv] = []
-    while i < len(bs):
-        tag, i = _read_tag(bs, i)
-        length, i = _read_len(bs, i)
-        val = bs[i:i+length].hex().upper()
+    while i < n:
+        t1 = bs[i]; i += 1
+        if t1 in _MULTI_BYTE_TAG and i < n:
+            tag = _TAG1[t1] + _TAG1[bs[i]]; i += 1
+        else:
+            tag = _TAG1[t1]
+        length, i = _read_len(bs, i, n)
+        end = min(i + length, n)
+        out.append(Tlv(bs, tag, length, i, end))
         i += length
-        out.append(Tlv(tag=tag, length=length, value_hex=val))
     return out
@@ -5,45 +5,49 @@ from core.models import Apdu
 
 HEX_RE = re.compile(r"[0-9A-Fa-f]{2}")
 
+def hex_to_bytes(s: str) -> bytes:
+    """十六进制文本 -> 字节；夹杂的非十六进制内容被忽略（同 normalize_hex）。"""
+    # 快速路径：纯十六进制字节（可用空白分隔）直接交给 bytes.fromhex
+    try:
+        return bytes.fromhex(s)
+    except ValueError:
+        return bytes.fromhex("".join(HEX_RE.findall(s)))
+
 def normalize_hex(s: str) -> str:
-    return "".join(HEX_RE.findall(s)).upper()
+    return hex_to_bytes(s).hex().upper()
+
+def logical_channel(cla: int) -> int:
+    """ISO 7816-4：CLA 第一类 b1-b2 为通道 0-3，扩展类 b1-b4 为通道 4-19。"""
+    if cla & 0x40:
+        return 4 + (cla & 0x0F)
+    return cla & 0x03
 
 def split_bytes(hexstr: str):
     return [hexstr[i:i+2] for i in range(0, len(hexstr), 2)]
 
-def parse_apdu_header(hexstr: str) -> Apdu:
-    b = split_bytes(hexstr)
-    apdu = Apdu()
-    if len(b) < 4:
-        return apdu
-    try:
-        apdu.cla = int(b[0], 16)
-        apdu.ins = int(b[1], 16)
-        apdu.p1 = int(b[2], 16)
-        apdu.p2 = int(b[3], 16)
-    except Exception:
-        return apdu
-    # naive Lc (short)
-    if len(b) >= 5:
+def parse_apdu_header(data: bytes | str) -> Apdu:
+    """CLA/INS/P1/P2（及短格式 Lc）直接从字节取整数；也接受十六进制字符串。"""
+    if isinstance(data, str):
         try:
-            apdu.lc = int(b[4], 16)
-        except Exception:
-            apdu.lc = None
-    # data / Le not decoded fully; leave to higher layers
-    return apdu
+            data = bytes.fromhex(data)
+        except ValueError:
+            return Apdu()
+    if len(data) < 4:
+        return Apdu()
+    # naive Lc (short); data / Le not decoded fully; leave to higher layers
+    # 位置参数：比关键字参数构造快一倍，分类时每条消息都要走这里
+    return Apdu(data[0], data[1], data[2], data[3], data[4] if len(data) >= 5 else None)
 
-def first_tlv_tag_after_store_header(hexstr: str) -> Optional[str]:
+_MULTI_BYTE_TAG = frozenset((0x9F, 0x5F, 0x7F, 0xBF))
+
+def first_tlv_tag_after_store_header(data: bytes) -> Optional[str]:
     """Strip 5-byte APDU header (CLA INS P1 P2 Lc) then return first BER tag (1 or 2 bytes)."""
-    s = hexstr.upper()
-    if len(s) < 10:
-        return None
-    body = s[10:]
-    if len(body) < 2:
+    if len(data) < 6:
         return None
-    t1 = body[:2]
-    if t1 in ("9F","5F","7F","BF") and len(body) >= 4:
-        return t1 + body[2:4]
-    return t1
+    t1 = data[5]
+    if t1 in _MULTI_BYTE_TAG and len(data) >= 7:
+        return data[5:7].hex().upper()
+    return f"{t1:02X}"
 
 
 def parse_iccid(hexv: str) -> str:
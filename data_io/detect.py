@@ -0,0 +1,87 @@
+"""日志格式自动识别：只读取文件开头的一小段样本，给每种格式打分。
+
+识别错误的代价只是读一次样本，而不是整份日志解析一遍再重新加载。
+新格式通过 register_format(name, scorer) 接入；scorer(sample, lines) 返回 0..1。
+"""
+import re
+from dataclasses import dataclass
+from typing import Callable, Dict, List
+
+from data_io.loaders import open_binary
+
+SNIFF_BYTES = 256 << 10   # 样本大小
+MIN_CONFIDENCE = 0.2      # 低于此值视为无法识别
+
+Scorer = Callable[[bytes, List[bytes]], float]
+
+
+@dataclass
+class FormatGuess:
+    name: str            # "mtk" / "generic" / "pcap" / 其它已注册格式；无法识别为 "unknown"
+    confidence: float    # 0..1
+    scores: Dict[str, float]
+
+
+_FORMATS: Dict[str, Scorer] = {}
+
+
+def register_format(name: str, scorer: Scorer):
+    _FORMATS[name] = scorer
+
+
+def _score_mtk(sample: bytes, lines: List[bytes]) -> float:
+    from data_io.extractors.mtk import APDU_LINE_B
+    n = 0
+    for ln in lines:
+        if b"APDU_" in ln and APDU_LINE_B.fullmatch(ln):
+            n += 1
+            if n >= 8:
+                break
+    # 一行可能是偶然，连续出现几行即可确定
+    return 1.0 - 0.5 ** n
+
+
+_HEX_LINE_B = re.compile(rb'\s*(?:[0-9A-Fa-f]{2}\s*){4,}')
+
+
+def _score_generic(sample: bytes, lines: List[bytes]) -> float:
+    """每行一条 APDU：非空行中纯十六进制（至少 4 字节）行所占比例。"""
+    total = hexed = 0
+    for ln in lines:
+        if not ln.strip():
+            continue
+        total += 1
+        if _HEX_LINE_B.fullmatch(ln):
+            hexed += 1
+    return hexed / total if total else 0.0
+
+
+def _score_pcap(sample: bytes, lines: List[bytes]) -> float:
+    """二进制抓包：文件头魔数即可确定。"""
+    from data_io.extractors.pcap import is_capture
+    return 1.0 if is_capture(sample) else 0.0
+
+
+register_format("mtk", _score_mtk)
+register_format("generic", _score_generic)
+register_format("pcap", _score_pcap)
+
+
+def sniff(sample: bytes, complete: bool = False) -> FormatGuess:
+    """按样本识别格式；complete=False 表示样本被截断，最后一行不完整需丢弃。"""
+    lines = sample.split(b"\n")
+    if not complete and len(lines) > 1:
+        lines.pop()
+    scores = {name: scorer(sample, lines) for name, scorer in _FORMATS.items()}
+    best = max(scores, key=scores.get) if scores else "unknown"
+    conf = scores.get(best, 0.0)
+    if conf < MIN_CONFIDENCE:
+        return FormatGuess("unknown", conf, scores)
+    return FormatGuess(best, conf, scores)
+
+
+def detect_format(path: str, sample_size: int = SNIFF_BYTES) -> FormatGuess:
+    """只读取 path 开头 sample_size 字节（压缩文件为解压后的字节）。"""
+    with open_binary(path) as f:
+        sample = f.read(sample_size)
+    return sniff(sample, complete=len(sample) < sample_size)
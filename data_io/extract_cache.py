@@ -0,0 +1,164 @@
+"""提取结果缓存：把一份日志提取出的 Message 序列存成旁路文件（"<日志>.apdc"）。
+
+再次打开未改动的日志时直接读缓存，不再做正则扫描和 E2 重组。
+缓存以 (文件大小, mtime, 抽样内容哈希, 提取器版本键) 为键，任一不符即视为失效。
+
+文件布局：定长头 + 一个 marshal 块，块内按列存放：
+- APDU 原始字节（拼成一段）及各条的结束位置；
+- 方向（每条 1 字节）、偏移、位置（行号/帧序号）；
+- 时间戳与其余 meta（来源、gap 等）各自去重成表，每条只存表下标。
+"""
+import array
+import marshal
+import os
+import struct
+import sys
+from typing import Iterable, List, Optional, Tuple
+
+from core.models import Message
+from data_io.loaders import split_member
+from data_io.source_index import index_path, stamp
+
+CACHE_SUFFIX = ".apdc"
+_MAGIC = b"APDC2\0"
+_HEAD = struct.Struct("<6sQq16s48sI")  # magic, 日志大小, mtime_ns, 内容哈希, 提取器键, 条数
+
+_HASH_BLOCK = 64 << 10   # 抽样哈希：首尾各 1 MiB，中间均匀取 16 块
+_HASH_EDGE = 1 << 20
+_HASH_SAMPLES = 16
+
+_DIRS = ("tx", "rx")
+_POS_KEYS = ("line", "frame")  # meta 中的位置键（见 MTKStream.position_key）
+_COLUMNS = ("offset", "ts") + _POS_KEYS
+
+
+def cache_path(path: str) -> str:
+    return index_path(path, CACHE_SUFFIX)
+
+
+def fast_hash(path: str) -> bytes:
+    """文件的抽样哈希：只读首尾和中间若干块，大文件也只需几 MB 读取。"""
+    path = split_member(path)[0]
+    size = os.path.getsize(path)
+    import hashlib  # 只在读写缓存时需要，不计入冷启动时间
+    h = hashlib.blake2b(digest_size=16)
+    h.update(size.to_bytes(8, "little"))
+    with open(path, "rb") as f:
+        if size <= 2 * _HASH_EDGE + _HASH_SAMPLES * _HASH_BLOCK:
+            h.update(f.read())
+            return h.digest()
+        h.update(f.read(_HASH_EDGE))
+        step = (size - 2 * _HASH_EDGE) // (_HASH_SAMPLES + 1)
+        for k in range(1, _HASH_SAMPLES + 1):
+            f.seek(_HASH_EDGE + k * step)
+            h.update(f.read(_HASH_BLOCK))
+        f.seek(size - _HASH_EDGE)
+        h.update(f.read(_HASH_EDGE))
+    return h.digest()
+
+
+def _le(arr: array.array) -> bytes:
+    if sys.byteorder == "big":
+        arr = array.array(arr.typecode, arr)
+        arr.byteswap()
+    return arr.tobytes()
+
+
+def _from_le(typecode: str, data: bytes) -> array.array:
+    arr = array.array(typecode)
+    arr.frombytes(data)
+    if sys.byteorder == "big":
+        arr.byteswap()
+    return arr
+
+
+def source_key(path: str, extractor_key: str) -> Tuple[int, int, bytes, bytes]:
+    """缓存键：(文件大小, mtime_ns, 抽样哈希, 提取器键)。"""
+    size, mtime = stamp(path)
+    return size, mtime, fast_hash(path), extractor_key.encode("utf-8")[:48].ljust(48, b"\0")
+
+
+def save_messages(path: str, extractor_key: str, messages: Iterable[Message],
+                  src_key: Optional[Tuple[int, int, bytes, bytes]] = None) -> str:
+    """写入 path 的提取缓存，返回缓存文件路径。
+
+    src_key 应在开始读取日志之前用 source_key() 取得：读取期间日志还在增长时，缓存键对应
+    读取前的内容，下次打开即判定失效，而不会把截断的结果当作新文件的缓存。
+    """
+    if src_key is None:
+        src_key = source_key(path, extractor_key)
+    raw = bytearray()
+    ends, offsets, positions = array.array("q"), array.array("q"), array.array("q")
+    dirs = bytearray()
+    ts_ids, rest_ids, pos_ids = array.array("i"), array.array("i"), bytearray()
+    ts_table: dict = {}
+    rest_table: dict = {}
+    count = 0
+    for m in messages:
+        raw += m.data
+        ends.append(len(raw))
+        dirs.append(_DIRS.index(m.direction))
+        meta = m.meta
+        offsets.append(meta.get("offset", -1))
+        ts = meta.get("ts")
+        ts_ids.append(-1 if ts is None else ts_table.setdefault(ts, len(ts_table)))
+        for k, key in enumerate(_POS_KEYS):
+            if key in meta:
+                positions.append(meta[key])
+                pos_ids.append(k + 1)
+                break
+        else:
+            positions.append(-1)
+            pos_ids.append(0)
+        rest = marshal.dumps({k: v for k, v in meta.items() if k not in _COLUMNS})
+        rest_ids.append(rest_table.setdefault(rest, len(rest_table)))
+        count += 1
+    body = marshal.dumps((
+        bytes(raw), _le(ends), bytes(dirs), _le(offsets), _le(positions), bytes(pos_ids),
+        list(ts_table), _le(ts_ids), list(rest_table), _le(rest_ids),
+    ))
+    out = cache_path(path)
+    with open(out, "wb") as f:
+        f.write(_HEAD.pack(_MAGIC, *src_key, count))
+        f.write(body)
+    return out
+
+
+def load_messages(path: str, extractor_key: str) -> Optional[List[Message]]:
+    """读取 path 的提取缓存；不存在、已过期、提取器不同或损坏时返回 None。"""
+    try:
+        with open(cache_path(path), "rb") as f:
+            head = f.read(_HEAD.size)
+            if len(head) != _HEAD.size:
+                return None
+            magic, size, mtime, digest, ekey, count = _HEAD.unpack(head)
+            if magic != _MAGIC or (size, mtime, digest, ekey) != source_key(path, extractor_key):
+                return None
+            (raw, ends, dirs, offsets, positions, pos_ids,
+             ts_table, ts_ids, rest_table, rest_ids) = marshal.loads(f.read())
+    except (OSError, EOFError, ValueError, TypeError):
+        return None
+    ends = _from_le("q", ends)
+    offsets = _from_le("q", offsets)
+    positions = _from_le("q", positions)
+    ts_ids = _from_le("i", ts_ids)
+    rest_ids = _from_le("i", rest_ids)
+    if not (len(ends) == len(dirs) == len(offsets) == len(ts_ids) == len(rest_ids) == count):
+        return None
+    rests = [marshal.loads(r) for r in rest_table]
+    pos_keys = (None,) + _POS_KEYS
+    out: List[Message] = []
+    append = out.append
+    start = 0
+    for end, d, off, pk, pos, t, r in zip(ends.tolist(), dirs, offsets.tolist(), pos_ids,
+                                          positions.tolist(), ts_ids.tolist(), rest_ids.tolist()):
+        meta = rests[r].copy()
+        if pk:
+            meta[pos_keys[pk]] = pos
+        if off >= 0:
+            meta["offset"] = off
+        if t >= 0:
+            meta["ts"] = ts_table[t]
+        append(Message(direction=_DIRS[d], meta=meta, data=raw[start:end]))
+        start = end
+    return out
@@ -1,13 +1,77 @@
-
-from typing import Iterable, List
+from typing import Iterable, Iterator, List
 from core.models import Message
-from core.utils import normalize_hex
+from core.utils import hex_to_bytes
+from data_io.extractors.mtk import TS_RE
 
 class GenericExtractor:
+    version = 1
+    cache_key = f"generic/{version}"
+
     def extract(self, lines: Iterable[str]) -> List[Message]:
-        msgs: List[Message] = []
+        return list(self.iter_lines(lines))
+
+    def iter_lines(self, lines: Iterable) -> Iterator[Message]:
+        offset = 0
+        for lineno, ln in enumerate(lines, 1):
+            m = _line_message(ln, lineno, offset)
+            offset += len(ln)
+            if m is not None:
+                yield m
+
+    def iter_messages(self, fileobj) -> Iterator[Message]:
+        """逐行读取文件对象（二进制或文本），逐条产出 Message。"""
+        return self.iter_lines(fileobj)
+
+    def new_stream(self) -> "GenericStream":
+        return GenericStream()
+
+
+def _line_message(ln, lineno: int, offset: int):
+    # meta 记录来源行号、行首偏移（bytes 行即字节偏移）及行内时间戳（如有）
+    if isinstance(ln, bytes):
+        ln = ln.decode("utf-8", errors="ignore")
+    data = hex_to_bytes(ln)
+    if not data: return None
+    meta = {"source": "generic", "line": lineno, "offset": offset}
+    m = TS_RE.search(ln)
+    if m: meta["ts"] = m.group()
+    return Message(direction="tx", meta=meta, data=data)
+
+
+class GenericStream:
+    """与 MTKStream 相同的增量接口：feed() 喂入任意切分的数据块，close() 处理残行。"""
+
+    def __init__(self):
+        self._tail = None
+        self._lineno = 0
+        self._offset = 0
+
+    def feed(self, data) -> List[Message]:
+        out: List[Message] = []
+        if not data:
+            return out
+        if self._tail:
+            data = self._tail + data
+        nl = b"\n" if isinstance(data, bytes) else "\n"
+        end = data.rfind(nl) + 1
+        self._tail = data[end:]
+        lines = data[:end].split(nl)
+        lines.pop()
         for ln in lines:
-            s = normalize_hex(ln)
-            if not s: continue
-            msgs.append(Message(raw=s, direction="tx", meta={"source":"generic"}))
-        return msgs
+            self._lineno += 1
+            m = _line_message(ln, self._lineno, self._offset)
+            self._offset += len(ln) + 1
+            if m is not None:
+                out.append(m)
+        return out
+
+    def close(self) -> List[Message]:
+        out: List[Message] = []
+        if self._tail:
+            self._lineno += 1
+            m = _line_message(self._tail, self._lineno, self._offset)
+            self._offset += len(self._tail)
+            self._tail = None
+            if m is not None:
+                out.append(m)
+        return out
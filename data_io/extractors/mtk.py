@@ -1,8 +1,10 @@
 
 import re
-from typing import List, Tuple
+from collections import deque
+from typing import Dict, Iterator, List, Tuple
 from core.models import Message
-from core.utils import normalize_hex
+from core.utils import hex_to_bytes, normalize_hex, logical_channel
+from data_io.loaders import open_binary, detect_compression
 
 def reassemble_e2_segments(segments: List[str], tag_hex: str) -> str:
     """把多段 LPA=>eSIM APDU（首段含 BFxx 和原长度）重组为 TLV（tag + 新长度 + value）。"""
@@ -51,6 +53,17 @@ APDU_TX0 = re.compile(r'^\s*APDU_tx\s+0:\s*([0-9A-Fa-f]{2}(?:\s+[0-9A-Fa-f]{2})*
 APDU_RXN = re.compile(r'^\s*APDU_rx\s+(\d+):\s*([0-9A-Fa-f]{2}(?:\s+[0-9A-Fa-f]{2})*)\s*$')
 APDU_TXN = re.compile(r'^\s*APDU_tx\s+(\d+):\s*([0-9A-Fa-f]{2}(?:\s+[0-9A-Fa-f]{2})*)\s*$')
 
+# 单次匹配的合并模式（配合 "APDU_" 子串预筛选使用）：方向 / 序号 / 十六进制数据
+_APDU_LINE_PAT = r'\s*APDU_(?P<dir>tx|rx)\s+(?P<idx>\d+):\s*(?P<hex>[0-9A-Fa-f]{2}(?:\s+[0-9A-Fa-f]{2})*)\s*'
+APDU_LINE = re.compile(_APDU_LINE_PAT)
+APDU_LINE_B = re.compile(_APDU_LINE_PAT.encode("ascii"))
+
+# 日志时间戳：[yyyy-|yyyy/][MM-dd ]HH:mm:ss[.ffffff]，取组首行之前最近的一个
+_TS_PAT = r'(?<![\d:])(?:\d{4}[-/])?(?:\d{1,2}[-/]\d{1,2}[ T]+)?\d{1,2}:\d{2}:\d{2}(?:[.,]\d{1,6})?'
+TS_RE = re.compile(_TS_PAT)
+TS_RE_B = re.compile(_TS_PAT.encode("ascii"))
+TS_LOOKBACK = 16  # 向前最多查看的行数
+
 def _is_lpa_to_esim(apdu_hex: str) -> bool:
     """检查是否为LPA=>eSIM消息"""
     if len(apdu_hex) < 8:  # 至少需要4字节头部
@@ -99,139 +112,539 @@ def _extract_esim_tag_and_length(apdu_hex: str) -> Tuple[str, int, int]:
         n = first_len_octet & 0x7F  # 后续长度字节数
         if len(s) < length_start + 2 + 2*n:
             return tag, 0, 0
-        value_len = int(s[length_start+2:length_start+2+2*n], 16)
+        # n == 0 为不定长格式（0x80），没有后续长度字节
+        value_len = int(s[length_start+2:length_start+2+2*n], 16) if n else 0
         len_len = 1 + n
     return tag, value_len, len_len
-def _collect_one(lines: List[str], i: int, head_re0, cont_re):
-    m = head_re0.match(lines[i])
-    if not m: return None, i
-    parts = [m.group(1)]; i += 1
-    while i < len(lines):
-        n = cont_re.match(lines[i])
-        if n:
-            parts.append(n.group(2)); i += 1
-        else:
-            break
-    return ' '.join(parts), i
 
-class MTKExtractor:
-    def extract_from_text(self, text: str) -> List[Message]:
-        """Preserve chronological order of APDU_tx/APDU_rx groups with LPA=>eSIM reassembly."""
-        lines = text.splitlines()
-        msgs: List[Message] = []
-        i = 0
-        processed_indices = set()  # 记录已处理的行索引
-        
-        while i < len(lines):
-            # 跳过已处理的行
-            if i in processed_indices:
-                i += 1
-                continue
-            
-            line = lines[i].strip()
-            
-            # 处理TX消息
-            if line.startswith("APDU_tx"):
-                # 先收集当前TX段的所有行
-                r = _collect_one(lines, i, APDU_TX0, APDU_TXN)
-                if r[0] is not None:
-                    raw, next_i = r
-                    s = normalize_hex(raw)
-                    if s and _is_lpa_to_esim(s):
-                        # 尝试重组多段LPA=>eSIM消息
-                        reassembled, processed_lines = self._try_reassemble_lpa_esim(lines, i, s)
-                        if reassembled and len(processed_lines) > 1:
-                            msgs.append(Message(raw=reassembled, direction="tx", meta={"source":"mtk", "reassembled":True}))
-                            # 标记所有已处理的行
-                            for line_idx in processed_lines:
-                                processed_indices.add(line_idx)
-                            # 跳到下一个未处理的行
-                            i = max(processed_lines) + 1
-                            continue
-                        else:
-                            # 单段消息
-                            msgs.append(Message(raw=s, direction="tx", meta={"source":"mtk"}))
-                            i = next_i
-                            continue
-                    else:
-                        # 非LPA=>eSIM消息
-                        msgs.append(Message(raw=s, direction="tx", meta={"source":"mtk"}))
-                        i = next_i
-                        continue
-            
-            # 处理RX消息
-            elif line.startswith("APDU_rx"):
-                r = _collect_one(lines, i, APDU_RX0, APDU_RXN)
-                if r[0] is not None:
-                    raw, i = r
-                    s = normalize_hex(raw)
-                    if s:
-                        msgs.append(Message(raw=s, direction="rx", meta={"source":"mtk"}))
-                    continue
-            
-            i += 1
-        
-        return msgs
-    
-    def _try_reassemble_lpa_esim(self, lines: List[str], start_idx: int, first_apdu: str) -> Tuple[str, List[int]]:
-        """尝试重组LPA=>eSIM的多段消息（支持跨 APDU_rx 分隔的多组 APDU_tx 0..N）。
-        规则：P1=0x11表示后续仍有数据；P1=0x91表示最后一块；P2为block号应递增。
-        返回：(重组后的APDU(hex), 本次被消费的行索引列表)；若无法重组则返回首段原样。
+
+DEFAULT_CHUNK_SIZE = 1 << 20  # 每次从文件读取 1 MiB
+DEFAULT_MAX_GAP = 64          # E2 链最后一段之后最多再看多少个 APDU 组
+
+
+def _back_lines(buf, end: int, n: int, nl) -> Tuple[int, int]:
+    """buf[:end] 以换行结尾：返回其最后至多 n 行的起点及实际行数。"""
+    if end <= 0:
+        return 0, 0
+    i = end - 1
+    k = 0
+    while k < n:
+        j = buf.rfind(nl, 0, i)
+        k += 1
+        if j < 0:
+            return 0, k
+        i = j
+    return i + 1, k
+
+
+class _E2Chain:
+    """一条尚未闭合的 LPA=>eSIM 多段 STORE DATA 链。"""
+    __slots__ = ("segments", "metas", "tag_hex", "cla", "ins", "expected_p2", "after", "held",
+                 "last_group", "result")
+
+    def __init__(self, first_apdu: str, tag_hex: str, group_no: int, meta: Dict):
+        cla, ins, _, p2 = _parse_apdu_header(first_apdu)
+        self.segments: List[str] = [first_apdu]
+        self.metas: List[Dict] = [meta]  # 各分段的来源位置
+        self.tag_hex = tag_hex
+        self.cla = cla
+        self.ins = ins
+        self.expected_p2 = p2
+        # 最后一个分段之后收到的 RX（_Held）：链继续时转入 held，链中断时原位输出
+        self.after: List[_Held] = []
+        # 首段之后的各分段及分段之间的 RX（_Held，按原顺序已在输出队列中）：
+        # 重组成功时作废，无法重组时与各分段交错原样输出
+        self.held: List[_Held] = []
+        self.last_group = group_no   # 最后一个分段所在的组序号（用于前瞻上限）
+        self.result: List[Message] | None = None  # 闭合后得到的消息
+
+    def accepts(self, apdu_hex: str) -> bool:
+        # 必须同一 CLA/INS 且 P1 in {0x11,0x91} 且块号递增（允许 00->01 起步）
+        cla, ins, p1, p2 = _parse_apdu_header(apdu_hex)
+        return (cla == self.cla and ins == self.ins and p1 in (0x11, 0x91)
+                and ((p2 == self.expected_p2 + 1) or (self.expected_p2 == 0 and p2 == 1)))
+
+
+class _Held:
+    """输出队列中暂缓的消息（链中的 RX 或后续分段），视链的去向决定是否输出。"""
+    __slots__ = ("msg", "dropped")
+
+    def __init__(self, msg: Message | None):
+        self.msg = msg
+        self.dropped = False
+
+
+class MTKStream:
+    """MTK 日志的增量解析状态。
+
+    按块喂入原始日志（bytes 或 str），随着 APDU_tx/APDU_rx 组闭合即产出 Message。
+    E2 重组按逻辑通道各自维护一条链，单遍线性处理；链在最后一段之后超过
+    ``max_gap`` 个 APDU 组仍未续上即按不完整闭合。内存占用只与未闭合的链
+    （及其后排队等待的消息）有关，与文件大小无关。
+    """
+    source = "mtk"            # meta["source"]
+    position_key = "line"     # 组位置（grp[3]）在 meta 中的键名；抓包为帧序号
+
+    def __init__(self, fast: bool = True, max_gap: int = DEFAULT_MAX_GAP, groups_only: bool = False,
+                 source_file: str | None = None):
+        self._fast = fast        # True: 子串预筛选 + 合并正则；False: 逐行四个正则
+        self.max_gap = max_gap
+        self.source_file = source_file  # 多文件合并时记入 meta["file"]
+        # groups_only: 只做 行 -> 组，闭合的组留给 take_groups() 取走（多文件按时间戳合并用）
+        self._group_sink: List[list] | None = [] if groups_only else None
+        # 以下三项也只在 groups_only 模式下记录，供合并时接上被轮转拆开的组和时间戳：
+        self.lead: list | None = None      # 输入开头的孤立后续行 [direction, parts]（上一文件末组的后半段）
+        self._lead_line = 0
+        self.eof_group: list | None = None  # 直到输入末尾仍未结束的组
+        self.tail_ts = None                # 末尾 TS_LOOKBACK 行内最近的时间戳：(时间戳, 距末尾的行数)
+        self.line_count = 0                # 输入的总行数
+        self._tail = None        # 上一块末尾不完整的行
+        self._group = None       # 正在收集的组：[direction, parts, offset, line, ts, file]
+        self._groups = 0         # 已闭合的 APDU 组计数
+        self._chains: Dict[int, _E2Chain] = {}   # 逻辑通道 -> 未闭合的链
+        self._last_tx_chain: _E2Chain | None = None  # 上一个 TX 所属的链（RX 归属）
+        self._queue: deque = deque()  # 有链未闭合时的有序输出队列
+        self._offset = 0         # 已喂入的总长度（bytes 输入即字节偏移）
+        self._lines_done = 0     # 已处理的完整行数
+        self._ctx = None         # 上一块最后 TS_LOOKBACK 行（快速路径跨块查找时间戳用）
+        self._recent: deque = deque(maxlen=TS_LOOKBACK)  # 逐行路径最近的行
+        self._ts_upto = 0        # 此行号之前的行已查过时间戳（APDU 行本身不含时间戳）
+        self._ts_at = None       # 上次找到的时间戳：(行号, 时间戳)
+        self.emitted = 0         # 已输出的消息数
+        # 同步点记录（并行提取拼接用）：新组开始时若无未闭合链，记 (行起始偏移, 已输出数)
+        self.sync_points: List[Tuple[int, int]] | None = None
+        self.sync_limit = 0
+
+    def feed(self, data) -> List[Message]:
+        out: List[Message] = []
+        if not data:
+            return out
+        base = self._offset
+        self._offset += len(data)
+        if self._tail:
+            base -= len(self._tail)
+            data = self._tail + data
+        nl = b"\n" if isinstance(data, bytes) else "\n"
+        end = data.rfind(nl) + 1  # 本块中完整行的结尾
+        self._tail = data[end:]
+        self._lines(data, end, base, out)
+        return out
+
+    def resume_at(self, offset: int, lines_before: int, context=None):
+        """从文件中间（某行行首）开始喂入前设置位置：字节偏移、之前的行数、之前的若干行。"""
+        self._offset = offset
+        self._lines_done = lines_before
+        self._ctx = context or None
+
+    @property
+    def lead_only(self) -> bool:
+        """groups_only 模式输入结束后：整个输入都是孤立的后续行（一个组的中段）。"""
+        return self.line_count > 0 and self._lead_line == self.line_count
+
+    def take_groups(self) -> List[list]:
+        """groups_only 模式：取走目前已闭合的组。"""
+        groups = self._group_sink
+        self._group_sink = []
+        return groups
+
+    def push_group(self, grp: list) -> List[Message]:
+        """送入另一个 groups_only 流闭合的组，在本流中做 组 -> 消息（含跨文件重组）。"""
+        out: List[Message] = []
+        self._process_group(grp, out)
+        return out
+
+    def end_range(self) -> List[Message]:
+        """在一个 "APDU_tx 0:" 行之前停止喂入：闭合当前组，但保留未闭合的链。"""
+        out: List[Message] = []
+        self._flush_group(out)
+        return out
+
+    @property
+    def quiescent(self) -> bool:
+        """没有未闭合的链，也没有排队等待的消息。"""
+        return not self._chains and not self._queue
+
+    def close(self) -> List[Message]:
+        """输入结束：处理残行、闭合当前组与未完成的重组链。"""
+        out: List[Message] = []
+        if self._tail:
+            ln = self._tail
+            self._tail = None
+            ln += "\n" if isinstance(ln, str) else b"\n"
+            self._lines(ln, len(ln), self._offset - len(ln) + 1, out)
+        if self._group_sink is not None:
+            self.eof_group = self._group
+            self.tail_ts = self._tail_ts()
+            self.line_count = self._lines_done
+        self._flush_group(out)
+        for ch in list(self._chains):
+            self._close_chain(ch, "truncated")
+        self._drain(out)
+        return out
+
+    # ---------- 行 -> 组 ----------
+    def _lines(self, data, end: int, base: int, out: List[Message]):
+        """处理 data[:end] 中的完整行；base 为 data[0] 在整个输入中的偏移。"""
+        if self._fast:
+            self._scan(data, end, base, out)
+            self._keep_context(data, end)
+            return
+        nl = b"\n" if isinstance(data, bytes) else "\n"
+        lines = data[:end].split(nl)
+        lines.pop()
+        recent = self._recent
+        for ln in lines:
+            n = len(ln) + 1
+            if isinstance(ln, bytes):
+                ln = ln.decode("utf-8", errors="ignore")
+            self._lines_done += 1
+            self._on_line(ln, base, self._lines_done, out)
+            recent.append(ln)
+            base += n
+
+    def _keep_context(self, data, end: int):
+        """保留 data[:end] 最后 TS_LOOKBACK 行，供下一块开头的组查找时间戳。"""
+        nl = b"\n" if isinstance(data, bytes) else "\n"
+        ws, k = _back_lines(data, end, TS_LOOKBACK, nl)
+        ctx = data[ws:end]
+        if k < TS_LOOKBACK and self._ctx:
+            prev = self._ctx
+            ps, _ = _back_lines(prev, len(prev), TS_LOOKBACK - k, nl)
+            ctx = prev[ps:] + ctx
+        self._ctx = ctx
+
+    def _group_ts(self, line: int, data=None, ls: int = 0):
+        """组首行（第 line 行）之前 TS_LOOKBACK 行内最近的时间戳。
+
+        只查看上次查找之后新出现的非 APDU 行（快速路径在 data 中从 ls 往前，
+        逐行路径在 _recent 中）；没找到时沿用上次的结果（若仍在范围内）。
         """
-        first_apdu = normalize_hex(first_apdu)
-        cla0, ins0, p10, p20 = _parse_apdu_header(first_apdu)
-        if not _is_lpa_to_esim(first_apdu):
-            return first_apdu, [start_idx]
-
-        # 提取首段的 TAG/长度信息（用于校验/构造）
-        tag_hex, _, _ = _extract_esim_tag_and_length(first_apdu)
-        if not tag_hex:
-            return first_apdu, [start_idx]
-
-        segments = [first_apdu]
-        consumed = [start_idx]
-        expected_p2 = p20
-        found_last = (p10 == 0x91)
-
-        i = start_idx + 1
-        while i < len(lines) and not found_last:
-            line = lines[i].rstrip("\n")
-
-            # 寻找下一组 "APDU_tx 0:" 开头的块
-            m0 = APDU_TX0.match(line)
-            if not m0:
-                i += 1
-                continue
-
-            # 收集该组的所有 "APDU_tx N:" 行
-            seg_start = i
-            parts = [m0.group(1)]
-            i += 1
-            while i < len(lines):
-                mn = APDU_TXN.match(lines[i])
-                if mn:
-                    parts.append(mn.group(2))
-                    i += 1
-                else:
-                    break
-            apdu_hex = normalize_hex(' '.join(parts))
-
-            cla, ins, p1, p2 = _parse_apdu_header(apdu_hex)
-            # 必须同一 CLA/INS 且 P1 in {0x11,0x91} 且块号递增（允许 00->01 起步）
-            if not (((cla == cla0 and ins == ins0) and (p1 in (0x11, 0x91)) and ((p2 == expected_p2 + 1) or (expected_p2 == 0 and p2 == 1)))):
-                # 不是连续块，停止
-                i = seg_start  # 回退到该行，下次主循环会处理它
+        n = min(TS_LOOKBACK, line - self._ts_upto)
+        if n > 0:
+            hit = self._ts_in_recent(n) if data is None else self._ts_in_data(data, ls, n)
+            if hit is not None:
+                self._ts_at = (line - hit[1], hit[0])
+                return hit[0]
+        at = self._ts_at
+        if at is not None and at[0] >= line - TS_LOOKBACK:
+            return at[1]
+        return None
+
+    def _ts_in_data(self, data, ls: int, n: int):
+        """从 data[ls] 往前逐行查找（不够时接着查上一块留下的 _ctx）。"""
+        if isinstance(data, bytes):
+            nl, pat = b"\n", TS_RE_B
+        else:
+            nl, pat = "\n", TS_RE
+        buf, e, back = data, ls, 0
+        while back < n:
+            if e <= 0:
+                if buf is data and self._ctx:
+                    buf = self._ctx
+                    e = len(buf)
+                    continue
+                return None
+            s = buf.rfind(nl, 0, e - 1) + 1
+            back += 1
+            m = pat.search(buf, s, e)
+            if m is not None:
+                ts = m.group()
+                return (ts.decode("ascii") if isinstance(ts, bytes) else ts), back
+            e = s
+        return None
+
+    def _tail_ts(self):
+        if self._fast:
+            if not self._ctx:
+                return None
+            nl, pat = (b"\n", TS_RE_B) if isinstance(self._ctx, bytes) else ("\n", TS_RE)
+            lines = self._ctx.split(nl)[-TS_LOOKBACK - 1:-1]
+        else:
+            pat, lines = TS_RE, list(self._recent)
+        for back, ln in enumerate(reversed(lines), 1):
+            m = pat.search(ln)
+            if m is not None:
+                ts = m.group()
+                return (ts.decode("ascii") if isinstance(ts, bytes) else ts), back
+        return None
+
+    def _on_orphan(self, direction: str, hx: str, line: int):
+        """不属于任何组的后续行：groups_only 模式下输入开头连续的几行记入 lead。"""
+        if self._group_sink is None or line != self._lead_line + 1:
+            return
+        if self.lead is None:
+            self.lead = [direction, []]
+        elif self.lead[0] != direction:
+            return
+        self.lead[1].append(hx)
+        self._lead_line = line
+
+    def _ts_in_recent(self, n: int):
+        recent = self._recent
+        for back in range(1, min(n, len(recent)) + 1):
+            m = TS_RE.search(recent[-back])
+            if m is not None:
+                return m.group(), back
+        return None
+
+    def _scan(self, data, end: int, base: int, out: List[Message]):
+        """只检查包含 "APDU_" 的行；其余行仅用于判断当前组是否结束。"""
+        if isinstance(data, bytes):
+            key, nl, pat = b"APDU_", b"\n", APDU_LINE_B
+        else:
+            key, nl, pat = "APDU_", "\n", APDU_LINE
+        find = data.find
+        count = data.count
+        pos = 0  # 下一未处理行的起点
+        lineno = self._lines_done + 1  # data[pos] 所在行号
+        while True:
+            k = find(key, pos, end)
+            if k < 0:
                 break
+            ls = data.rfind(nl, pos, k)
+            ls = pos if ls < 0 else ls + 1
+            if ls > pos:
+                lineno += count(nl, pos, ls)
+                if self._group is not None:
+                    self._flush_group(out)  # 中间隔着其它行：当前组结束
+            le = find(nl, k, end)
+            self._on_apdu_line(pat.fullmatch(data, ls, le), data, ls, base + ls, lineno, out)
+            pos = le + 1
+            lineno += 1
+        self._lines_done = lineno - 1 + count(nl, pos, end)
+        if pos < end and self._group is not None:
+            self._flush_group(out)
+
+    def _on_apdu_line(self, m, data, ls: int, offset: int, line: int, out: List[Message]):
+        if m is None:
+            self._flush_group(out)
+            return
+        direction, idx, hx = m.group("dir", "idx", "hex")
+        if isinstance(hx, bytes):
+            direction = direction.decode("ascii")
+            idx = idx.decode("ascii")
+            hx = hx.decode("ascii")
+        grp = self._group
+        if grp is not None and grp[0] == direction:
+            grp[1].append(hx)
+        else:
+            if grp is not None:
+                self._flush_group(out)
+            if idx != "0":
+                # 孤立的后续行：不开始组，其前的行留给下一组查找时间戳
+                self._on_orphan(direction, hx, line)
+                return
+            self._start_group(direction, hx, offset, line, self._group_ts(line, data, ls))
+        self._ts_upto = line + 1
+
+    def _on_line(self, line: str, offset: int, lineno: int, out: List[Message]):
+        grp = self._group
+        if grp is not None:
+            cont = APDU_TXN if grp[0] == "tx" else APDU_RXN
+            m = cont.match(line)
+            if m:
+                grp[1].append(m.group(2))
+                self._ts_upto = lineno + 1
+                return
+            self._flush_group(out)
+        s = line.lstrip()
+        if s.startswith("APDU_tx"):
+            m = APDU_TX0.match(line)
+            if m:
+                self._start_group("tx", m.group(1), offset, lineno, self._group_ts(lineno))
+                self._ts_upto = lineno + 1
+        elif s.startswith("APDU_rx"):
+            m = APDU_RX0.match(line)
+            if m:
+                self._start_group("rx", m.group(1), offset, lineno, self._group_ts(lineno))
+                self._ts_upto = lineno + 1
+        else:
+            return
+        if m is None and lineno == self._lead_line + 1:
+            m = (APDU_TXN if s.startswith("APDU_tx") else APDU_RXN).match(line)
+            if m:
+                self._on_orphan(s[5:7], m.group(2), lineno)
+
+    def _start_group(self, direction: str, hx: str, offset: int, line: int, ts):
+        sp = self.sync_points
+        if sp is not None and not self._chains and len(sp) < self.sync_limit:
+            sp.append((offset, self.emitted))
+        self._group = [direction, [hx], offset, line, ts, self.source_file]
+
+    def _flush_group(self, out: List[Message]):
+        grp = self._group
+        if grp is None:
+            return
+        self._group = None
+        if self._group_sink is not None:
+            self._group_sink.append(grp)
+            return
+        self._process_group(grp, out)
+
+    def _process_group(self, grp: list, out: List[Message]):
+        self._groups += 1
+        parts = grp[1]
+        # 组内容为日志中的十六进制片段；抓包提取器直接给出一段 APDU 字节
+        data = parts[0] if parts and isinstance(parts[0], bytes) else hex_to_bytes(' '.join(parts))
+        # 来源位置：组首行的行号、偏移，以及其前最近的日志时间戳
+        meta = {"source": self.source, self.position_key: grp[3], "offset": grp[2]}
+        if grp[4] is not None:
+            meta["ts"] = grp[4]
+        if grp[5] is not None:
+            meta["file"] = grp[5]
+        if grp[0] == "tx":
+            self._on_tx(data, meta)
+        elif data:
+            msg = Message(direction="rx", meta=meta, data=data)
+            chain = self._last_tx_chain
+            if chain is not None and chain.result is None:
+                held = _Held(msg)
+                chain.after.append(held)
+                self._queue.append(held)
+            else:
+                self._put(msg)
+        if self._chains:
+            self._expire_chains()
+        self._drain(out)
+
+    # ---------- 组 -> 消息（含 LPA=>eSIM 重组） ----------
+    def _on_tx(self, data: bytes, meta: Dict):
+        # 链的判定与重组仍按十六进制进行；普通消息直接用字节构造
+        s = data.hex().upper()
+        cla, ins, p1, p2 = _parse_apdu_header(s)
+        channel = logical_channel(cla)
+        chain = self._chains.get(channel)
+        if chain is not None:
+            if chain.accepts(s):
+                chain.segments.append(s)
+                chain.metas.append(meta)
+                chain.held.extend(chain.after)
+                chain.after.clear()
+                seg = _Held(None)  # 分段消息在链闭合时确定
+                chain.held.append(seg)
+                self._queue.append(seg)
+                chain.expected_p2 = p2
+                chain.last_group = self._groups
+                self._last_tx_chain = chain
+                if p1 == 0x91:
+                    self._close_chain(channel, None)
+                return
+            # 同一通道上不是连续块：先闭合当前链，再把该 TX 当作新消息处理
+            self._close_chain(channel, "interrupted", s)
 
-            segments.append(apdu_hex)
-            consumed.extend(range(seg_start, i))
+        self._last_tx_chain = None
+        if s and _is_lpa_to_esim(s):
+            tag_hex, _, _ = _extract_esim_tag_and_length(s)
+            if p1 == 0x11 and tag_hex:  # 还有后续块；其余 P1 为独立命令
+                chain = _E2Chain(s, tag_hex, self._groups, meta)
+                self._chains[channel] = chain
+                self._last_tx_chain = chain
+                self._queue.append(chain)
+                return
+        self._put(Message(direction="tx", meta=meta, data=data))
 
-            expected_p2 = p2
-            found_last = (p1 == 0x91)
+    def _put(self, msg: Message):
+        self._queue.append(msg)
 
-        # 若收集到多个段，则重组
-        if len(segments) > 1:
-            reassembled = reassemble_e2_segments(segments, tag_hex)
-            return reassembled, consumed
+    def _expire_chains(self):
+        limit = self._groups - self.max_gap
+        for ch, chain in list(self._chains.items()):
+            if chain.last_group < limit:
+                self._close_chain(ch, "lookahead")
 
-        return first_apdu, [start_idx]
\ No newline at end of file
+    def _close_chain(self, channel: int, reason: str | None, next_apdu: str = ""):
+        """闭合通道上的链；reason 为 None 表示收到了最后一块（P1=0x91）。"""
+        chain = self._chains.pop(channel)
+        meta: Dict = {}
+        if reason is not None:
+            gap = {"reason": reason, "segments": len(chain.segments),
+                   "expected_block": (chain.expected_p2 + 1) & 0xFF}
+            if next_apdu and len(next_apdu) >= 8:
+                gap["next_header"] = next_apdu[:8]
+            meta["gap"] = gap
+        reassembled = ""
+        if len(chain.segments) > 1:
+            reassembled = reassemble_e2_segments(chain.segments, chain.tag_hex)
+        if reassembled:
+            # 重组后的消息沿用首段的来源位置；分段之间的 RX 不再输出
+            meta["reassembled"] = True
+            chain.result = [Message(raw=reassembled, direction="tx", meta={**chain.metas[0], **meta})]
+            for held in chain.held:
+                held.dropped = True
+        else:
+            # 单段（或无法重组）：各段原样输出，与分段之间的 RX 保持原顺序
+            segs = zip(chain.segments, chain.metas)
+            seg, sm = next(segs)
+            chain.result = [Message(raw=seg, direction="tx", meta={**sm, **meta})]
+            later = (h for h in chain.held if h.msg is None)
+            for (seg, sm), held in zip(segs, later):
+                held.msg = Message(raw=seg, direction="tx", meta={**sm, **meta})
+        chain.held = []
+
+    def _drain(self, out: List[Message]):
+        """按原始顺序输出队首已确定的消息；遇到未闭合的链即停。"""
+        q = self._queue
+        while q:
+            item = q[0]
+            if isinstance(item, Message):
+                out.append(item)
+                self.emitted += 1
+            elif isinstance(item, _Held):
+                if not item.dropped:
+                    out.append(item.msg)
+                    self.emitted += 1
+            elif item.result is None:
+                break
+            else:
+                out.extend(item.result)
+                self.emitted += len(item.result)
+                item.result = ()  # 已输出，释放分段
+                item.segments = ()
+                item.metas = ()
+            q.popleft()
+
+
+class MTKExtractor:
+    version = 3  # 输出的消息或 meta 有变化时递增，使已有的提取缓存失效
+
+    def __init__(self, chunk_size: int = DEFAULT_CHUNK_SIZE, fast_scan: bool = True,
+                 max_gap: int = DEFAULT_MAX_GAP):
+        self.chunk_size = chunk_size
+        self.fast_scan = fast_scan
+        self.max_gap = max_gap
+
+    @property
+    def cache_key(self) -> str:
+        """提取缓存的键：影响输出的版本与参数（fast_scan 两条路径输出相同，不计入）。"""
+        return f"mtk/{self.version}/{self.max_gap}"
+
+    def new_stream(self, groups_only: bool = False, source_file: str | None = None) -> "MTKStream":
+        return MTKStream(fast=self.fast_scan, max_gap=self.max_gap, groups_only=groups_only,
+                         source_file=source_file)
+
+    def iter_messages(self, fileobj) -> Iterator[Message]:
+        """从文件对象（二进制或文本）分块读取，逐条产出 Message。"""
+        stream = self.new_stream()
+        while True:
+            chunk = fileobj.read(self.chunk_size)
+            if not chunk:
+                break
+            yield from stream.feed(chunk)
+        yield from stream.close()
+
+    def iter_file(self, path: str, workers: int = 1) -> Iterator[Message]:
+        """按路径提取；workers > 1 时切块多进程并行，输出顺序与串行完全一致。"""
+        # 压缩文件无法按偏移切块，只能串行流式解压
+        if workers > 1 and self.fast_scan and detect_compression(path) is None:
+            from data_io.extractors.mtk_parallel import iter_messages_parallel
+            return iter_messages_parallel(path, workers, max_gap=self.max_gap, chunk_size=self.chunk_size)
+        return self._iter_path(path)
+
+    def _iter_path(self, path: str) -> Iterator[Message]:
+        with open_binary(path) as f:
+            yield from self.iter_messages(f)
+
+    def extract_from_text(self, text: str) -> List[Message]:
+        """Preserve chronological order of APDU_tx/APDU_rx groups with LPA=>eSIM reassembly."""
+        stream = self.new_stream()
+        return stream.feed(text) + stream.close()
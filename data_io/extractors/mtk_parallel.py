@@ -0,0 +1,157 @@
+"""并行提取大型 MTK 日志：按安全边界切块，进程池并行提取，再按原顺序拼接。
+
+切分点选在行首为 "APDU_tx 0:" 且上一行不是 APDU_tx 的位置（此处当前组必然结束）。
+切分点处可能仍有跨块的 E2 链：前一块结束时若仍有未闭合的链，就带着它的状态
+继续串行处理下一块，直到双方在同一个新组起点都处于"无未闭合链"状态（同步点），
+此后两边的输出完全一致，直接接上该块 worker 的结果。因此输出与串行提取逐条相同。
+行号需要知道块起点之前的总行数，先并行统计各块的换行数再开始提取。
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator, List, Optional, Tuple
+
+from core.models import Message
+from data_io.extractors.mtk import (MTKStream, DEFAULT_CHUNK_SIZE, DEFAULT_MAX_GAP,
+                                    TS_LOOKBACK, _back_lines)
+
+SYNC_LIMIT = 1 << 16          # 每块最多记录的同步点数
+_PROBE = 1 << 16              # 串行续接时每次喂入的大小
+_SEARCH_WINDOW = 8 << 20      # 寻找切分点时最多向后查找的范围
+
+_BOUNDARY_KEY = b"\nAPDU_tx 0:"
+
+
+def find_boundaries(path: str, parts: int) -> List[int]:
+    """返回切分偏移 [0, b1, ..., size]，每个 bi 都是一个可作为块起点的 "APDU_tx 0:" 行首。"""
+    size = os.path.getsize(path)
+    bounds = [0]
+    if parts <= 1 or size == 0:
+        return bounds + [size]
+    with open(path, "rb") as f:
+        for k in range(1, parts):
+            guess = max(size * k // parts, bounds[-1] + 1)
+            if guess >= size:
+                break
+            f.seek(guess - 1)
+            window = f.read(_SEARCH_WINDOW)
+            i = 0
+            while True:
+                i = window.find(_BOUNDARY_KEY, i)
+                if i < 0:
+                    break
+                prev = window.rfind(b"\n", 0, i)
+                # 上一行若是 APDU_tx（含 "APDU_tx 0:"），两行会并入同一组，不能在此切开
+                if prev >= 0 and window.find(b"APDU_tx", prev + 1, i) < 0:
+                    bounds.append(guess - 1 + i + 1)
+                    break
+                i += 1
+    return bounds + [size]
+
+
+def _read_range(f, start: int, end: int, chunk_size: int) -> Iterator[bytes]:
+    f.seek(start)
+    remaining = end - start
+    while remaining > 0:
+        chunk = f.read(min(chunk_size, remaining))
+        if not chunk:
+            break
+        remaining -= len(chunk)
+        yield chunk
+
+
+def _count_lines(path: str, start: int, end: int, chunk_size: int) -> int:
+    with open(path, "rb") as f:
+        return sum(chunk.count(b"\n") for chunk in _read_range(f, start, end, chunk_size))
+
+
+def _context_before(f, start: int) -> bytes:
+    """start 之前的最后 TS_LOOKBACK 行（与串行提取跨块查找时间戳时看到的相同）。"""
+    size = 4096
+    while True:
+        lo = max(0, start - size)
+        f.seek(lo)
+        buf = f.read(start - lo)
+        ws, k = _back_lines(buf, len(buf), TS_LOOKBACK, b"\n")
+        if k >= TS_LOOKBACK or lo == 0:
+            return buf[ws:]
+        size *= 4
+
+
+def _extract_range(path: str, start: int, end: int, lines_before: int, last: bool, max_gap: int,
+                   chunk_size: int) -> Tuple[List[Message], Optional[MTKStream], List[Tuple[int, int]]]:
+    """worker：从空状态提取 [start, end)。返回 (消息, 块末仍未静止时的状态, 同步点)。"""
+    stream = MTKStream(fast=True, max_gap=max_gap)
+    stream.sync_points = []
+    stream.sync_limit = SYNC_LIMIT
+    out: List[Message] = []
+    with open(path, "rb") as f:
+        stream.resume_at(start, lines_before, _context_before(f, start) if start else None)
+        for chunk in _read_range(f, start, end, chunk_size):
+            out.extend(stream.feed(chunk))
+    if last:
+        out.extend(stream.close())
+        return out, None, stream.sync_points
+    out.extend(stream.end_range())
+    syncs = stream.sync_points
+    stream.sync_points = None
+    return out, (None if stream.quiescent else stream), syncs
+
+
+def iter_messages_parallel(path: str, workers: int = 0, max_gap: int = DEFAULT_MAX_GAP,
+                           chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[Message]:
+    """并行提取 path，按与串行 MTKExtractor 完全相同的顺序产出 Message。"""
+    workers = workers or os.cpu_count() or 1
+    bounds = find_boundaries(path, workers)
+    ranges = list(zip(bounds[:-1], bounds[1:]))
+    if len(ranges) <= 1:
+        stream = MTKStream(fast=True, max_gap=max_gap)
+        with open(path, "rb") as f:
+            for chunk in _read_range(f, 0, bounds[-1], chunk_size):
+                yield from stream.feed(chunk)
+        yield from stream.close()
+        return
+
+    n = len(ranges)
+    with ProcessPoolExecutor(max_workers=min(workers, n)) as pool, open(path, "rb") as f:
+        counts = list(pool.map(_count_lines, [path] * n, bounds[:-1], bounds[1:], [chunk_size] * n))
+        lines_before = [0] * n
+        for i in range(1, n):
+            lines_before[i] = lines_before[i - 1] + counts[i - 1]
+        futures = [pool.submit(_extract_range, path, s, e, lines_before[i], i == n - 1, max_gap, chunk_size)
+                   for i, (s, e) in enumerate(ranges)]
+        carry: Optional[MTKStream] = None   # 跨块未闭合链的串行续接状态
+        for i, fut in enumerate(futures):
+            msgs, state, syncs = fut.result()
+            if carry is None:
+                yield from msgs
+                carry = state
+                continue
+            # 带着上一块的状态串行续接本块，直到与 worker 在同一同步点会合
+            worker_at = dict(syncs)
+            carry.sync_points = []
+            carry.sync_limit = SYNC_LIMIT
+            start, end = ranges[i]
+            met = None
+            for chunk in _read_range(f, start, end, _PROBE):
+                emitted0 = carry.emitted
+                got = carry.feed(chunk)
+                for off, count in carry.sync_points:
+                    if off in worker_at:
+                        met = (count, worker_at[off])
+                        break
+                if met is not None:
+                    yield from got[:met[0] - emitted0]
+                    break
+                yield from got
+                carry.sync_points.clear()
+            if met is not None:
+                yield from msgs[met[1]:]
+                carry = state
+                continue
+            # 整块都没会合：carry 已串行处理完本块，worker 结果作废
+            carry.sync_points = None
+            if i == n - 1:
+                yield from carry.close()
+                carry = None
+            else:
+                yield from carry.end_range()
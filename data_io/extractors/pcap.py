@@ -0,0 +1,335 @@
+"""pcap / pcapng 中 GSMTAP SIM 封装的 APDU 提取。
+
+文件通过 mmap 映射后用 struct 直接在缓冲区上解析记录头，链路层 / IP / UDP /
+GSMTAP 头只做切片定位，APDU 从缓冲区切出后直接转成 Message，不经过文本转换。
+每个 GSMTAP SIM APDU 记录含一次完整交互（命令头 + 数据 + SW），拆成 tx/rx 两条，
+再送入与 MTK 日志相同的重组状态（多段 STORE DATA 照常重组）。
+
+支持的链路类型：Ethernet(含 VLAN)、Linux cooked (SLL/SLL2)、Raw IP、BSD loopback。
+只处理 GSMTAP SIM 的 APDU 子类型；ATR / PPS / 分段 TPDU 记录跳过。
+"""
+import mmap
+import traceback
+import struct
+from datetime import datetime, timezone
+from typing import Iterator, List, Optional
+
+from core.models import Message
+from data_io.loaders import open_binary, detect_compression
+from data_io.extractors.mtk import MTKStream, DEFAULT_CHUNK_SIZE, DEFAULT_MAX_GAP
+
+GSMTAP_UDP_PORT = 4729
+GSMTAP_TYPE_SIM = 0x04
+GSMTAP_SIM_APDU = 0x00
+
+# 经典 pcap 文件头魔数 -> (字节序, 时间戳分辨率)
+_PCAP_MAGIC = {
+    b"\xd4\xc3\xb2\xa1": ("<", 1e-6),
+    b"\xa1\xb2\xc3\xd4": (">", 1e-6),
+    b"\x4d\x3c\xb2\xa1": ("<", 1e-9),
+    b"\xa1\xb2\x3c\x4d": (">", 1e-9),
+}
+_PCAPNG_SHB = b"\x0a\x0d\x0d\x0a"
+_PCAPNG_BOM = 0x1A2B3C4D
+
+# pcapng 块类型
+_IDB, _SPB, _EPB = 1, 3, 6
+_OPT_TSRESOL = 9
+
+# 第二类（数据由卡返回）的 INS：GSMTAP 记录中的数据属于响应
+_OUTGOING_INS = frozenset((0xB0, 0xB2, 0xC0, 0x12, 0x84, 0xF2, 0xCA, 0xCB))
+
+_ETH_IP = (0x0800, 0x86DD)
+
+
+def is_capture(head: bytes) -> bool:
+    """按文件头判断是否为 pcap / pcapng。"""
+    return head[:4] in _PCAP_MAGIC or head[:4] == _PCAPNG_SHB
+
+
+def _udp_payload(linktype: int, d: memoryview) -> Optional[memoryview]:
+    """剥掉链路层 / IP / UDP 头；不是发往或来自 GSMTAP 端口的 UDP 返回 None。"""
+    n = len(d)
+    if linktype == 1:  # Ethernet
+        if n < 14:
+            return None
+        et, off = (d[12] << 8) | d[13], 14
+        while et in (0x8100, 0x88A8) and n >= off + 4:
+            et, off = (d[off + 2] << 8) | d[off + 3], off + 4
+        if et not in _ETH_IP:
+            return None
+    elif linktype == 113:  # Linux cooked
+        if n < 16 or ((d[14] << 8) | d[15]) not in _ETH_IP:
+            return None
+        off = 16
+    elif linktype == 276:  # Linux cooked v2
+        if n < 20 or ((d[0] << 8) | d[1]) not in _ETH_IP:
+            return None
+        off = 20
+    elif linktype == 0:  # BSD loopback
+        off = 4
+    elif linktype in (101, 228, 229, 12, 14):  # Raw IP
+        off = 0
+    else:
+        return None
+    if n < off + 20:
+        return None
+    version = d[off] >> 4
+    if version == 4:
+        if d[off + 9] != 17 or ((d[off + 6] & 0x1F) | d[off + 7]):
+            return None  # 非 UDP，或非首个分片
+        off += (d[off] & 0x0F) * 4
+    elif version == 6:
+        if n < off + 48 or d[off + 6] != 17:
+            return None
+        off += 40
+    else:
+        return None
+    if n < off + 8:
+        return None
+    sport = (d[off] << 8) | d[off + 1]
+    dport = (d[off + 2] << 8) | d[off + 3]
+    if GSMTAP_UDP_PORT not in (sport, dport):
+        return None
+    ulen = (d[off + 4] << 8) | d[off + 5]
+    return d[off + 8:off + max(ulen, 8)]
+
+
+def _sim_apdu(p: memoryview) -> Optional[memoryview]:
+    """GSMTAP 头：version, hdr_len(32 位字), type, ..., sub_type(第 12 字节)。"""
+    if len(p) < 16 or p[2] != GSMTAP_TYPE_SIM or p[12] != GSMTAP_SIM_APDU:
+        return None
+    return p[p[1] * 4:]
+
+
+def _split_apdu(d: memoryview):
+    """把一次交互拆成 (C-APDU, R-APDU)；数据归属按 P3 与 INS 判断。"""
+    n = len(d)
+    if n < 6:
+        return None
+    if n == 6:
+        return d[:4], d[4:]  # 第一类：4 字节头 + SW
+    p3 = d[4] or 256
+    body = n - 7
+    if body == 0:
+        cut = 5
+    elif body == p3:
+        cut = 5 if d[1] in _OUTGOING_INS else 5 + body
+    else:
+        cut = 5 + d[4] if 5 + d[4] <= n - 2 else 5
+    return d[:cut], d[cut:]
+
+
+class _TsFormat:
+    """抓包时间 -> 与日志时间戳相同格式的字符串（UTC），按秒缓存日期部分；超出范围时为 None。"""
+    __slots__ = ("sec", "text")
+
+    def __init__(self):
+        self.sec = None
+        self.text = ""
+
+    def __call__(self, t: float) -> Optional[str]:
+        sec = int(t)
+        usec = int(round((t - sec) * 1e6))
+        if usec >= 1000000:
+            sec, usec = sec + 1, usec - 1000000
+        if sec != self.sec:
+            try:
+                text = datetime.fromtimestamp(sec, timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+            except (ValueError, OverflowError, OSError):  # 损坏的帧（如极大的 ts_high）：该帧没有时间戳
+                return None
+            self.sec, self.text = sec, text
+        return f"{self.text}.{usec:06d}"
+
+
+class _CaptureReader:
+    """逐条解析缓冲区中的 pcap / pcapng 记录；不完整的记录留待下次（pos 停在其开头）。"""
+
+    def __init__(self):
+        self.kind = None        # "pcap" / "pcapng"
+        self.endian = "<"
+        self.tick = 1e-6
+        self.linktype = 1
+        self.ifaces: List[tuple] = []  # pcapng：[(linktype, tick)]
+        self.frame = 0
+        self.pos = 0
+        self._ts = _TsFormat()
+
+    def _header(self, buf, pos: int) -> bool:
+        head = bytes(buf[pos:pos + 4])
+        if head in _PCAP_MAGIC:
+            if len(buf) - pos < 24:
+                return False
+            self.kind = "pcap"
+            self.endian, self.tick = _PCAP_MAGIC[head]
+            self.linktype = struct.unpack_from(self.endian + "I", buf, pos + 20)[0] & 0x0FFFFFFF
+            self.pos = pos + 24
+            return True
+        if head == _PCAPNG_SHB:
+            self.kind = "pcapng"
+            return True
+        if len(head) == 4:
+            raise ValueError("不是 pcap / pcapng 文件")
+        return False
+
+    def transactions(self, buf, base: int) -> Iterator[tuple]:
+        """产出 (帧序号, 记录偏移, 时间戳, C-APDU 十六进制, R-APDU 十六进制)。"""
+        if self.kind is None and not self._header(buf, self.pos):
+            return
+        if self.kind == "pcap":
+            records = self._pcap_records(buf)
+        else:
+            records = self._pcapng_records(buf)
+        for offset, t, linktype, data in records:
+            self.frame += 1
+            p = _udp_payload(linktype, data)
+            if p is None:
+                continue
+            apdu = _sim_apdu(p)
+            if apdu is None:
+                continue
+            parts = _split_apdu(apdu)
+            if parts is None:
+                continue
+            ts = self._ts(t) if t is not None else None
+            yield self.frame, base + offset, ts, bytes(parts[0]), bytes(parts[1])
+
+    def _pcap_records(self, buf):
+        rec = struct.Struct(self.endian + "IIII")
+        n = len(buf)
+        pos = self.pos
+        while pos + 16 <= n:
+            sec, frac, incl, _ = rec.unpack_from(buf, pos)
+            if pos + 16 + incl > n:
+                break
+            self.pos = pos + 16 + incl
+            yield pos, sec + frac * self.tick, self.linktype, buf[pos + 16:pos + 16 + incl]
+            pos = self.pos
+
+    def _pcapng_records(self, buf):
+        n = len(buf)
+        pos = self.pos
+        while pos + 12 <= n:
+            if bytes(buf[pos:pos + 4]) == _PCAPNG_SHB:
+                bom = struct.unpack_from("<I", buf, pos + 8)[0]
+                self.endian = "<" if bom == _PCAPNG_BOM else ">"
+                self.ifaces = []  # 新的 section：接口编号重新开始
+            e = self.endian
+            btype, blen = struct.unpack_from(e + "II", buf, pos)
+            if blen < 12 or pos + blen > n:
+                break
+            self.pos = pos + blen
+            if btype == _EPB and blen >= 32:
+                iface, hi, lo, caplen = struct.unpack_from(e + "IIII", buf, pos + 8)
+                linktype, tick = self.ifaces[iface] if iface < len(self.ifaces) else (1, 1e-6)
+                yield pos, ((hi << 32) | lo) * tick, linktype, buf[pos + 28:pos + 28 + min(caplen, blen - 32)]
+            elif btype == _SPB and blen >= 16:
+                linktype = self.ifaces[0][0] if self.ifaces else 1
+                yield pos, None, linktype, buf[pos + 12:pos + blen - 4]
+            elif btype == _IDB and blen >= 20:
+                self.ifaces.append((struct.unpack_from(e + "H", buf, pos + 8)[0], self._tsresol(buf, pos + 16, pos + blen - 4)))
+            pos = self.pos
+
+    def _tsresol(self, buf, opt: int, end: int) -> float:
+        e = self.endian
+        while opt + 4 <= end:
+            code, length = struct.unpack_from(e + "HH", buf, opt)
+            if code == 0:
+                break
+            if code == _OPT_TSRESOL and length >= 1:
+                v = buf[opt + 4]
+                return 2.0 ** -(v & 0x7F) if v & 0x80 else 10.0 ** -v
+            opt += 4 + ((length + 3) & ~3)
+        return 1e-6
+
+
+class PcapStream:
+    """与 MTKStream 相同的增量接口；用于文件对象、压缩抓包和跟随模式。"""
+
+    def __init__(self, max_gap: int = DEFAULT_MAX_GAP, source_file: str | None = None):
+        self._reader = _CaptureReader()
+        self._buf = b""
+        self._base = 0   # _buf[0] 在整个输入中的偏移
+        self._out = _reassembler(max_gap, source_file)
+
+    def feed(self, data) -> List[Message]:
+        buf = self._buf + data if self._buf else data
+        out = _push(self._reader.transactions(memoryview(buf), self._base), self._out)
+        consumed = self._reader.pos
+        self._buf = buf[consumed:]
+        self._base += consumed
+        self._reader.pos = 0
+        return out
+
+    def close(self) -> List[Message]:
+        return self._out.close()
+
+
+def _reassembler(max_gap: int, source_file: str | None) -> MTKStream:
+    stream = MTKStream(max_gap=max_gap, source_file=source_file)
+    stream.source = "pcap"
+    stream.position_key = "frame"
+    return stream
+
+
+def _push(transactions, stream: MTKStream) -> List[Message]:
+    out: List[Message] = []
+    for frame, offset, ts, tx, rx in transactions:
+        out.extend(stream.push_group(["tx", [tx], offset, frame, ts, stream.source_file]))
+        if rx:
+            out.extend(stream.push_group(["rx", [rx], offset, frame, ts, stream.source_file]))
+    return out
+
+
+class PcapExtractor:
+    version = 1
+
+    def __init__(self, chunk_size: int = DEFAULT_CHUNK_SIZE, max_gap: int = DEFAULT_MAX_GAP):
+        self.chunk_size = chunk_size
+        self.max_gap = max_gap
+
+    @property
+    def cache_key(self) -> str:
+        return f"pcap/{self.version}/{self.max_gap}"
+
+    def new_stream(self) -> PcapStream:
+        return PcapStream(self.max_gap)
+
+    def iter_messages(self, fileobj) -> Iterator[Message]:
+        stream = self.new_stream()
+        while True:
+            chunk = fileobj.read(self.chunk_size)
+            if not chunk:
+                break
+            yield from stream.feed(chunk)
+        yield from stream.close()
+
+    def iter_file(self, path: str) -> Iterator[Message]:
+        """未压缩的抓包直接 mmap 解析；压缩的走流式解压。"""
+        if detect_compression(path) is not None:
+            with open_binary(path) as f:
+                yield from self.iter_messages(f)
+            return
+        with open(path, "rb") as f:
+            try:
+                mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:  # 空文件
+                return
+        with mm:
+            view = memoryview(mm)
+            txs = _CaptureReader().transactions(view, 0)
+            stream = _reassembler(self.max_gap, None)
+            try:
+                for frame, offset, ts, tx, rx in txs:
+                    yield from stream.push_group(["tx", [tx], offset, frame, ts, None])
+                    if rx:
+                        yield from stream.push_group(["rx", [rx], offset, frame, ts, None])
+            except BaseException as e:
+                # 异常回溯里已结束的生成器帧仍引用着映射区的切片，清掉后 mmap 才能关闭，
+                # 否则 with 退出时的 BufferError 会掩盖原异常
+                traceback.clear_frames(e.__traceback__)
+                raise
+            finally:
+                txs.close()  # 释放对映射区的切片后才能关闭 mmap
+                view.release()
+            yield from stream.close()
@@ -0,0 +1,59 @@
+import os
+from typing import Optional
+
+from data_io.loaders import detect_compression, split_member
+
+DEFAULT_POLL_BYTES = 8 << 20  # 每次 poll 最多读取的新数据量
+
+
+class FileTail:
+    """跟随增长中的日志文件，每次 read_new() 只返回上次之后追加的字节。
+
+    文件被截断或替换（日志轮转，inode 变化）时从头重新读取，并通过
+    ``reset`` 标志告知调用方丢弃已有的解析状态。
+    """
+
+    def __init__(self, path: str):
+        if split_member(path)[1] is not None or detect_compression(path) is not None:
+            raise ValueError("跟随模式只支持未压缩的日志文件")
+        self.path = path
+        self.pos = 0
+        self.reset = False
+        self._f = None
+        self._ino = None
+
+    def _open(self):
+        self._f = open(self.path, "rb")
+        self._ino = os.fstat(self._f.fileno()).st_ino
+        self.pos = 0
+
+    def read_new(self, max_bytes: Optional[int] = DEFAULT_POLL_BYTES) -> bytes:
+        self.reset = False
+        if self._f is None:
+            self._open()
+        else:
+            try:
+                st = os.stat(self.path)
+            except OSError:
+                return b""  # 轮转过程中文件暂时不存在
+            if st.st_ino != self._ino or st.st_size < self.pos:
+                self._f.close()
+                self._open()
+                self.reset = True
+        self._f.seek(self.pos)
+        data = self._f.read(-1 if max_bytes is None else max_bytes)
+        self.pos += len(data)
+        return data
+
+    @property
+    def pending(self) -> bool:
+        """文件中是否还有未读取的数据（上次 poll 受 max_bytes 限制时）。"""
+        try:
+            return os.path.getsize(self.path) > self.pos
+        except OSError:
+            return False
+
+    def close(self):
+        if self._f is not None:
+            self._f.close()
+            self._f = None
@@ -1,4 +1,81 @@
+import os
+from typing import List, Optional, Tuple
+
+# 压缩格式按文件头魔数识别，与扩展名无关
+_MAGIC = (
+    (b"\x1f\x8b", "gzip"),
+    (b"\xfd7zXZ\x00", "xz"),
+    (b"BZh", "bz2"),
+    (b"PK\x03\x04", "zip"),
+)
+
+# "bundle.zip::logs/md1.txt" 形式指定 zip 内的成员
+MEMBER_SEP = "::"
+
+
+def split_member(path: str) -> Tuple[str, Optional[str]]:
+    """拆出 "archive.zip::member" 中的成员名；普通路径返回 (path, None)。"""
+    if MEMBER_SEP in path:
+        archive, member = path.split(MEMBER_SEP, 1)
+        return archive, member or None
+    return path, None
+
+
+def detect_compression(path: str) -> Optional[str]:
+    """返回 'gzip' / 'xz' / 'bz2' / 'zip'，未压缩返回 None。"""
+    path, _ = split_member(path)
+    with open(path, "rb") as f:
+        head = f.read(6)
+    for magic, kind in _MAGIC:
+        if head.startswith(magic):
+            return kind
+    return None
+
+
+def list_members(path: str) -> List[str]:
+    """zip 中的文件成员（不含目录）；其它格式返回空列表。"""
+    path, _ = split_member(path)
+    if detect_compression(path) != "zip":
+        return []
+    import zipfile
+    with zipfile.ZipFile(path) as zf:
+        return [i.filename for i in zf.infolist() if not i.is_dir()]
+
+
+def open_binary(path: str, member: Optional[str] = None):
+    """以二进制流打开日志，供提取器分块读取。
+
+    gzip/xz/bz2 以及 zip 成员边读边解压，不落临时文件也不整体读入内存。
+    zip 有多个成员时须通过 member 或 "archive.zip::member" 指定。
+    """
+    path, embedded = split_member(path)
+    member = member or embedded
+    kind = detect_compression(path)
+    # 解压模块只在遇到对应格式时才导入，不计入冷启动时间
+    if kind == "gzip":
+        import gzip
+        return gzip.open(path, "rb")
+    if kind == "xz":
+        import lzma
+        return lzma.open(path, "rb")
+    if kind == "bz2":
+        import bz2
+        return bz2.open(path, "rb")
+    if kind == "zip":
+        import zipfile
+        zf = zipfile.ZipFile(path)
+        try:
+            if member is None:
+                names = [i.filename for i in zf.infolist() if not i.is_dir()]
+                if len(names) != 1:
+                    raise ValueError(f"{os.path.basename(path)} 包含 {len(names)} 个文件，请指定成员: {names[:20]}")
+                member = names[0]
+            return zf.open(member)
+        finally:
+            zf.close()  # 成员流仍持有底层文件，关闭成员流时才真正关闭
+    return open(path, "rb")
+
 
 def load_text(path: str) -> str:
-    with open(path, "r", encoding="utf-8", errors="ignore") as f:
-        return f.read()
+    with open_binary(path) as f:
+        return f.read().decode("utf-8", errors="ignore")
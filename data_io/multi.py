@@ -0,0 +1,215 @@
+"""多文件输入：目录或通配符展开为一组日志，按日志时间戳 k 路归并。
+
+MTK 日志轮转（..._1.txt, ..._2.txt, ...）时一次 eSIM 下载常被拆在多个文件里。
+每个文件各自流式扫描出 APDU 组，用堆按时间戳归并成一个组序列，再送入同一个
+重组状态，因此跨文件的 E2 链也能续上。轮转可能切在一个组中间、或时间戳行与其组
+之间：文件开头的孤立后续行接回上一个文件末尾的组，开头的组沿用上一个文件末尾的
+时间戳，输出与未拆分的日志相同。每个文件同时只缓冲一个读取块的组（开头还没有
+时间戳的组另有上限），内存占用与文件大小、文件个数的乘积无关。
+"""
+import glob
+import heapq
+import os
+import re
+from itertools import chain
+from operator import itemgetter
+from typing import Callable, Iterable, Iterator, List, Tuple
+
+from core.models import Message
+from data_io.loaders import open_binary, split_member
+from data_io.extract_cache import CACHE_SUFFIX
+from data_io.extractors.mtk import MTKExtractor, TS_LOOKBACK
+from data_io.extractors.generic import GenericExtractor
+
+# 与 mtk.TS_RE 相同的格式，拆出各字段用于排序
+_TS_FIELDS = re.compile(
+    r'(?:(?P<y>\d{4})[-/])?(?:(?P<mo>\d{1,2})[-/](?P<d>\d{1,2})[ T]+)?'
+    r'(?P<h>\d{1,2}):(?P<mi>\d{2}):(?P<s>\d{2})(?:[.,](?P<f>\d{1,6}))?')
+
+_NO_TS = (-1,)
+_AFTER_ALL = (float("inf"),)  # 其后再没有时间戳：排在最后（都没有时间戳时即按文件顺序）
+_LEAD_BUFFER = 4096  # 文件开头最多缓冲这么多个无时间戳的组；再多就另读一遍找第一个时间戳
+
+
+def ts_key(ts: str | None) -> Tuple[int, ...]:
+    """日志时间戳 -> 可比较的元组；缺少的年/月日按 0 处理（视为同一天）。"""
+    if not ts:
+        return _NO_TS
+    m = _TS_FIELDS.search(ts)
+    if m is None:
+        return _NO_TS
+    y, mo, d, h, mi, s, f = m.group("y", "mo", "d", "h", "mi", "s", "f")
+    return (int(y or 0), int(mo or 0), int(d or 0), int(h), int(mi), int(s), int((f or "0").ljust(6, "0")))
+
+
+def _natural_key(path: str):
+    # md_log_2.txt 排在 md_log_10.txt 之前
+    return [int(t) if t.isdigit() else t.lower() for t in re.split(r'(\d+)', path)]
+
+
+def is_multi(spec: str) -> bool:
+    """spec 是目录或（不存在的路径中含）通配符。"""
+    path = split_member(spec)[0]
+    if os.path.isdir(path):
+        return True
+    return not os.path.exists(path) and glob.has_magic(spec)
+
+
+def expand_inputs(spec: str) -> List[str]:
+    """目录 -> 其中的文件；通配符 -> 匹配的文件；其它原样返回。按轮转序号自然排序。"""
+    if not is_multi(spec):
+        return [spec]
+    if os.path.isdir(spec):
+        names = [os.path.join(spec, n) for n in os.listdir(spec) if not n.startswith(".")]
+    else:
+        names = glob.glob(spec)
+    files = [p for p in names if os.path.isfile(p) and not p.endswith(CACHE_SUFFIX)]
+    if not files:
+        raise FileNotFoundError(f"没有匹配的日志文件: {spec}")
+    return sorted(files, key=_natural_key)
+
+
+def _first_key(items: Iterable, get_ts) -> Tuple[int, ...]:
+    for item in items:
+        k = ts_key(get_ts(item))
+        if k != _NO_TS:
+            return k
+    return _NO_TS
+
+
+def _keyed(items: Iterator, rescan: Callable[[], Iterator], get_ts, file_no: int,
+           next_key: Callable[[], Tuple[int, ...]]):
+    """给一个文件的组/消息序列加上归并键 (时间戳, 文件序号, 文件内序号)。
+
+    没有时间戳的沿用同文件上一个，保持文件内顺序。文件开头还没有时间戳的组（其时间戳
+    行在上一个轮转文件末尾）取其后出现的第一个时间戳（本文件没有时由 next_key() 给出
+    后面文件的）：排在上一个文件之后、本文件其余组之前。rescan() 重新打开本文件，开头
+    缓冲不下时用来找第一个时间戳。
+    """
+    lead = []
+    last = _NO_TS
+    for item in items:
+        lead.append(item)
+        last = ts_key(get_ts(item))
+        if last != _NO_TS or len(lead) >= _LEAD_BUFFER:
+            break
+    if last == _NO_TS and len(lead) >= _LEAD_BUFFER:
+        last = _first_key(rescan(), get_ts)
+    if last == _NO_TS:
+        last = next_key()
+    for seq, item in enumerate(chain(lead, items)):
+        k = ts_key(get_ts(item))
+        if k != _NO_TS:
+            last = k
+        yield (last, file_no, seq), item
+
+
+def _next_keys(open_file: Callable[[int], Iterator], get_ts, n: int) -> List[Callable[[], Tuple[int, ...]]]:
+    """第 i 个函数给出第 i 个文件之后各文件中的第一个时间戳键（按需各读一遍，结果共用）。"""
+    memo = {n: _AFTER_ALL}  # 文件序号 -> 从该文件起的第一个时间戳键
+
+    def first_from(i: int) -> Tuple[int, ...]:
+        skipped = []  # 没有时间戳的文件：结果同其后第一个有时间戳的文件
+        while i not in memo:
+            k = _first_key(open_file(i), get_ts)
+            if k != _NO_TS:
+                memo[i] = k
+                break
+            skipped.append(i)
+            i += 1
+        for j in skipped:
+            memo[j] = memo[i]
+        return memo[i]
+
+    return [lambda i=i: first_from(i + 1) for i in range(n)]
+
+
+def _mtk_groups(path: str, extractor: MTKExtractor, streams: List | None = None, file_no: int = 0) -> Iterator[list]:
+    """一个文件的组；给出 streams 时把所用的流登记在 streams[file_no]（合并时接上跨文件的内容）。"""
+    stream = extractor.new_stream(groups_only=True, source_file=path)
+    if streams is not None:
+        streams[file_no] = stream
+    with open_binary(path) as f:
+        while True:
+            chunk = f.read(extractor.chunk_size)
+            if not chunk:
+                break
+            stream.feed(chunk)
+            yield from stream.take_groups()
+    stream.close()
+    yield from stream.take_groups()
+
+
+def _tail_ts(streams: List, file_no: int):
+    """file_no 号及之前的文件末尾最近的时间戳 (时间戳, 距 file_no 号文件末尾的行数)；不够短的文件不往前找。"""
+    back = 0
+    for st in reversed(streams[:file_no + 1]):
+        if st is None or back >= TS_LOOKBACK:
+            break
+        if st.tail_ts is not None:
+            return st.tail_ts[0], st.tail_ts[1] + back
+        back += st.line_count
+    return None
+
+
+def _attach_leads(prev: list, prev_file: int, file_no: int, streams: List):
+    """轮转切在组中间：prev（prev_file 号文件末尾未结束的组）接上其后各文件开头的孤立后续行。"""
+    if prev is not streams[prev_file].eof_group:
+        return
+    for st in streams[prev_file + 1:file_no + 1]:
+        if st.lead is None or st.lead[0] != prev[0]:
+            break
+        prev[1].extend(st.lead[1])
+        st.lead = None
+        if not st.lead_only:  # 整个文件都是后续行时组还会延续到下一个文件
+            break
+
+
+def _inherit_ts(grp: list, file_no: int, streams: List):
+    """文件开头几行里没有时间戳的组，按单个文件时的向前查找范围沿用之前文件末尾的时间戳。"""
+    tail = _tail_ts(streams, file_no - 1)
+    if tail is not None and tail[1] + grp[3] - 1 <= TS_LOOKBACK:
+        grp[4] = tail[0]
+
+
+def iter_merged_mtk(paths: List[str], extractor: MTKExtractor) -> Iterator[Message]:
+    streams: List = [None] * len(paths)
+    get_ts = itemgetter(4)
+    next_keys = _next_keys(lambda i: _mtk_groups(paths[i], extractor), get_ts, len(paths))
+    feeds = [_keyed(_mtk_groups(p, extractor, streams, i), lambda p=p: _mtk_groups(p, extractor), get_ts, i,
+                    next_keys[i])
+             for i, p in enumerate(paths)]
+    stream = extractor.new_stream()
+    prev, prev_file = None, 0  # 上一个组晚一步送出，以便接上其后文件开头的后半段
+    for (_, file_no, _), grp in heapq.merge(*feeds, key=lambda kv: kv[0]):
+        if file_no > 0 and grp[4] is None and grp[3] <= TS_LOOKBACK:
+            _inherit_ts(grp, file_no, streams)
+        if prev is not None:
+            if file_no > prev_file:
+                _attach_leads(prev, prev_file, file_no, streams)
+            yield from stream.push_group(prev)
+        prev, prev_file = grp, file_no
+    if prev is not None:
+        _attach_leads(prev, prev_file, len(paths) - 1, streams)
+        yield from stream.push_group(prev)
+    yield from stream.close()
+
+
+def _meta_ts(m: Message):
+    return m.meta.get("ts")
+
+
+def _generic_messages(path: str, extractor: GenericExtractor) -> Iterator[Message]:
+    with open_binary(path) as f:
+        for m in extractor.iter_messages(f):
+            m.meta["file"] = path
+            yield m
+
+
+def iter_merged_generic(paths: List[str], extractor: GenericExtractor) -> Iterator[Message]:
+    next_keys = _next_keys(lambda i: _generic_messages(paths[i], extractor), _meta_ts, len(paths))
+    feeds = [_keyed(_generic_messages(p, extractor), lambda p=p: _generic_messages(p, extractor), _meta_ts, i,
+                    next_keys[i])
+             for i, p in enumerate(paths)]
+    for _, m in heapq.merge(*feeds, key=lambda kv: kv[0]):
+        yield m
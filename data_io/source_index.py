@@ -0,0 +1,76 @@
+"""来源位置索引：每条消息在原始日志中的 (偏移, 行号)。
+
+按消息序号存成两列紧凑数组（每条 12 字节），一次 seek() 即可读出原文上下文。
+偏移和行号来自消息 meta，随提取缓存（"<日志>.apdc"）一起保存，重开日志时不必重新扫描。
+"""
+import array
+import os
+from typing import Iterable, List, Optional, Tuple
+
+from core.models import Message
+from data_io.loaders import open_binary, split_member
+
+_MAX_LINE = 4096                 # 读取上下文时按每行最多这么多字节预估读取范围
+
+
+def index_path(path: str, suffix: str) -> str:
+    """旁路文件路径；zip 成员的旁路文件放在压缩包旁，以成员名区分。"""
+    archive, member = split_member(path)
+    if member:
+        return f"{archive}.{member.replace('/', '_').replace(os.sep, '_')}{suffix}"
+    return archive + suffix
+
+
+def stamp(path: str) -> Tuple[int, int]:
+    st = os.stat(split_member(path)[0])
+    return st.st_size, st.st_mtime_ns
+
+
+class SourceIndex:
+    def __init__(self, offsets: Optional[array.array] = None, lines: Optional[array.array] = None):
+        self.offsets = offsets if offsets is not None else array.array("q")
+        self.lines = lines if lines is not None else array.array("i")
+
+    @classmethod
+    def from_messages(cls, messages: Iterable[Message]) -> "SourceIndex":
+        idx = cls()
+        for m in messages:
+            idx.add(m)
+        return idx
+
+    def add(self, msg: Message):
+        # 没有来源位置的消息（如直接解析文本）记为 -1，保持序号对齐
+        self.offsets.append(msg.meta.get("offset", -1))
+        self.lines.append(msg.meta.get("line", -1))
+
+    def __len__(self) -> int:
+        return len(self.offsets)
+
+    def position(self, i: int) -> Tuple[int, int]:
+        """第 i 条消息的 (偏移, 行号)；未知为 -1。"""
+        return self.offsets[i], self.lines[i]
+
+    def context(self, path: str, i: int, before: int = 5, after: int = 20) -> Tuple[List[str], int]:
+        offset = self.offsets[i]
+        if offset < 0:
+            return [], -1
+        return read_context(path, offset, before, after)
+
+
+def read_context(path: str, offset: int, before: int = 5, after: int = 20) -> Tuple[List[str], int]:
+    """读取 offset 所在行前 before 行、后 after 行的原文。
+
+    返回 (行列表, 目标行在列表中的下标)。压缩日志同样适用（解压流上 seek）。
+    """
+    lo = max(0, offset - before * _MAX_LINE)
+    with open_binary(path) as f:
+        f.seek(lo)
+        buf = f.read(offset - lo + (after + 1) * _MAX_LINE)
+    pre = buf[:offset - lo].split(b"\n")
+    pre.pop()  # offset 位于行首，最后一段为空
+    if lo > 0 and pre:
+        pre.pop(0)  # 起点落在行中间，丢弃不完整的首行
+    pre = pre[-before:] if before > 0 else []
+    post = buf[offset - lo:].split(b"\n")[:after + 1]
+    lines = [ln.decode("utf-8", errors="ignore").rstrip("\r") for ln in pre + post]
+    return lines, len(pre)
@@ -3,85 +3,104 @@ from typing import Optional
 from core.models import Message, ParseResult, MsgType, ParseNode, Apdu
 from core.utils import parse_apdu_header
 from core.tlv import parse_ber_tlvs
-from core.registry import resolve
+from core.registry import handler
+from classify.rules import Route, route_message
+from parsers.esim.schema import decode_container
 
 class IParser:
-    def parse(self, msg: Message) -> ParseResult:
+    def parse(self, msg: Message, hdr: Optional[Apdu] = None, route: Optional[Route] = None) -> ParseResult:
+        """hdr / route come from classify.rules.route_message; computed here when not given."""
         raise NotImplementedError
 
+
+def _routed(msg: Message, hdr: Optional[Apdu], route: Optional[Route]):
+    if route is None:
+        route, hdr = route_message(msg)
+    elif hdr is None:
+        hdr = parse_apdu_header(msg.data)
+    return hdr, route
+
+
+_PLAIN_PROACTIVE = {"TERMINAL_PROFILE": "TERMINAL PROFILE (80 10)", "FETCH": "FETCH (80 12)"}
+_FALLBACK_NAMES = {"D0": "Proactive UICC (D0)", "TERMINAL_RESPONSE": "TERMINAL RESPONSE (80 14)",
+                   "ENVELOPE": "ENVELOPE (80 C2)"}
+
+
+def _proactive_payload(data: bytes, key: str) -> Optional[bytes]:
+    """Comprehension-TLV payload handed to the handler; None for commands without one."""
+    if key == "D0":
+        # UICC => TERMINAL: D0 command
+        payload = data[1:]  # Remove D0 prefix
+        if len(payload) >= 1:
+            length, skip = payload[0], 1
+            if length == 0x81 and len(payload) >= 2:  # long form: 81 xx
+                length, skip = payload[1], 2
+            payload = payload[skip:skip + length]  # Extract actual payload (may be truncated in the log)
+        return payload
+    if key in ("TERMINAL_RESPONSE", "ENVELOPE"):
+        return data[5:]  # Skip APDU header
+    # Other proactive commands (TERMINAL PROFILE, FETCH, etc.)
+    return None
+
+
 class ProactiveParser(IParser):
-    def parse(self, msg: Message) -> ParseResult:
-        hdr = parse_apdu_header(msg.raw)
+    def parse(self, msg: Message, hdr: Optional[Apdu] = None, route: Optional[Route] = None) -> ParseResult:
+        hdr, route = _routed(msg, hdr, route)
         direction = "TERMINAL=>UICC" if hdr.cla == 0x80 else "UICC=>TERMINAL"
-        
-        # Determine the command type and extract payload
-        if msg.raw.startswith("D0"):
-            # UICC => TERMINAL: D0 command
-            payload = msg.raw[2:]  # Remove D0 prefix
-            if len(payload) >= 2:
-                length = int(payload[:2], 16)
-                if len(payload) >= 2 + 2 * length:
-                    payload = payload[2:2 + 2 * length]  # Extract actual payload
-            handler_cls = resolve(MsgType.PROACTIVE, "D0")
-            if handler_cls:
-                handler = handler_cls()
-                root = handler.build(payload, direction)
-            else:
-                root = ParseNode(name="Proactive UICC (D0)", value=msg.raw)
-        elif hdr.cla == 0x80 and hdr.ins == 0x14:
-            # TERMINAL RESPONSE
-            payload = msg.raw[10:] if len(msg.raw) > 10 else ""  # Skip APDU header
-            handler_cls = resolve(MsgType.PROACTIVE, "TERMINAL_RESPONSE")
-            if handler_cls:
-                handler = handler_cls()
-                root = handler.build(payload, direction)
-            else:
-                root = ParseNode(name="TERMINAL RESPONSE (80 14)", value=msg.raw)
-        elif hdr.cla == 0x80 and hdr.ins == 0xC2:
-            # ENVELOPE
-            payload = msg.raw[10:] if len(msg.raw) > 10 else ""  # Skip APDU header
-            handler_cls = resolve(MsgType.PROACTIVE, "ENVELOPE")
-            if handler_cls:
-                handler = handler_cls()
-                root = handler.build(payload, direction)
-            else:
-                root = ParseNode(name="ENVELOPE (80 C2)", value=msg.raw)
+        key = route.key
+        payload = _proactive_payload(msg.data, key)
+        h = handler(MsgType.PROACTIVE, key) if payload is not None else None
+        if h is not None:
+            root = h.build(payload, direction)
+        elif payload is not None:
+            root = ParseNode(name=_FALLBACK_NAMES[key], value=msg.raw)
         else:
-            # Other proactive commands (TERMINAL PROFILE, FETCH, etc.)
-            name = "Proactive"
-            if hdr.cla == 0x80 and hdr.ins == 0x10: name = "TERMINAL PROFILE (80 10)"
-            elif hdr.cla == 0x80 and hdr.ins == 0x12: name = "FETCH (80 12)"
-            root = ParseNode(name=name, value=msg.raw)
-        
+            root = ParseNode(name=_PLAIN_PROACTIVE.get(key, "Proactive"), value=msg.raw)
+
         # Use the detailed title from the parsed root node
         detailed_title = root.name
         return ParseResult(msg_type=MsgType.PROACTIVE, message=msg, apdu=hdr, root=root,
                            title=detailed_title, direction_hint=direction)
 
-from parsers.esim import *  # ensure registration
-from parsers.proactive import *  # ensure registration
+    def title(self, msg: Message, hdr: Optional[Apdu] = None, route: Optional[Route] = None) -> str:
+        """parse(...).title without building the tree (deferred parsing); handlers may offer title()."""
+        hdr, route = _routed(msg, hdr, route)
+        key = route.key
+        payload = _proactive_payload(msg.data, key)
+        h = handler(MsgType.PROACTIVE, key) if payload is not None else None
+        if h is not None:
+            direction = "TERMINAL=>UICC" if hdr.cla == 0x80 else "UICC=>TERMINAL"
+            if hasattr(h, "title"):
+                return h.title(payload, direction)
+            return h.build(payload, direction).name
+        if payload is not None:
+            return _FALLBACK_NAMES[key]
+        return _PLAIN_PROACTIVE.get(key, "Proactive")
 
 class EsimParser(IParser):
-    def parse(self, msg: Message) -> ParseResult:
-        hdr = parse_apdu_header(msg.raw)
-        direction = "ESIM=>LPA" if msg.raw.startswith("BF") else "LPA=>ESIM"
+    def parse(self, msg: Message, hdr: Optional[Apdu] = None, route: Optional[Route] = None) -> ParseResult:
+        hdr, route = _routed(msg, hdr, route)
+        body = msg.data
+        direction = "ESIM=>LPA" if body[:1] == b"\xBF" else "LPA=>ESIM"
         # Compute body & top-level tag
-        body = msg.raw
-        if hdr and hdr.ins == 0xE2 and len(body) >= 10:
-            body = body[10:]  # strip 5-byte header
+        if hdr.ins == 0xE2 and len(body) >= 5:
+            body = body[5:]  # strip 5-byte header
         tlvs = parse_ber_tlvs(body)
         root = ParseNode(name="eSIM")
         if tlvs:
             top = tlvs[0]
-            handler_cls = resolve(MsgType.ESIM, top.tag)
-            if handler_cls:
-                handler = handler_cls()
-                root = handler.build(top.value_hex, direction)
+            # the route already names the container (first tag of the response / after the E2 header)
+            key = route.key if route.msg_type is MsgType.ESIM and route.key else top.tag
+            h = handler(MsgType.ESIM, key)
+            if h is not None:
+                root = h.build(top.value, direction)
             else:
-                # default: list TLVs
+                root = decode_container(top.tag, top.value, direction)
+            if root is None:
+                # no handler and no rsp.asn type: list TLVs
                 root = ParseNode(name=f"Unknown eSIM container {top.tag}")
                 for t in tlvs:
-                    root.children.append(ParseNode(name=f"TLV {t.tag}", value=f"len={t.length}", hint=t.value_hex[:120]))
+                    root.children.append(ParseNode(name=f"TLV {t.tag}", value=f"len={t.length}", hint=t.hex_head(120)))
         else:
             root = ParseNode(name="eSIM (empty)")
         return ParseResult(msg_type=MsgType.ESIM, message=msg, apdu=hdr, root=root,
@@ -89,8 +108,9 @@ class EsimParser(IParser):
 
 
 class NormalSimParser(IParser):
-    def parse(self, msg: Message) -> ParseResult:
-        hdr = parse_apdu_header(msg.raw)
+    def parse(self, msg: Message, hdr: Optional[Apdu] = None, route: Optional[Route] = None) -> ParseResult:
+        if hdr is None:
+            hdr = parse_apdu_header(msg.data)
         name = f"SIM APDU INS={hdr.ins:02X}" if hdr.ins is not None else "SIM APDU"
         root = ParseNode(name=name, value=msg.raw)
         return ParseResult(msg_type=MsgType.NORMAL_SIM, message=msg, apdu=hdr, root=root,
@@ -1 +1 @@
-from .tlvs import parse_bf2d, parse_bf22, parse_bf37, parse_bf2e, parse_bf31, parse_bf32, parse_bf38,parse_bf28  # noqa
+# 处理器模块不在这里导入：core.registry 按清单在标签第一次被解析时导入
@@ -0,0 +1,73 @@
+"""按 SGP.22 ASN.1 定义（仓库根目录的 rsp.asn）通用解码 eSIM 容器。
+
+没有手写解析器的 BFxx 标签由 EsimParser 交给 decode_container()：先按标签和方向选出
+请求/响应类型，再由 core.asn1 编译出的解码表逐字段解码。编译结果缓存在磁盘上
+（见 core.asn1.load_schema），首次用到时才加载。
+"""
+import os
+import re
+from typing import Dict, List, Optional, Tuple
+
+from core.asn1 import Asn1Schema, load_schema
+from core.models import ParseNode
+from core.tlv import TlvInput
+
+RSP_ASN = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "rsp.asn")
+
+# 按类型名指定的显示格式（其余 OCTET STRING 显示十六进制）
+FORMATS = {"Iccid": "iccid", "VersionType": "version"}
+
+_ES_SUFFIX = re.compile(r"Es\d+$")  # ES9+/ES11 上的同名变体，不在 LPA 与 eUICC 之间传递
+
+_schema: Optional[Asn1Schema] = None
+_tops: Optional[Dict[str, Tuple[str, str]]] = None  # 标签 -> (请求方向类型, 响应方向类型)
+
+
+def rsp_schema() -> Optional[Asn1Schema]:
+    """加载（并缓存）rsp.asn 的解码表；文件缺失或无法解析时返回 None。"""
+    global _schema, _tops
+    if _tops is None:
+        try:
+            _schema = load_schema(RSP_ASN, FORMATS)
+        except (OSError, ValueError):
+            _schema = None
+        _tops = {} if _schema is None else _top_types(_schema)
+    return _schema
+
+
+def _pick(names: List[str], want: str, other: str) -> str:
+    """优先名称以 want 结尾的类型，其次名称中不含 other 的（如 EUICCInfo1、
+    ProfileInstallationResult）；同等时 ES9+/ES11 变体靠后，再按定义顺序。"""
+    def rank(name: str):
+        base = _ES_SUFFIX.sub("", name)
+        return (0 if base.endswith(want) else 2 if other in base else 1, base != name)
+
+    return min(names, key=rank)
+
+
+def _top_types(schema: Asn1Schema) -> Dict[str, Tuple[str, str]]:
+    """双字节上下文标签（BFxx / 9Fxx）-> 两个方向上以此为外层标签的类型。"""
+    by_tag: Dict[str, List[str]] = {}
+    for name, (tags, _, choice) in schema.types.items():
+        if not choice and len(tags) == 1 and len(tags[0]) == 4 and tags[0][:2] in ("BF", "9F"):
+            by_tag.setdefault(tags[0], []).append(name)
+    return {tag: (_pick(names, "Request", "Response"), _pick(names, "Response", "Request"))
+            for tag, names in by_tag.items()}
+
+
+def top_type(tag: str, direction: str) -> Optional[str]:
+    """tag 在该方向（"LPA=>ESIM"/"tx" 为请求）上对应的 rsp.asn 类型名。"""
+    if _tops is None:
+        rsp_schema()
+    pair = _tops.get(tag)
+    if pair is None:
+        return None
+    return pair[0] if (direction or "").lower() in ("lpa=>esim", "tx") else pair[1]
+
+
+def decode_container(tag: str, payload: TlvInput, direction: str) -> Optional[ParseNode]:
+    """按 rsp.asn 解码标签为 tag 的容器内容；没有对应类型时返回 None。"""
+    name = top_type(tag, direction)
+    if name is None:
+        return None
+    return _schema.decode(name, tag, payload, name=f"{tag}: {name}")
@@ -1,6 +1,6 @@
 from core.models import MsgType, ParseNode
 from core.registry import register
-from core.tlv import parse_ber_tlvs
+from core.tlv import TlvInput, parse_ber_tlvs
 
 def _parse_bitstring(hexv: str, names):
     # First octet = number of unused bits
@@ -20,9 +20,9 @@ def _parse_bitstring(hexv: str, names):
 @register(MsgType.ESIM, "BF22")
 class BF22Parser:
     """GetEuiccInfo2"""
-    def build(self, payload_hex: str, direction: str) -> ParseNode:
+    def build(self, payload: TlvInput, direction: str) -> ParseNode:
         root = ParseNode(name="BF22: GetEuiccInfo2")
-        tlvs = parse_ber_tlvs(payload_hex)
+        tlvs = parse_ber_tlvs(payload)
         for t in tlvs:
             if t.tag == "81":
                 root.children.append(ParseNode(name="baseProfilePackageVersion", value=t.value_hex))
@@ -32,7 +32,7 @@ class BF22Parser:
                 root.children.append(ParseNode(name="euiccFirmwareVersion", value=t.value_hex))
             elif t.tag == "84":
                 grp = ParseNode(name="extCardResource")
-                for st in parse_ber_tlvs(t.value_hex):
+                for st in parse_ber_tlvs(t.value):
                     if st.tag == "81":
                         grp.children.append(ParseNode(name="Number of installed application", value=st.value_hex))
                     elif st.tag == "82":
@@ -83,7 +83,7 @@ class BF22Parser:
                 root.children.append(ParseNode(name="ppVersion", value=t.value_hex))
             elif t.tag == "94":  # sasAcreditationNumber (常见为 [20] -> 0x94)
                 try:
-                    root.children.append(ParseNode(name="sasAcreditationNumber", value=bytes.fromhex(t.value_hex).decode('utf-8')))
+                    root.children.append(ParseNode(name="sasAcreditationNumber", value=bytes(t.value).decode('utf-8')))
                 except Exception:
                     root.children.append(ParseNode(name="sasAcreditationNumber", value=t.value_hex))
 
@@ -104,13 +104,13 @@ class BF22Parser:
                 root.children.append(grp)
             elif t.tag == "8E":  # treProductReference [14] UTF8String
                 try:
-                    root.children.append(ParseNode(name="treProductReference", value=bytes.fromhex(t.value_hex).decode('utf-8')))
+                    root.children.append(ParseNode(name="treProductReference", value=bytes(t.value).decode('utf-8')))
                 except Exception:
                     root.children.append(ParseNode(name="treProductReference", value=t.value_hex))
             elif t.tag == "AF":  # additionalProfilePackageVersions [15] SEQUENCE OF VersionType
                 grp = ParseNode(name="additionalProfilePackageVersions")
                 # 轻量把内部 VersionType(通常为通用 04)逐项列出
-                for vt in parse_ber_tlvs(t.value_hex):
+                for vt in parse_ber_tlvs(t.value):
                     if vt.tag == "04":  # OCTET STRING (SIZE(3))
                         grp.children.append(ParseNode(name="VersionType", value=vt.value_hex))
                     else:
@@ -132,20 +132,20 @@ class BF22Parser:
             # --------- 兼容兜底（保留你的原逻辑） ---------
             elif t.tag == "0C":  # UNIVERSAL UTF8String（历史/非规范编码兜底）
                 try:
-                    root.children.append(ParseNode(name="sasAcreditationNumber", value=bytes.fromhex(t.value_hex).decode('utf-8')))
+                    root.children.append(ParseNode(name="sasAcreditationNumber", value=bytes(t.value).decode('utf-8')))
                 except Exception:
                     root.children.append(ParseNode(name="sasAcreditationNumber", value=t.value_hex))
             elif t.tag == "AC":
                 grp = ParseNode(name="certificationDataObject")
-                for st in parse_ber_tlvs(t.value_hex):
+                for st in parse_ber_tlvs(t.value):
                     if st.tag == "80":
                         try:
-                            grp.children.append(ParseNode(name="platformLabel", value=bytes.fromhex(st.value_hex).decode('utf-8')))
+                            grp.children.append(ParseNode(name="platformLabel", value=bytes(st.value).decode('utf-8')))
                         except Exception:
                             grp.children.append(ParseNode(name="platformLabel", value=st.value_hex))
                     elif st.tag == "81":
                         try:
-                            grp.children.append(ParseNode(name="discoveryBaseURL", value=bytes.fromhex(st.value_hex).decode('utf-8')))
+                            grp.children.append(ParseNode(name="discoveryBaseURL", value=bytes(st.value).decode('utf-8')))
                         except Exception:
                             grp.children.append(ParseNode(name="discoveryBaseURL", value=st.value_hex))
                     else:
@@ -154,14 +154,14 @@ class BF22Parser:
             elif t.tag == "04":  # UNIVERSAL OCTET STRING（历史/非规范编码兜底）
                 root.children.append(ParseNode(name="ppVersion", value=t.value_hex))
             else:
-                root.children.append(ParseNode(name=f"TLV {t.tag}", value=f"len={t.length}", hint=t.value_hex[:120]))
+                root.children.append(ParseNode(name=f"TLV {t.tag}", value=f"len={t.length}", hint=t.hex_head(120)))
         return root
 
 @register(MsgType.ESIM, "BF20")
 class BF20Parser(BF22Parser):
     """GetEuiccInfo1 - 复用BF22的解析逻辑"""
-    def build(self, payload_hex: str, direction: str) -> ParseNode:
+    def build(self, payload: TlvInput, direction: str) -> ParseNode:
         # 调用父类的build方法，但修改根节点名称为BF20
-        root = super().build(payload_hex, direction)
+        root = super().build(payload, direction)
         root.name = "BF20: GetEuiccInfo1"
         return root
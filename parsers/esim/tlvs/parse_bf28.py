@@ -1,6 +1,8 @@
-from core.models import MsgType, ParseNode
+from functools import partial
+
+from core.models import MsgType, ParseNode, LazyParseNode
 from core.registry import register
-from core.tlv import parse_ber_tlvs
+from core.tlv import TlvInput, parse_ber_tlvs
 from core.utils import parse_iccid, hex_to_utf8
 
 def _parse_notification_event(bitstring_hex: str) -> list[tuple[str, str]]:
@@ -49,10 +51,10 @@ def _parse_notification_event(bitstring_hex: str) -> list[tuple[str, str]]:
     
     return events
 
-def _parse_notification_metadata(metadata_hex: str) -> ParseNode:
+def _parse_notification_metadata(data: TlvInput) -> ParseNode:
     """解析单个NotificationMetadata结构"""
     metadata = ParseNode(name="NotificationMetadata")
-    tlvs = parse_ber_tlvs(metadata_hex)
+    tlvs = parse_ber_tlvs(data)
     
     for t in tlvs:
         if t.tag == "80":  # seqNumber [0] INTEGER
@@ -74,7 +76,7 @@ def _parse_notification_metadata(metadata_hex: str) -> ParseNode:
         
         elif t.tag == "0C":  # notificationAddress UTF8String
             try:
-                address = bytes.fromhex(t.value_hex).decode('utf-8')
+                address = bytes(t.value).decode('utf-8')
                 metadata.children.append(ParseNode(name="notificationAddress", value=address))
             except Exception:
                 metadata.children.append(ParseNode(name="notificationAddress", value=t.value_hex))
@@ -86,28 +88,28 @@ def _parse_notification_metadata(metadata_hex: str) -> ParseNode:
         else:
             # 尝试解析为UTF8字符串
             try:
-                text = bytes.fromhex(t.value_hex).decode('utf-8')
+                text = bytes(t.value).decode('utf-8')
                 metadata.children.append(ParseNode(name=f"Field {t.tag}", value=text))
             except Exception:
-                metadata.children.append(ParseNode(name=f"Field {t.tag}", value=f"len={t.length}", hint=t.value_hex[:120]))
+                metadata.children.append(ParseNode(name=f"Field {t.tag}", value=f"len={t.length}", hint=t.hex_head(120)))
     
     return metadata
 
 @register(MsgType.ESIM, "BF28")
 class BF28Parser:
     """ListNotificationRequest/Response - 通知列表查询"""
-    def build(self, payload_hex: str, direction: str) -> ParseNode:
+    def build(self, payload: TlvInput, direction: str) -> ParseNode:
         # 根据方向判断是请求还是响应
         dir_norm = (direction or "").lower()
         if dir_norm in ("lpa=>esim", "tx"):
-            return self._parse_request(payload_hex)
+            return self._parse_request(payload)
         else:
-            return self._parse_response(payload_hex)
+            return self._parse_response(payload)
 
-    def _parse_request(self, payload_hex: str) -> ParseNode:
+    def _parse_request(self, payload: TlvInput) -> ParseNode:
         """解析ListNotificationRequest"""
         root = ParseNode(name="BF28: ListNotificationRequest")
-        tlvs = parse_ber_tlvs(payload_hex)
+        tlvs = parse_ber_tlvs(payload)
         
         for t in tlvs:
             if t.tag == "81":  # profileManagementOperation [1] NotificationEvent (AUTOMATIC TAGS [1] -> 81)
@@ -131,7 +133,7 @@ class BF28Parser:
                 root.children.append(op_node)
             
             else:
-                root.children.append(ParseNode(name=f"TLV {t.tag}", value=f"len={t.length}", hint=t.value_hex[:120]))
+                root.children.append(ParseNode(name=f"TLV {t.tag}", value=f"len={t.length}", hint=t.hex_head(120)))
         
         # 如果没有TLV，说明是默认请求（返回所有通知）
         if not root.children:
@@ -139,10 +141,10 @@ class BF28Parser:
         
         return root
 
-    def _parse_response(self, payload_hex: str) -> ParseNode:
+    def _parse_response(self, payload: TlvInput) -> ParseNode:
         """解析ListNotificationResponse - CHOICE结构"""
         root = ParseNode(name="BF28: ListNotificationResponse")
-        tlvs = parse_ber_tlvs(payload_hex)
+        tlvs = parse_ber_tlvs(payload)
 
         # 聚合一个 metadata list，兼容两种结构：
         # 1) A0( [0] notificationMetadataList ) 下多条 BF2F
@@ -153,28 +155,19 @@ class BF28Parser:
             if t.tag == "A0":  # [0] notificationMetadataList
                 if metadata_list is None:
                     metadata_list = ParseNode(name="notificationMetadataList")
-                inner_tlvs = parse_ber_tlvs(t.value_hex)
+                inner_tlvs = parse_ber_tlvs(t.value)
                 for inner_t in inner_tlvs:
-                    if inner_t.tag == "BF2F":  # 单条 NotificationMetadata
-                        md = _parse_notification_metadata(inner_t.value_hex)
-                        md.name = f"NotificationMetadata {len(metadata_list.children)+1}"
-                        # 规范校验：Only one bit SHALL be set to 1
-                        self._check_single_bit_rule(md)
-                        metadata_list.children.append(md)
-                    else:
-                        # 兼容性兜底：尝试按一条 Metadata 解
-                        md = _parse_notification_metadata(inner_t.value_hex)
-                        md.name = f"NotificationMetadata {len(metadata_list.children)+1}"
-                        self._check_single_bit_rule(md)
-                        metadata_list.children.append(md)
+                    # 单条 NotificationMetadata（BF2F）；其它标签作为兼容性兜底，也尝试按一条 Metadata 解
+                    metadata_list.children.append(LazyParseNode(
+                        f"NotificationMetadata {len(metadata_list.children)+1}",
+                        partial(self._checked_metadata, inner_t.value)))
 
             elif t.tag == "BF2F":  # 顶层直接出现单条 NotificationMetadata（一些实现可能这样发）
                 if metadata_list is None:
                     metadata_list = ParseNode(name="notificationMetadataList")
-                md = _parse_notification_metadata(t.value_hex)
-                md.name = f"NotificationMetadata {len(metadata_list.children)+1}"
-                self._check_single_bit_rule(md)
-                metadata_list.children.append(md)
+                metadata_list.children.append(LazyParseNode(
+                    f"NotificationMetadata {len(metadata_list.children)+1}",
+                    partial(self._checked_metadata, t.value)))
 
             elif t.tag in ("81", "02"):  # [1] listNotificationsResultError（ctx-specific）或 UNIVERSAL INTEGER
                 try:
@@ -199,7 +192,7 @@ class BF28Parser:
                 root.children.append(ParseNode(
                     name=f"TLV {t.tag}",
                     value=f"len={t.length}",
-                    hint=t.value_hex[:120]
+                    hint=t.hex_head(120)
                 ))
 
         if metadata_list is not None:
@@ -207,6 +200,12 @@ class BF28Parser:
 
         return root
 
+    def _checked_metadata(self, data: TlvInput) -> ParseNode:
+        md = _parse_notification_metadata(data)
+        # 规范校验：Only one bit SHALL be set to 1
+        self._check_single_bit_rule(md)
+        return md
+
     # 新增的私有方法：不改已有函数名/变量名
     def _check_single_bit_rule(self, metadata_node: ParseNode) -> None:
         """规范校验：profileManagementOperation 中应当只有一个 Requested"""
@@ -1,12 +1,14 @@
 
-from core.models import MsgType, ParseNode
+from functools import partial
+
+from core.models import MsgType, ParseNode, LazyParseNode
 from core.registry import register
-from core.tlv import parse_ber_tlvs
+from core.tlv import TlvInput, as_buffer, parse_ber_tlvs
 from core.utils import parse_iccid, hex_to_utf8
 
-def _build_profile_block(e3_hex: str) -> ParseNode:
+def _build_profile_block(e3: TlvInput) -> ParseNode:
     prof = ParseNode(name="Profile")
-    for st in parse_ber_tlvs(e3_hex):
+    for st in parse_ber_tlvs(e3):
         name = st.tag
         val = st.value_hex
         if st.tag == "5A":
@@ -26,29 +28,25 @@ def _build_profile_block(e3_hex: str) -> ParseNode:
         prof.children.append(ParseNode(name=name, value=val))
     return prof
 
-def _try_response_profiles(hexv: str) -> ParseNode|None:
+def _try_response_profiles(data: TlvInput) -> ParseNode|None:
     # Look for profiles under E3, possibly wrapped by A0/A1 etc.
     # Depth 0
-    tlvs = parse_ber_tlvs(hexv)
+    tlvs = parse_ber_tlvs(data)
     e3_blocks = [t for t in tlvs if t.tag == "E3"]
     if e3_blocks:
         root = ParseNode(name="BF2D: Profile Info List")
         for i, t in enumerate(e3_blocks, 1):
-            prof = _build_profile_block(t.value_hex)
-            prof.name = f"Profile {i}"
-            root.children.append(prof)
+            root.children.append(LazyParseNode(f"Profile {i}", partial(_build_profile_block, t.value)))
         return root
     # Depth 1 containers
     for t in tlvs:
         if t.tag in ("A0","A1","E0","E1","61","30"):
-            inner = parse_ber_tlvs(t.value_hex)
+            inner = parse_ber_tlvs(t.value)
             e3_blocks = [x for x in inner if x.tag == "E3"]
             if e3_blocks:
                 root = ParseNode(name="BF2D: Profile Info List")
                 for i, x in enumerate(e3_blocks, 1):
-                    prof = _build_profile_block(x.value_hex)
-                    prof.name = f"Profile {i}"
-                    root.children.append(prof)
+                    root.children.append(LazyParseNode(f"Profile {i}", partial(_build_profile_block, x.value)))
                 return root
     return None
 
@@ -87,15 +85,15 @@ def _decode_taglist_hex(taglist_hex: str):
 
 @register(MsgType.ESIM, "BF2D")
 class BF2DParser:
-    def build(self, payload_hex: str, direction: str) -> ParseNode:
+    def build(self, payload: TlvInput, direction: str) -> ParseNode:
         # Try response style first (E3 profile blocks)
-        resp = _try_response_profiles(payload_hex)
+        resp = _try_response_profiles(payload)
         if resp is not None:
             return resp
 
         # Request style: Tag List / searchCriteria
         root = ParseNode(name="BF2D: ProfileInfoListRequest")
-        tlvs = parse_ber_tlvs(payload_hex)
+        tlvs = parse_ber_tlvs(payload)
         for t in tlvs:
             if t.tag == "5C":
                 tag_pairs = _decode_taglist_hex(t.value_hex)
@@ -112,7 +110,7 @@ class BF2DParser:
                 root.children.append(ParseNode(name="searchCriteria.profileClass (95)",
                                                value={"00":"test","01":"provisioning","02":"operational"}.get(t.value_hex, f"Unknown({t.value_hex})")))
             else:
-                root.children.append(ParseNode(name=f"TLV {t.tag}", value=f"len={t.length}", hint=t.value_hex[:120]))
-        if not tlvs and payload_hex == "00":
+                root.children.append(ParseNode(name=f"TLV {t.tag}", value=f"len={t.length}", hint=t.hex_head(120)))
+        if not tlvs and as_buffer(payload) == b"\x00":
             root.hint = "Default request (BF2D 00)"
         return root
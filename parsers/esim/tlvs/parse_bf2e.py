@@ -1,13 +1,13 @@
 from core.models import MsgType, ParseNode
 from core.registry import register
-from core.tlv import parse_ber_tlvs
+from core.tlv import TlvInput, parse_ber_tlvs
 
 @register(MsgType.ESIM, "BF2E")
 class BF2EParser:
     """GetEuiccChallenge - 获取eUICC挑战值"""
-    def build(self, payload_hex: str, direction: str) -> ParseNode:
+    def build(self, payload: TlvInput, direction: str) -> ParseNode:
         root = ParseNode(name="BF2E: GetEuiccChallenge")
-        tlvs = parse_ber_tlvs(payload_hex)
+        tlvs = parse_ber_tlvs(payload)
         
         if not tlvs:
             # 请求格式：空序列
@@ -38,7 +38,7 @@ class BF2EParser:
                 root.children.append(ParseNode(
                     name=f"Unknown TLV {t.tag}", 
                     value=f"len={t.length}", 
-                    hint=t.value_hex[:120]
+                    hint=t.hex_head(120)
                 ))
         
         return root
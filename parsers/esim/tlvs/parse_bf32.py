@@ -1,28 +1,28 @@
 from core.models import MsgType, ParseNode
 from core.registry import register
-from core.tlv import parse_ber_tlvs
+from core.tlv import TlvInput, parse_ber_tlvs
 from core.utils import parse_iccid
 
 @register(MsgType.ESIM, "BF32")
 class BF32Parser:
     """DisableProfile - 禁用配置文件"""
-    def build(self, payload_hex: str, direction: str) -> ParseNode:
+    def build(self, payload: TlvInput, direction: str) -> ParseNode:
         dir_norm = (direction or "").lower()
         if dir_norm in ("lpa=>esim", "tx"):
-            return self._parse_request(payload_hex)
+            return self._parse_request(payload)
         else:
-            return self._parse_response(payload_hex)
+            return self._parse_response(payload)
     
     # ---------- Request ----------
-    def _parse_request(self, payload_hex: str) -> ParseNode:
+    def _parse_request(self, payload: TlvInput) -> ParseNode:
         root = ParseNode(name="BF32: DisableProfileRequest")
-        tlvs = parse_ber_tlvs(payload_hex)
+        tlvs = parse_ber_tlvs(payload)
         
         for t in tlvs:
             if t.tag == "A0":
                 # profileIdentifier CHOICE 被 [0] 包裹（AUTOMATIC TAGS）
                 pid = ParseNode(name="profileIdentifier")
-                for st in parse_ber_tlvs(t.value_hex):
+                for st in parse_ber_tlvs(t.value):
                     if st.tag == "4F":
                         pid.children.append(ParseNode(name="isdpAid", value=st.value_hex))
                     elif st.tag == "5A":
@@ -42,14 +42,14 @@ class BF32Parser:
                                            hint=f"BOOLEAN({t.tag}): {t.value_hex}"))
             
             else:
-                root.children.append(ParseNode(name=f"TLV {t.tag}", value=f"len={t.length}", hint=t.value_hex[:120]))
+                root.children.append(ParseNode(name=f"TLV {t.tag}", value=f"len={t.length}", hint=t.hex_head(120)))
         
         return root
     
     # ---------- Response ----------
-    def _parse_response(self, payload_hex: str) -> ParseNode:
+    def _parse_response(self, payload: TlvInput) -> ParseNode:
         root = ParseNode(name="BF32: DisableProfileResponse")
-        tlvs = parse_ber_tlvs(payload_hex)
+        tlvs = parse_ber_tlvs(payload)
         
         # 映射表
         result_map = {
@@ -70,6 +70,6 @@ class BF32Parser:
                 root.children.append(ParseNode(name="disableResult", value=f"{name}({val})",
                                            hint=f"INTEGER({t.tag}): {t.value_hex}"))
             else:
-                root.children.append(ParseNode(name=f"TLV {t.tag}", value=f"len={t.length}", hint=t.value_hex[:120]))
+                root.children.append(ParseNode(name=f"TLV {t.tag}", value=f"len={t.length}", hint=t.hex_head(120)))
         
         return root
@@ -1,6 +1,8 @@
-from core.models import MsgType, ParseNode
+from functools import partial
+
+from core.models import MsgType, ParseNode, LazyParseNode
 from core.registry import register
-from core.tlv import parse_ber_tlvs
+from core.tlv import TlvInput, as_buffer, parse_ber_tlvs
 from core.utils import parse_iccid
 
 
@@ -43,14 +45,13 @@ def _parse_notification_event_bits(bitstring_hex: str):
     return rows, cnt
 
 
-def _parse_euicc_response(ppi_hex: str) -> ParseNode:
+def _parse_euicc_response(ppi: TlvInput) -> ParseNode:
     """解析EUICCResponse：
     - 先用 BER 解析，支持 A0..AF 容器以及其中再套 SEQUENCE(30)；
     - 任意层级递归提取 80(status) 与 81(identification number)；
     - 失败再回退到旧的逐字节解析。
     """
     node = ParseNode(name="peStatus")
-    s = "".join(ppi_hex.split())
 
     status_map = {
         0: "ok", 1: "pe-not-supported", 2: "memory-failure", 3: "bad-values",
@@ -82,15 +83,15 @@ def _parse_euicc_response(ppi_hex: str) -> ParseNode:
             elif tag == "81":
                 _emit_ident(x.value_hex)
             elif tag == "30":
-                _walk_ppi_tlvs(parse_ber_tlvs(x.value_hex))
+                _walk_ppi_tlvs(parse_ber_tlvs(x.value))
             elif tag and tag[0] in "Aa":  # A0..AF：ctx-specific constructed 容器
-                _walk_ppi_tlvs(parse_ber_tlvs(x.value_hex))
+                _walk_ppi_tlvs(parse_ber_tlvs(x.value))
             else:
-                node.children.append(ParseNode(name=f"Unknown {tag}", value=x.value_hex[:120]))
+                node.children.append(ParseNode(name=f"Unknown {tag}", value=x.hex_head(120)))
 
     # ---------- 首选：BER 解析 ----------
     try:
-        tlvs = parse_ber_tlvs(s)
+        tlvs = parse_ber_tlvs(ppi)
         if tlvs:
             _walk_ppi_tlvs(tlvs)
             # 如果确实解出了 status/ident，就返回
@@ -101,6 +102,7 @@ def _parse_euicc_response(ppi_hex: str) -> ParseNode:
         pass
 
     # ---------- 回退：旧的逐字节解析（兼容少见厂商格式） ----------
+    s = "".join(ppi.split()) if isinstance(ppi, str) else as_buffer(ppi).hex().upper()
     length = len(s)
     index = 0
     if length > 8:
@@ -147,10 +149,10 @@ def _parse_euicc_response(ppi_hex: str) -> ParseNode:
     return node
 
 
-def _parse_notification_metadata(metadata_hex: str) -> ParseNode:
+def _parse_notification_metadata(metadata: TlvInput) -> ParseNode:
     """解析NotificationMetadata"""
     meta = ParseNode(name="NotificationMetadata")
-    tlvs = parse_ber_tlvs(metadata_hex)
+    tlvs = parse_ber_tlvs(metadata)
 
     for t in tlvs:
         if t.tag == "80":  # seqNumber [0] INTEGER
@@ -174,7 +176,7 @@ def _parse_notification_metadata(metadata_hex: str) -> ParseNode:
 
         elif t.tag == "0C":  # notificationAddress UTF8String
             try:
-                address = bytes.fromhex(t.value_hex).decode('utf-8')
+                address = bytes(t.value).decode('utf-8')
                 meta.children.append(ParseNode(name="notificationAddress", value=address))
             except Exception:
                 meta.children.append(ParseNode(name="notificationAddress", value=t.value_hex))
@@ -184,33 +186,32 @@ def _parse_notification_metadata(metadata_hex: str) -> ParseNode:
             meta.children.append(ParseNode(name="iccid", value=iccid))
 
         else:
-            meta.children.append(ParseNode(name=f"Field {t.tag}", value=f"len={t.length}", hint=t.value_hex[:120]))
+            meta.children.append(ParseNode(name=f"Field {t.tag}", value=f"len={t.length}", hint=t.hex_head(120)))
 
     return meta
 
 
-def _parse_success_result(success_hex: str) -> ParseNode:
+def _parse_success_result(success: TlvInput) -> ParseNode:
     """解析SuccessResult"""
     result = ParseNode(name="SuccessResult")
-    tlvs = parse_ber_tlvs(success_hex)
+    tlvs = parse_ber_tlvs(success)
 
     for t in tlvs:
         if t.tag == "4F":  # aid [APPLICATION 15] OCTET STRING
             result.children.append(ParseNode(name="aid", value=t.value_hex))
         elif t.tag == "04":  # ppiResponse OCTET STRING
             # 解析EUICCResponse（支持 A0..AF 容器 + 多个 SEQUENCE）
-            ppi_node = _parse_euicc_response(t.value_hex)
-            result.children.append(ppi_node)
+            result.children.append(LazyParseNode("peStatus", partial(_parse_euicc_response, t.value)))
         else:
-            result.children.append(ParseNode(name=f"Unknown {t.tag}", value=f"len={t.length}", hint=t.value_hex[:120]))
+            result.children.append(ParseNode(name=f"Unknown {t.tag}", value=f"len={t.length}", hint=t.hex_head(120)))
 
     return result
 
 
-def _parse_error_result(error_hex: str) -> ParseNode:
+def _parse_error_result(error: TlvInput) -> ParseNode:
     """解析ErrorResult"""
     result = ParseNode(name="ErrorResult")
-    tlvs = parse_ber_tlvs(error_hex)
+    tlvs = parse_ber_tlvs(error)
 
     bpp_command_map = {
         0: "initialiseSecureChannel", 1: "configureISDP", 2: "storeMetadata",
@@ -245,11 +246,10 @@ def _parse_error_result(error_hex: str) -> ParseNode:
                 result.children.append(ParseNode(name="INTEGER", value=t.value_hex))
 
         elif t.tag == "04":  # ppiResponse OCTET STRING OPTIONAL
-            ppi_node = _parse_euicc_response(t.value_hex)
-            result.children.append(ppi_node)
+            result.children.append(LazyParseNode("peStatus", partial(_parse_euicc_response, t.value)))
 
         else:
-            result.children.append(ParseNode(name=f"Unknown {t.tag}", value=f"len={t.length}", hint=t.value_hex[:120]))
+            result.children.append(ParseNode(name=f"Unknown {t.tag}", value=f"len={t.length}", hint=t.hex_head(120)))
 
     return result
 
@@ -257,47 +257,47 @@ def _parse_error_result(error_hex: str) -> ParseNode:
 @register(MsgType.ESIM, "BF37")
 class BF37Parser:
     """ProfileInstallationResult - 根据ASN定义重写"""
-    def build(self, payload_hex: str, direction: str) -> ParseNode:
+    def build(self, payload: TlvInput, direction: str) -> ParseNode:
         root = ParseNode(name="BF37: ProfileInstallationResult")
-        tlvs = parse_ber_tlvs(payload_hex)
+        tlvs = parse_ber_tlvs(payload)
 
         # ProfileInstallationResult ::= [55] SEQUENCE
         for t in tlvs:
             if t.tag == "BF27":  # profileInstallationResultData [39]
                 data_node = ParseNode(name="profileInstallationResultData")
-                inner_tlvs = parse_ber_tlvs(t.value_hex)
+                inner_tlvs = parse_ber_tlvs(t.value)
 
                 for st in inner_tlvs:
                     if st.tag == "80":  # transactionId [0] TransactionId
                         data_node.children.append(ParseNode(name="transactionId", value=st.value_hex))
                     elif st.tag == "BF2F":  # notificationMetadata [47] NotificationMetadata
-                        meta = _parse_notification_metadata(st.value_hex)
-                        data_node.children.append(meta)
+                        data_node.children.append(
+                            LazyParseNode("NotificationMetadata", partial(_parse_notification_metadata, st.value)))
                     elif st.tag == "06":  # smdpOid OBJECT IDENTIFIER
                         data_node.children.append(ParseNode(name="smdpOid", value=st.value_hex))
                     elif st.tag == "A2":  # finalResult [2] CHOICE
                         final_result = ParseNode(name="finalResult")
-                        choice_tlvs = parse_ber_tlvs(st.value_hex)
+                        choice_tlvs = parse_ber_tlvs(st.value)
 
                         for ct in choice_tlvs:
                             if ct.tag == "A0":  # successResult
-                                success = _parse_success_result(ct.value_hex)
-                                final_result.children.append(success)
+                                final_result.children.append(
+                                    LazyParseNode("SuccessResult", partial(_parse_success_result, ct.value)))
                             elif ct.tag == "A1":  # errorResult
-                                error = _parse_error_result(ct.value_hex)
-                                final_result.children.append(error)
+                                final_result.children.append(
+                                    LazyParseNode("ErrorResult", partial(_parse_error_result, ct.value)))
                             else:
                                 final_result.children.append(ParseNode(
                                     name=f"Unknown choice {ct.tag}",
                                     value=f"len={ct.length}",
-                                    hint=ct.value_hex[:120]
+                                    hint=ct.hex_head(120)
                                 ))
                         data_node.children.append(final_result)
                     else:
                         data_node.children.append(ParseNode(
                             name=f"Unknown {st.tag}",
                             value=f"len={st.length}",
-                            hint=st.value_hex[:120]
+                            hint=st.hex_head(120)
                         ))
 
                 root.children.append(data_node)
@@ -306,11 +306,11 @@ class BF37Parser:
                 root.children.append(ParseNode(name="euiccSignPIR", value=t.value_hex, hint="eUICC signature"))
             else:
                 # 兜底：显示未知TLV
-                root.children.append(ParseNode(name=f"TLV {t.tag}", value=f"len={t.length}", hint=t.value_hex[:120]))
+                root.children.append(ParseNode(name=f"TLV {t.tag}", value=f"len={t.length}", hint=t.hex_head(120)))
 
         # 如果没有解析到任何内容，显示原始TLV
         if not root.children:
             for t in tlvs:
-                root.children.append(ParseNode(name=f"TLV {t.tag}", value=f"len={t.length}", hint=t.value_hex[:120]))
+                root.children.append(ParseNode(name=f"TLV {t.tag}", value=f"len={t.length}", hint=t.hex_head(120)))
 
         return root
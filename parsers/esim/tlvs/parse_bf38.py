@@ -1,6 +1,8 @@
-from core.models import MsgType, ParseNode
+from functools import partial
+
+from core.models import MsgType, ParseNode, LazyParseNode
 from core.registry import register
-from core.tlv import parse_ber_tlvs
+from core.tlv import TlvInput, parse_ber_tlvs
 
 def _parse_bitstring(hexv: str, names):
     if len(hexv) < 2:
@@ -29,9 +31,9 @@ def _decode_bool(hexv: str) -> str:
     except Exception:
         return hexv
 
-def _parse_session_context(hexv: str) -> ParseNode:
+def _parse_session_context(data: TlvInput) -> ParseNode:
     grp = ParseNode(name="SessionContext")
-    for t in parse_ber_tlvs(hexv):
+    for t in parse_ber_tlvs(data):
         if t.tag == "80":       # serverSvn [0] VersionType
             grp.children.append(ParseNode(name="serverSvn", value=t.value_hex))
         elif t.tag == "81":     # crlStaplingV3Used [1] BOOLEAN
@@ -40,7 +42,7 @@ def _parse_session_context(hexv: str) -> ParseNode:
             grp.children.append(ParseNode(name="euiccCiPKIdToBeUsedV3", value=t.value_hex))
         elif t.tag == "A3":     # supportedPushServices [3] SEQUENCE OF OBJECT IDENTIFIER
             oids = ParseNode(name="supportedPushServices")
-            for st in parse_ber_tlvs(t.value_hex):
+            for st in parse_ber_tlvs(t.value):
                 if st.tag == "06":  # OBJECT IDENTIFIER (raw)
                     oids.children.append(ParseNode(name="OID", value=st.value_hex))
                 else:
@@ -50,9 +52,9 @@ def _parse_session_context(hexv: str) -> ParseNode:
             grp.children.append(ParseNode(name=f"Unknown {t.tag}", value=t.value_hex))
     return grp
 
-def _parse_server_signed1(hexv: str) -> ParseNode:
+def _parse_server_signed1(data: TlvInput) -> ParseNode:
     grp = ParseNode(name="serverSigned1")
-    for t in parse_ber_tlvs(hexv):
+    for t in parse_ber_tlvs(data):
         if t.tag == "80":       # transactionId [0] TransactionId
             grp.children.append(ParseNode(name="transactionId", value=t.value_hex))
         elif t.tag == "81":     # euiccChallenge [1] Octet16
@@ -62,7 +64,7 @@ def _parse_server_signed1(hexv: str) -> ParseNode:
         elif t.tag == "84":     # serverChallenge [4] Octet16
             grp.children.append(ParseNode(name="serverChallenge", value=t.value_hex))
         elif t.tag == "A5":     # sessionContext [5] SessionContext
-            grp.children.append(_parse_session_context(t.value_hex))
+            grp.children.append(LazyParseNode("SessionContext", partial(_parse_session_context, t.value)))
         elif t.tag == "86":     # serverRspCapability [6] BIT STRING
             names = ["crlStaplingV3Support", "eventListSigningV3Support",
                      "pushServiceV3Support", "cancelForEmptySpnPnSupport"]
@@ -74,9 +76,9 @@ def _parse_server_signed1(hexv: str) -> ParseNode:
             grp.children.append(ParseNode(name=f"Unknown {t.tag}", value=t.value_hex))
     return grp
 
-def _parse_ctx_params_common_auth(hexv: str) -> ParseNode:
+def _parse_ctx_params_common_auth(data: TlvInput) -> ParseNode:
     grp = ParseNode(name="CtxParamsForCommonAuthentication")
-    for t in parse_ber_tlvs(hexv):
+    for t in parse_ber_tlvs(data):
         if t.tag == "80":  # matchingId [0] UTF8String OPTIONAL
             grp.children.append(ParseNode(name="matchingId", value=_decode_utf8(t.value_hex)))
         elif t.tag == "A1":  # deviceInfo [1] DeviceInfo
@@ -91,7 +93,7 @@ def _parse_ctx_params_common_auth(hexv: str) -> ParseNode:
             grp.children.append(ParseNode(name="iccid", value=t.value_hex))
         elif t.tag == "83":  # matchingIdSource [3] CHOICE OPTIONAL (wrapped)
             # 尝试解析内部 CHOICE（none[0] NULL / activationCode[1] NULL / smdsOid[2] OID）
-            inner = parse_ber_tlvs(t.value_hex)
+            inner = parse_ber_tlvs(t.value)
             if inner:
                 c = inner[0]
                 if c.tag == "80":
@@ -111,10 +113,10 @@ def _parse_ctx_params_common_auth(hexv: str) -> ParseNode:
             grp.children.append(ParseNode(name=f"Unknown {t.tag}", value=t.value_hex))
     return grp
 
-def _parse_ctx_params_device_change(hexv: str) -> ParseNode:
+def _parse_ctx_params_device_change(data: TlvInput) -> ParseNode:
     grp = ParseNode(name="CtxParamsForDeviceChange")
     iccid_seen = False
-    for t in parse_ber_tlvs(hexv):
+    for t in parse_ber_tlvs(data):
         if t.tag == "5A" and not iccid_seen:  # iccid Iccid
             grp.children.append(ParseNode(name="iccid", value=t.value_hex))
             iccid_seen = True
@@ -130,9 +132,9 @@ def _parse_ctx_params_device_change(hexv: str) -> ParseNode:
             grp.children.append(ParseNode(name=f"Unknown {t.tag}", value=t.value_hex))
     return grp
 
-def _parse_ctx_params_profile_recovery(hexv: str) -> ParseNode:
+def _parse_ctx_params_profile_recovery(data: TlvInput) -> ParseNode:
     grp = ParseNode(name="CtxParamsForProfileRecovery")
-    for t in parse_ber_tlvs(hexv):
+    for t in parse_ber_tlvs(data):
         if t.tag == "5A":      # iccid Iccid
             grp.children.append(ParseNode(name="iccid", value=t.value_hex))
         elif t.tag == "A1":    # deviceInfo [1]
@@ -143,9 +145,9 @@ def _parse_ctx_params_profile_recovery(hexv: str) -> ParseNode:
             grp.children.append(ParseNode(name=f"Unknown {t.tag}", value=t.value_hex))
     return grp
 
-def _parse_ctx_params_push_service(hexv: str) -> ParseNode:
+def _parse_ctx_params_push_service(data: TlvInput) -> ParseNode:
     grp = ParseNode(name="CtxParamsForPushServiceRegistration")
-    for t in parse_ber_tlvs(hexv):
+    for t in parse_ber_tlvs(data):
         if t.tag == "80":      # selectedPushService [0] OBJECT IDENTIFIER
             grp.children.append(ParseNode(name="selectedPushServiceOID", value=t.value_hex))
         elif t.tag == "81":    # pushToken [1] UTF8String
@@ -154,35 +156,35 @@ def _parse_ctx_params_push_service(hexv: str) -> ParseNode:
             grp.children.append(ParseNode(name=f"Unknown {t.tag}", value=t.value_hex))
     return grp
 
-def _parse_ctx_params1(hexv: str) -> ParseNode:
+def _parse_ctx_params1(data: TlvInput) -> ParseNode:
     # ctxParams1 外层（自动标签 [5] -> A5），内部为 CHOICE 的一个备选
     grp = ParseNode(name="ctxParams1")
-    inner = parse_ber_tlvs(hexv)
+    inner = parse_ber_tlvs(data)
     # 常见编码：A0/A1/A2/A3 包一层
     if len(inner) == 1 and inner[0].tag in ("A0", "A1", "A2", "A3"):
         ch = inner[0]
         if ch.tag == "A0":
-            grp.children.append(_parse_ctx_params_common_auth(ch.value_hex))
+            grp.children.append(_parse_ctx_params_common_auth(ch.value))
         elif ch.tag == "A1":
-            grp.children.append(_parse_ctx_params_device_change(ch.value_hex))
+            grp.children.append(_parse_ctx_params_device_change(ch.value))
         elif ch.tag == "A2":
-            grp.children.append(_parse_ctx_params_profile_recovery(ch.value_hex))
+            grp.children.append(_parse_ctx_params_profile_recovery(ch.value))
         elif ch.tag == "A3":
-            grp.children.append(_parse_ctx_params_push_service(ch.value_hex))
+            grp.children.append(_parse_ctx_params_push_service(ch.value))
         return grp
     # 兼容：直接展开为 CommonAuthentication 的字段（少数实现）
     # 若未包裹，则按 common-auth 尝试解析
-    grp.children.append(_parse_ctx_params_common_auth(hexv))
+    grp.children.append(_parse_ctx_params_common_auth(data))
     return grp
 
 @register(MsgType.ESIM, "BF38")
 class BF38Parser:
     """AuthenticateServerRequest"""
-    def build(self, payload_hex: str, direction: str) -> ParseNode:
+    def build(self, payload: TlvInput, direction: str) -> ParseNode:
         root = ParseNode(name="BF38: AuthenticateServerRequest")
-        for t in parse_ber_tlvs(payload_hex):
+        for t in parse_ber_tlvs(payload):
             if t.tag == "A0":             # serverSigned1  (AUTOMATIC TAGS -> [0])
-                root.children.append(_parse_server_signed1(t.value_hex))
+                root.children.append(LazyParseNode("serverSigned1", partial(_parse_server_signed1, t.value)))
             elif t.tag == "5F37":         # serverSignature1 [APPLICATION 55] OCTET STRING
                 root.children.append(ParseNode(name="serverSignature1", value=t.value_hex))
             elif t.tag == "83":           # euiccCiPKIdToBeUsed  (AUTOMATIC TAGS -> [3])
@@ -190,18 +192,18 @@ class BF38Parser:
             elif t.tag == "A4":           # serverCertificate  (AUTOMATIC TAGS -> [4]) X.509
                 root.children.append(ParseNode(name="serverCertificate", value=t.value_hex))
             elif t.tag == "A5":           # ctxParams1  (AUTOMATIC TAGS -> [5]) CHOICE
-                root.children.append(_parse_ctx_params1(t.value_hex))
+                root.children.append(LazyParseNode("ctxParams1", partial(_parse_ctx_params1, t.value)))
             elif t.tag == "A1":           # otherCertsInChain [1] CertificateChain OPTIONAL
                 chain = ParseNode(name="otherCertsInChain")
                 # 通常内部是一系列 X.509 Certificate (UNIVERSAL 30)
-                for st in parse_ber_tlvs(t.value_hex):
+                for st in parse_ber_tlvs(t.value):
                     chain.children.append(ParseNode(name=f"Certificate {len(chain.children)+1}", value=st.value_hex, hint=st.tag))
                 root.children.append(chain)
             elif t.tag == "A2":           # crlList [2] SEQUENCE OF CertificateList OPTIONAL
                 crls = ParseNode(name="crlList")
-                for st in parse_ber_tlvs(t.value_hex):
+                for st in parse_ber_tlvs(t.value):
                     crls.children.append(ParseNode(name=f"CRL {len(crls.children)+1}", value=st.value_hex, hint=st.tag))
                 root.children.append(crls)
             else:
-                root.children.append(ParseNode(name=f"TLV {t.tag}", value=f"len={t.length}", hint=t.value_hex[:120]))
+                root.children.append(ParseNode(name=f"TLV {t.tag}", value=f"len={t.length}", hint=t.hex_head(120)))
         return root
@@ -1 +1 @@
-from .cmds import parse_d0, parse_envelope, parse_terminal_response  # noqa
+# 处理器模块不在这里导入：core.registry 按清单在标签第一次被解析时导入
@@ -1,14 +1,24 @@
 # parsers/proactive/cmds/parse_terminal_response.py
 from core.models import MsgType, ParseNode
 from core.registry import register
-from parsers.proactive.common import parse_comp_tlvs_to_nodes
+from core.tlv import TlvInput
+from parsers.proactive.common import first_command, parse_comp_tlvs_to_nodes
+
+
+def _title(first: str) -> str:
+    return "Proactive: TERMINAL RESPONSE" + (f" - {first}" if first else "")
+
 
 @register(MsgType.PROACTIVE, "TERMINAL_RESPONSE")
 class TerminalResponseParser:
     """TERMINAL => UICC: Terminal Response (8014)."""
-    def build(self, payload_hex: str, direction: str) -> ParseNode:
-        comp_root, first = parse_comp_tlvs_to_nodes(payload_hex)
-        title = "Proactive: TERMINAL RESPONSE" + (f" - {first}" if first else "")
+    def build(self, payload: TlvInput, direction: str) -> ParseNode:
+        comp_root, first = parse_comp_tlvs_to_nodes(payload)
+        title = _title(first)
         root = ParseNode(name=title)
         root.children.extend(comp_root.children)
         return root
+
+    def title(self, payload: TlvInput, direction: str) -> str:
+        """build(...).name without building the tree."""
+        return _title(first_command(payload))
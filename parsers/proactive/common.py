@@ -1,219 +1,275 @@
 # parsers/proactive/common.py
+"""Comprehension-TLV（ETSI TS 102 223 / TS 102 220）解码引擎。
+
+每种 TLV 的名称和解码函数登记在声明式的 CAT_TLV_SPECS 表中，模块加载时编译成
+以标签值为键的字典，解析时一次查表即得解码函数。标签支持单字节格式和 7F 开头的
+三字节格式（CR 位不参与查表），长度支持 81/82/83 开头的长格式。
+各 *_text 解码函数接受值的字节（也接受十六进制字符串），返回显示文本。
+"""
+from typing import Callable, Dict, Iterator, Optional, Tuple
+
 from core.models import ParseNode
+from core.tlv import TlvInput, as_buffer
+
+_CMD_NAMES = {
+    0x01:"REFRESH",0x02:"MORE TIME",0x03:"POLL INTERVAL",0x04:"POLLING OFF",0x05:"SET UP EVENT LIST",
+    0x10:"SET UP CALL",0x11:"SEND SS",0x12:"SEND USSD",0x13:"SEND SHORT MESSAGE",0x14:"SEND DTMF",
+    0x15:"LAUNCH BROWSER",0x16:"GEOGRAPHICAL LOCATION REQUEST",0x20:"PLAY TONE",0x21:"DISPLAY TEXT",
+    0x22:"GET INKEY",0x23:"GET INPUT",0x24:"SELECT ITEM",0x25:"SET UP MENU",0x26:"PROVIDE LOCAL INFORMATION",
+    0x27:"TIMER MANAGEMENT",0x28:"SET UP IDLE MODE TEXT",0x30:"PERFORM CARD APDU",0x31:"POWER ON CARD",
+    0x32:"POWER OFF CARD",0x33:"GET READER STATUS",0x34:"RUN AT COMMAND",0x35:"LANGUAGE NOTIFICATION",
+    0x40:"OPEN CHANNEL",0x41:"CLOSE CHANNEL",0x42:"RECEIVE DATA",0x43:"SEND DATA",0x44:"GET CHANNEL STATUS",
+    0x45:"SERVICE SEARCH",0x46:"GET SERVICE INFORMATION",0x47:"DECLARE SERVICE",
+    0x50:"SET FRAMES",0x51:"GET FRAMES STATUS",0x60:"RETRIEVE MULTIMEDIA MESSAGE",
+    0x61:"SUBMIT MULTIMEDIA MESSAGE",0x62:"DISPLAY MULTIMEDIA MESSAGE",0x70:"ACTIVATE",
+    0x71:"CONTACTLESS STATE CHANGED",0x73:"ENCAPSULATED SESSION CONTROL",0x79:"LSI COMMAND",
+    0x81:"End of the proactive UICC session",
+}
+
+_INPUT_QUALIFIERS = {0x00:"Digits only",0x01:"Alphabet set",0x02:"SMS default alphabet",0x03:"UCS2 alphabet",
+                     0x04:"Echo input",0x05:"Not revealed",0x08:"No help",0x09:"Help available"}
+
+_CMD_QUALIFIERS = {
+    0x21:{0x00:"Normal priority",0x01:"High priority",0x80:"Clear after delay",0x81:"Wait user clear"},
+    0x22:_INPUT_QUALIFIERS,
+    0x23:_INPUT_QUALIFIERS,
+    0x24:{0x00:"Presentation not specified",0x01:"Presentation specified",
+          0x02:"Choice data values",0x03:"Choice navigation",0x08:"No help",0x09:"Help available"},
+    0x25:{0x00:"No selection preference",0x01:"Soft key preferred",0x08:"No help",0x09:"Help available"},
+    0x26:{0x00:"Location Information",0x01:"IMEI",0x02:"Network Measurement",0x03:"Date/Time/TZ",
+          0x04:"Language",0x06:"Access Technology",0x08:"IMEISV",0x0E:"Multiple Access Technologies",
+          0x1A:"Supported RATs"},
+    0x27:{0x00:"Start",0x01:"Deactivate",0x10:"Get current value"},
+    0x40:{0x00:"On demand",0x01:"Immediate",0x02:"No auto reconnect",0x03:"Auto reconnect",
+          0x04:"No background mode",0x05:"Immediate background",0x06:"No DNS requested",0x07:"DNS requested"},
+    0x41:{0x00:"No indication",0x01:"Indication for next CAT command"},
+    0x43:{0x00:"Store in Tx buffer",0x01:"Send immediately"},
+    0x20:{0x00:"Vibrate optional",0x01:"Vibrate with tone"},
+    0x10:{0x00:"Set up call, not busy",0x01:"Set up call, not busy, with redial",0x02:"Put others on hold",
+          0x03:"Put others on hold w/ redial",0x04:"Disconnect others",0x05:"Disconnect others w/ redial"},
+    0x13:{0x00:"Packing not required",0x01:"SMS packing required"},
+    0x73:{0x00:"End session",0x01:"Request Master SA",0x02:"Request Connection SA",
+          0x03:"Start Secure Channel",0x04:"Close M/CSA"},
+    0x79:{0x00:"Proactive Session Request",0x01:"UICC Platform Reset"},
+}
+
+_DEVICES = {0x01:"Keypad",0x02:"Display",0x03:"Earpiece",0x10:"Additional Reader 0",0x11:"Additional Reader 1",
+            0x12:"Additional Reader 2",0x13:"Additional Reader 3",0x14:"Additional Reader 4",0x15:"Additional Reader 5",
+            0x16:"Additional Reader 6",0x17:"Additional Reader 7",0x21:"Channel 1",0x22:"Channel 2",0x23:"Channel 3",
+            0x24:"Channel 4",0x25:"Channel 5",0x26:"Channel 6",0x27:"Channel 7",0x81:"UICC",0x82:"Terminal",0x83:"Network"}
+
+_GENERAL_RESULTS = {
+    0x00:"Command performed successfully",0x01:"Partial comprehension",0x02:"Missing information",
+    0x03:"REFRESH with add. EFs read",0x04:"Success but icon not displayed",0x05:"Modified by call control by NAA",
+    0x06:"Success, limited service",0x07:"Performed with modification",0x08:"REFRESH but NAA not active",
+    0x09:"Success, tone not played",0x10:"Session terminated by user",0x11:"Backward move requested",
+    0x12:"No response from user",0x30:"Beyond terminal's capabilities",0x31:"Type not understood",
+    0x32:"Data not understood",0x33:"Number not known",0x36:"Required values missing",
+}
+
+_ADDITIONAL_INFO = {
+    0x20:{0x00:"No specific cause",0x01:"Screen busy",0x02:"Busy on call",0x04:"No service",0x06:"Radio resource not granted"},
+    0x38:{0x01:"Reader removed",0x02:"Card removed",0x03:"Reader busy",0x04:"Card powered off",0x05:"C-APDU format error"},
+}
 
-def _hex2int(h): return int(h, 16) if h else 0
+_DURATION_UNITS = {0x00:"minutes",0x01:"seconds",0x02:"tenths"}
+_TON = {0:"Unknown",1:"International",2:"National",3:"Network Specific"}
+_NPI = {0:"Unknown",1:"ISDN",3:"Data",4:"Telex",9:"Private",15:"Ext"}
+_ACCESS_TECH = {0x00:"GSM",0x03:"UTRAN",0x08:"E-UTRAN",0x0A:"NG-RAN"}
+_TRANSPORT = {0x01:"UDP client remote",0x02:"TCP client remote",0x03:"TCP server",
+              0x04:"UDP client local",0x05:"TCP client local",0x06:"direct"}
+# 每字节高低半字节互换（BCD 号码、IMEI）
+_SWAP_NIBBLES = bytes(((b & 0x0F) << 4) | (b >> 4) for b in range(256))
 
-def command_details_text(value_hex: str) -> str:
+
+def _hex(v) -> str:
+    return v.hex().upper()
+
+def command_details_text(value: TlvInput) -> str:
     # Value: cmd_num(1B) | type_of_command(1B) | qualifier(1B)
-    cmd_map = {
-        "01":"REFRESH","02":"MORE TIME","03":"POLL INTERVAL","04":"POLLING OFF","05":"SET UP EVENT LIST",
-        "10":"SET UP CALL","11":"SEND SS","12":"SEND USSD","13":"SEND SHORT MESSAGE","14":"SEND DTMF",
-        "15":"LAUNCH BROWSER","16":"GEOGRAPHICAL LOCATION REQUEST","20":"PLAY TONE","21":"DISPLAY TEXT",
-        "22":"GET INKEY","23":"GET INPUT","24":"SELECT ITEM","25":"SET UP MENU","26":"PROVIDE LOCAL INFORMATION",
-        "27":"TIMER MANAGEMENT","28":"SET UP IDLE MODE TEXT","30":"PERFORM CARD APDU","31":"POWER ON CARD",
-        "32":"POWER OFF CARD","33":"GET READER STATUS","34":"RUN AT COMMAND","35":"LANGUAGE NOTIFICATION",
-        "40":"OPEN CHANNEL","41":"CLOSE CHANNEL","42":"RECEIVE DATA","43":"SEND DATA","44":"GET CHANNEL STATUS",
-        "45":"SERVICE SEARCH","46":"GET SERVICE INFORMATION","47":"DECLARE SERVICE",
-        "50":"SET FRAMES","51":"GET FRAMES STATUS","60":"RETRIEVE MULTIMEDIA MESSAGE",
-        "61":"SUBMIT MULTIMEDIA MESSAGE","62":"DISPLAY MULTIMEDIA MESSAGE","70":"ACTIVATE",
-        "71":"CONTACTLESS STATE CHANGED","73":"ENCAPSULATED SESSION CONTROL","79":"LSI COMMAND",
-        "81":"End of the proactive UICC session",
-    }
-    if len(value_hex) < 6:
+    v = as_buffer(value)
+    if len(v) < 3:
         return "Unknown Command"
-    cmd = value_hex[2:4].upper()
-    q   = value_hex[4:6].upper()
-    qual_map = {
-        "21":{"00":"Normal priority","01":"High priority","80":"Clear after delay","81":"Wait user clear"},
-        "22":{"00":"Digits only","01":"Alphabet set","02":"SMS default alphabet","03":"UCS2 alphabet",
-              "04":"Echo input","05":"Not revealed","08":"No help","09":"Help available"},
-        "23":{"00":"Digits only","01":"Alphabet set","02":"SMS default alphabet","03":"UCS2 alphabet",
-              "04":"Echo input","05":"Not revealed","08":"No help","09":"Help available"},
-        "24":{"00":"Presentation not specified","01":"Presentation specified",
-              "02":"Choice data values","03":"Choice navigation","08":"No help","09":"Help available"},
-        "25":{"00":"No selection preference","01":"Soft key preferred","08":"No help","09":"Help available"},
-        "26":{"00":"Location Information","01":"IMEI","02":"Network Measurement","03":"Date/Time/TZ",
-              "04":"Language","06":"Access Technology","08":"IMEISV","0E":"Multiple Access Technologies",
-              "1A":"Supported RATs"},
-        "27":{"00":"Start","01":"Deactivate","10":"Get current value"},
-        "40":{"00":"On demand","01":"Immediate","02":"No auto reconnect","03":"Auto reconnect",
-              "04":"No background mode","05":"Immediate background","06":"No DNS requested","07":"DNS requested"},
-        "41":{"00":"No indication","01":"Indication for next CAT command"},
-        "43":{"00":"Store in Tx buffer","01":"Send immediately"},
-        "20":{"00":"Vibrate optional","01":"Vibrate with tone"},
-        "10":{"00":"Set up call, not busy","01":"Set up call, not busy, with redial","02":"Put others on hold",
-              "03":"Put others on hold w/ redial","04":"Disconnect others","05":"Disconnect others w/ redial"},
-        "13":{"00":"Packing not required","01":"SMS packing required"},
-        "73":{"00":"End session","01":"Request Master SA","02":"Request Connection SA",
-              "03":"Start Secure Channel","04":"Close M/CSA"},
-        "79":{"00":"Proactive Session Request","01":"UICC Platform Reset"},
-    }
-    cmd_name = cmd_map.get(cmd, f"Unknown({cmd})")
-    qual_desc = qual_map.get(cmd, {}).get(q, f"Qualifier {q}")
+    cmd, q = v[1], v[2]
+    cmd_name = _CMD_NAMES.get(cmd) or f"Unknown({cmd:02X})"
+    qual_desc = _CMD_QUALIFIERS.get(cmd, {}).get(q) or f"Qualifier {q:02X}"
     return f"{cmd_name} - {qual_desc}"
 
-def device_identities_text(value_hex: str) -> str:
-    dev_map = {"01":"Keypad","02":"Display","03":"Earpiece","10":"Additional Reader 0","11":"Additional Reader 1",
-               "12":"Additional Reader 2","13":"Additional Reader 3","14":"Additional Reader 4","15":"Additional Reader 5",
-               "16":"Additional Reader 6","17":"Additional Reader 7","21":"Channel 1","22":"Channel 2","23":"Channel 3",
-               "24":"Channel 4","25":"Channel 5","26":"Channel 6","27":"Channel 7","81":"UICC","82":"Terminal","83":"Network"}
-    if len(value_hex) < 4: return "Unknown device identities"
-    s = value_hex[:2].upper(); d = value_hex[2:4].upper()
-    return f"{dev_map.get(s,'?')} -> {dev_map.get(d,'?')}"
-
-def result_details_text(value_hex: str) -> str:
-    gen = {
-        "00":"Command performed successfully","01":"Partial comprehension","02":"Missing information",
-        "03":"REFRESH with add. EFs read","04":"Success but icon not displayed","05":"Modified by call control by NAA",
-        "06":"Success, limited service","07":"Performed with modification","08":"REFRESH but NAA not active",
-        "09":"Success, tone not played","10":"Session terminated by user","11":"Backward move requested",
-        "12":"No response from user","30":"Beyond terminal's capabilities","31":"Type not understood",
-        "32":"Data not understood","33":"Number not known","36":"Required values missing",
-    }
-    addi = {
-        "20":{"00":"No specific cause","01":"Screen busy","02":"Busy on call","04":"No service","06":"Radio resource not granted"},
-        "38":{"01":"Reader removed","02":"Card removed","03":"Reader busy","04":"Card powered off","05":"C-APDU format error"},
-    }
-    if len(value_hex) < 2: return "Unknown General Result"
-    gr = value_hex[:2].upper()
-    res = gen.get(gr, f"General {gr}")
-    extra = ""
-    if len(value_hex) > 2:
-        ai = value_hex[2:4].upper()
-        extra = addi.get(gr, {}).get(ai, "")
-        if extra: extra = f", {extra}"
-    return f"{res}{extra}"
-
-def parse_duration_text(value_hex: str) -> str:
-    if len(value_hex) != 4: return f"{value_hex}"
-    unit_map = {"00":"minutes","01":"seconds","02":"tenths"}
-    unit = unit_map.get(value_hex[:2],"?"); val = _hex2int(value_hex[2:])
-    if unit == "tenths": return f"{val/10:.1f} seconds"
-    return f"{val} {unit}"
-
-def parse_address_text(value_hex: str) -> str:
-    if len(value_hex) < 2: return value_hex
-    b = bin(int(value_hex[:2],16))[2:].zfill(8)
-    ton_bits = b[1:4]; npi_bits = b[4:8]
-    ton = {"000":"Unknown","001":"International","010":"National","011":"Network Specific"}.get(ton_bits,"Reserved")
-    npi = {"0000":"Unknown","0001":"ISDN","0011":"Data","0100":"Telex","1001":"Private","1111":"Ext"}.get(npi_bits,"Reserved")
-    dn = ""
-    raw = value_hex[2:]
-    for i in range(0,len(raw),2):
-        if i+2<=len(raw):
-            dn += raw[i+1:i+2] + raw[i:i+1]
+def device_identities_text(value: TlvInput) -> str:
+    v = as_buffer(value)
+    if len(v) < 2: return "Unknown device identities"
+    return f"{_DEVICES.get(v[0], '?')} -> {_DEVICES.get(v[1], '?')}"
+
+def result_details_text(value: TlvInput) -> str:
+    v = as_buffer(value)
+    if len(v) < 1: return "Unknown General Result"
+    gr = v[0]
+    res = _GENERAL_RESULTS.get(gr) or f"General {gr:02X}"
+    extra = _ADDITIONAL_INFO.get(gr, {}).get(v[1], "") if len(v) > 1 else ""
+    return f"{res}, {extra}" if extra else res
+
+def parse_duration_text(value: TlvInput) -> str:
+    v = as_buffer(value)
+    if len(v) != 2: return _hex(v)
+    unit = _DURATION_UNITS.get(v[0], "?")
+    if unit == "tenths": return f"{v[1]/10:.1f} seconds"
+    return f"{v[1]} {unit}"
+
+def parse_address_text(value: TlvInput) -> str:
+    v = as_buffer(value)
+    if len(v) < 1: return ""
+    ton = _TON.get((v[0] >> 4) & 0x07, "Reserved")
+    npi = _NPI.get(v[0] & 0x0F, "Reserved")
+    dn = _hex(bytes(v[1:]).translate(_SWAP_NIBBLES))
     return f"TON={ton}, NPI={npi}, Dial={dn}"
 
-def parse_channel_status_text(value_hex: str) -> str:
-    if len(value_hex) < 2: return value_hex
-    b3 = int(value_hex[:2],16)
-    ch = b3 & 0x07
-    est = "BIP channel established" if (b3>>7)&1 else "BIP channel not established"
+def parse_channel_status_text(value: TlvInput) -> str:
+    v = as_buffer(value)
+    if len(v) < 1: return ""
+    ch = v[0] & 0x07
+    est = "BIP channel established" if v[0] & 0x80 else "BIP channel not established"
     further = ""
-    if len(value_hex) >= 4:
-        b4 = value_hex[2:4]
-        if b4 == "00": further = "No further info"
-        elif b4 == "05": further = "Link dropped"
+    if len(v) >= 2:
+        if v[1] == 0x00: further = "No further info"
+        elif v[1] == 0x05: further = "Link dropped"
     return f"Channel {ch}, {est}" + (f", {further}" if further else "")
 
-def parse_access_tech_text(value_hex: str) -> str:
-    m={"00":"GSM","03":"UTRAN","08":"E-UTRAN","0A":"NG-RAN"}
-    return ", ".join(m.get(value_hex[i:i+2],"UNK") for i in range(0,len(value_hex),2))
-
-def parse_timer_identifier_text(v:str)->str:
-    m={'01':'Timer 1','02':'Timer 2','03':'Timer 3','04':'Timer 4','05':'Timer 5','06':'Timer 6','07':'Timer 7','08':'Timer 8'}
-    return m.get(v, v)
-
-def parse_imei_text(v:str)->str:
-    out=""
-    for i in range(0,len(v),2):
-        b=v[i:i+2]
-        if len(b)==2: out += b[1]+b[0]
-    return out
-
-def parse_comp_tlvs_to_nodes(hexstr: str) -> tuple[ParseNode, str]:
-    """把 Comprehension TLV 串解析成 ParseNode 子树；返回(root, 首个命令名)。"""
-    idx=0; n=len(hexstr); root=ParseNode(name="Comprehension TLVs"); first=None
-    while idx+4 <= n:
-        tag = hexstr[idx:idx+2].upper(); idx+=2
-        ln  = int(hexstr[idx:idx+2],16) if idx+2<=n else 0; idx+=2
-        val = hexstr[idx:idx+2*ln] if idx+2*ln<=n else ""; idx += 2*ln
-
-        def is_tag(*alts): return tag in alts
-        if is_tag("01","81"):
-            txt = command_details_text(val)
-            root.children.append(ParseNode(name="Command details (01)", value=txt))
-            if first is None: first = txt.split(" - ")[0]
-        elif is_tag("02","82"):
-            root.children.append(ParseNode(name="Device identities (02)", value=device_identities_text(val)))
-        elif is_tag("03","83"):
-            root.children.append(ParseNode(name="Result (03)", value=result_details_text(val)))
-        elif is_tag("04","84"):
-            root.children.append(ParseNode(name="Duration (04)", value=parse_duration_text(val)))
-        elif is_tag("05","85"):
-            root.children.append(ParseNode(name="Alpha identifier (05)", value=val))
-        elif is_tag("06","86"):
-            root.children.append(ParseNode(name="Address (06)", value=parse_address_text(val)))
-        elif is_tag("38","B8"):
-            root.children.append(ParseNode(name="Channel status (38)", value=parse_channel_status_text(val)))
-        elif is_tag("0B","8B"):
-            root.children.append(ParseNode(name="SMS TPDU (0B)", value=val))
-        elif is_tag("39","B9"):
-            root.children.append(ParseNode(name="Buffer size (39)", value=str(int(val or "0",16))))
-        elif is_tag("47","C7"):
-            try: text = bytes.fromhex(val[2:]).decode("ascii","replace") if len(val)>=2 else ""
-            except Exception: text = val
-            root.children.append(ParseNode(name="Network Access Name (47)", value=text))
-        elif is_tag("3C","BC"):
-            t = val[:2]; port = int(val[2:] or "0",16)
-            pm = {"01":"UDP client remote","02":"TCP client remote","03":"TCP server","04":"UDP client local","05":"TCP client local","06":"direct"}
-            root.children.append(ParseNode(name="Transport Protocol (3C)", value=f"{pm.get(t,'?')}, port={port}"))
-        elif is_tag("FD","7D"):
-            if len(val)>=6:
-                mccmnc_raw = val[:6]
-                mccmnc = f"{mccmnc_raw[1]}{mccmnc_raw[0]}{mccmnc_raw[3]}{mccmnc_raw[5]}{mccmnc_raw[4]}{mccmnc_raw[2]}"
-                tac = val[6:]
-                root.children.append(ParseNode(name="MCCMNC+TAC (FD)", value=f"{mccmnc}, TAC:{tac}"))
-        elif is_tag("B5","35"):
-            root.children.append(ParseNode(name="Bearer description (B5)", value=val))
-        elif is_tag("13","93"):
-            root.children.append(ParseNode(name="Location Info (13)", value=val))
-        elif is_tag("14","94"):
-            root.children.append(ParseNode(name="IMEI (14)", value=parse_imei_text(val)))
-        elif is_tag("62","E2"):
-            root.children.append(ParseNode(name="IMEISV (62)", value=val))
-        elif is_tag("19","99"):
-            root.children.append(ParseNode(name="Event List (19)", value=val))
-        elif is_tag("2F","AF"):
-            root.children.append(ParseNode(name="AID (2F)", value=val))
-        elif is_tag("3E","BE"):
-            root.children.append(ParseNode(name="Data dest address (3E)", value=val))
-        elif is_tag("36","B6"):
-            root.children.append(ParseNode(name="Channel data (36)", value=val))
-        elif is_tag("37","B7"):
-            root.children.append(ParseNode(name="Channel data length (37)", value=val))
-        elif is_tag("3F","BF"):
-            root.children.append(ParseNode(name="Access Technology (3F)", value=parse_access_tech_text(val)))
-        elif is_tag("A2","22"):
-            root.children.append(ParseNode(name="C-APDU (A2)", value=val))
-        elif is_tag("A4","24"):
-            root.children.append(ParseNode(name="Timer identifier (A4)", value=parse_timer_identifier_text(val)))
-        elif is_tag("A5","25"):
-            root.children.append(ParseNode(name="Timer (A5)", value=f"{val[0:2]}:{val[2:4]}:{val[4:6]}" if len(val)>=6 else val))
-        elif is_tag("21","A1"):
-            root.children.append(ParseNode(name="Card ATR (21)", value=val))
-        elif is_tag("E0","60"):
-            root.children.append(ParseNode(name="MAC (E0)", value=val))
-        elif is_tag("A6","26"):
-            root.children.append(ParseNode(name="Date/Time/TZ (A6)", value=val))
-        elif is_tag("6C","EC"):
-            root.children.append(ParseNode(name="MMS Transfer Status (6C)", value=val))
-        elif is_tag("7E","FE"):
-            root.children.append(ParseNode(name="CSG ID list (7E)", value=val))
-        elif is_tag("56","D6"):
-            root.children.append(ParseNode(name="CSG ID (56)", value=val))
-        elif is_tag("57","D7"):
-            root.children.append(ParseNode(name="Timer Expiration (57)", value=val))
+def parse_access_tech_text(value: TlvInput) -> str:
+    return ", ".join(_ACCESS_TECH.get(b, "UNK") for b in as_buffer(value))
+
+def parse_timer_identifier_text(value: TlvInput) -> str:
+    v = as_buffer(value)
+    if len(v) == 1 and 1 <= v[0] <= 8:
+        return f"Timer {v[0]}"
+    return _hex(v)
+
+def parse_imei_text(value: TlvInput) -> str:
+    return _hex(bytes(as_buffer(value)).translate(_SWAP_NIBBLES))
+
+def _network_access_name_text(v) -> str:
+    return bytes(v[1:]).decode("ascii", "replace") if len(v) >= 1 else ""
+
+def _transport_text(v) -> str:
+    t = _TRANSPORT.get(v[0], "?") if len(v) >= 1 else "?"
+    return f"{t}, port={int.from_bytes(v[1:], 'big')}"
+
+def _mccmnc_tac_text(v) -> Optional[str]:
+    if len(v) < 3:
+        return None  # 不完整时不生成节点
+    m = _hex(v[:3])
+    return f"{m[1]}{m[0]}{m[3]}{m[5]}{m[4]}{m[2]}, TAC:{_hex(v[3:])}"
+
+def _timer_value_text(v) -> str:
+    h = _hex(v)
+    return f"{h[0:2]}:{h[2:4]}:{h[4:6]}" if len(v) >= 3 else h
+
+def _buffer_size_text(v) -> str:
+    return str(int.from_bytes(v, "big"))
+
+
+# 声明式 TLV 表：(标签值（不含 CR 位；三字节格式为 0x7Fxxxx）, 节点名, 解码函数)
+# 解码函数取值的字节视图，返回显示文本；返回 None 表示不生成节点。
+CAT_TLV_SPECS: Tuple[Tuple[int, str, Callable], ...] = (
+    (0x01, "Command details (01)", command_details_text),
+    (0x02, "Device identities (02)", device_identities_text),
+    (0x03, "Result (03)", result_details_text),
+    (0x04, "Duration (04)", parse_duration_text),
+    (0x05, "Alpha identifier (05)", _hex),
+    (0x06, "Address (06)", parse_address_text),
+    (0x38, "Channel status (38)", parse_channel_status_text),
+    (0x0B, "SMS TPDU (0B)", _hex),
+    (0x39, "Buffer size (39)", _buffer_size_text),
+    (0x47, "Network Access Name (47)", _network_access_name_text),
+    (0x3C, "Transport Protocol (3C)", _transport_text),
+    (0x7D, "MCCMNC+TAC (FD)", _mccmnc_tac_text),
+    (0x35, "Bearer description (B5)", _hex),
+    (0x13, "Location Info (13)", _hex),
+    (0x14, "IMEI (14)", parse_imei_text),
+    (0x62, "IMEISV (62)", _hex),
+    (0x19, "Event List (19)", _hex),
+    (0x2F, "AID (2F)", _hex),
+    (0x3E, "Data dest address (3E)", _hex),
+    (0x36, "Channel data (36)", _hex),
+    (0x37, "Channel data length (37)", _hex),
+    (0x3F, "Access Technology (3F)", parse_access_tech_text),
+    (0x22, "C-APDU (A2)", _hex),
+    (0x24, "Timer identifier (A4)", parse_timer_identifier_text),
+    (0x25, "Timer (A5)", _timer_value_text),
+    (0x21, "Card ATR (21)", _hex),
+    (0x60, "MAC (E0)", _hex),
+    (0x26, "Date/Time/TZ (A6)", _hex),
+    (0x6C, "MMS Transfer Status (6C)", _hex),
+    (0x7E, "CSG ID list (7E)", _hex),
+    (0x56, "CSG ID (56)", _hex),
+    (0x57, "Timer Expiration (57)", _hex),
+)
+
+TAG_COMMAND_DETAILS = 0x01
+
+# 编译：标签值 -> (节点名, 解码函数)
+_DECODERS: Dict[int, Tuple[str, Callable]] = {tag: (name, fn) for tag, name, fn in CAT_TLV_SPECS}
+
+
+def iter_comp_tlvs(data: TlvInput) -> Iterator[Tuple[int, str, int, memoryview]]:
+    """逐个产出 (标签值, 标签十六进制, 声明长度, 值视图)。
+
+    标签值去掉了 CR 位：单字节格式为低 7 位，三字节格式（首字节 7F）为 0x7F0000 | 15 位标签。
+    值被截断（声明长度超出数据）时给出剩余的字节，视图短于声明长度，这是最后一个 TLV。
+    """
+    bs = as_buffer(data)
+    n = len(bs)
+    i = 0
+    while i + 2 <= n:
+        t = bs[i]
+        if t == 0x7F and i + 3 <= n:
+            tag = 0x7F0000 | ((bs[i + 1] & 0x7F) << 8) | bs[i + 2]
+            tag_hex = _hex(bs[i:i + 3]); i += 3
         else:
-            root.children.append(ParseNode(name=f"TLV {tag}", value=f"len={ln}", hint=val[:120]))
+            tag = t & 0x7F
+            tag_hex = f"{t:02X}"; i += 1
+        length = 0
+        if i < n:
+            first = bs[i]; i += 1
+            k = first - 0x80
+            if 1 <= k <= 3 and i + k <= n:   # 81/82/83 + 1~3 字节长度
+                length = int.from_bytes(bs[i:i + k], "big"); i += k
+            else:
+                length = first
+        end = i + length
+        yield tag, tag_hex, length, bs[i:end]
+        i = end
+
+
+def parse_comp_tlvs_to_nodes(data: TlvInput) -> tuple[ParseNode, str]:
+    """把 Comprehension TLV 串（字节或十六进制）解析成 ParseNode 子树；返回(root, 首个命令名)。"""
+    root = ParseNode(name="Comprehension TLVs"); first = None
+    children = root.children
+    decoders = _DECODERS
+    for tag, tag_hex, length, val in iter_comp_tlvs(data):
+        spec = decoders.get(tag)
+        if len(val) < length:  # 截断（或误当作长格式的长度字节）：不解码，标出实际可用的长度
+            name = spec[0] if spec is not None else f"TLV {tag_hex}"
+            children.append(ParseNode(name=name, value=f"len={length} (truncated, {len(val)} available)",
+                                      hint=_hex(val[:60])))
+            continue
+        if spec is None:
+            children.append(ParseNode(name=f"TLV {tag_hex}", value=f"len={length}", hint=_hex(val[:60])))
+            continue
+        text = spec[1](val)
+        if text is None:
+            continue
+        children.append(ParseNode(name=spec[0], value=text))
+        if tag == TAG_COMMAND_DETAILS and first is None:
+            first = text.split(" - ")[0]
     return root, (first or "")
+
+
+def first_command(data: TlvInput) -> str:
+    """parse_comp_tlvs_to_nodes 返回的首个命令名；只解码 Command Details，不建节点（延迟解析时生成标题用）。"""
+    decode = _DECODERS[TAG_COMMAND_DETAILS][1]
+    for tag, _, length, val in iter_comp_tlvs(data):
+        if tag == TAG_COMMAND_DETAILS and len(val) == length:
+            text = decode(val)
+            if text is not None:
+                return text.split(" - ")[0]
+    return ""
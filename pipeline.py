@@ -1,50 +1,545 @@
 
-from typing import List
+import os
+from collections import OrderedDict, deque
+from contextlib import suppress
+from dataclasses import replace
+from itertools import islice
+from typing import TYPE_CHECKING, AsyncIterator, Dict, Iterable, Iterator, List, Optional, Tuple
+from core.arena import ArenaNode, pack_tree
 from core.models import ParseResult, MsgType, Message
-from data_io.loaders import load_text
+from core.pairing import Pairer
+from data_io.loaders import open_binary
+from data_io.follow import FileTail, DEFAULT_POLL_BYTES
+from data_io.multi import is_multi, expand_inputs, iter_merged_mtk, iter_merged_generic
+from data_io.detect import FormatGuess, SNIFF_BYTES, detect_format, sniff
+from data_io.extract_cache import load_messages, save_messages, source_key
 from data_io.extractors.mtk import MTKExtractor
 from data_io.extractors.generic import GenericExtractor
-from classify.rules import classify_message
+from data_io.extractors.pcap import PcapExtractor
+from classify.rules import route_message
 from parsers.base import ProactiveParser, EsimParser, NormalSimParser
 from render.gui_adapter import to_gui_events
 
+if TYPE_CHECKING:  # these cost 25-150 ms to import; only workers>1 / astream() need them
+    import asyncio
+    from concurrent.futures import ProcessPoolExecutor
+
+# formats this pipeline has an extractor for (see data_io.detect)
+EXTRACTOR_FORMATS = ("mtk", "generic", "pcap")
+
+DEFAULT_PARSE_CACHE_SIZE = 4096
+
+# Parallel parsing (Pipeline(workers=N)): messages go to the pool in batches of
+# roughly equal cost, estimated as a fixed per-message overhead plus the APDU size.
+# A large reassembled BF36 thus fills a batch of its own, while STATUS polls
+# travel a thousand at a time.
+BATCH_COST = 256 << 10
+MESSAGE_COST = 256
+INFLIGHT_PER_WORKER = 4  # batches queued per worker; bounds memory on huge logs
+
+# Pipeline.astream(): each executor step parses at most this much, so the event loop is
+# never far from its next turn; the queue holds at most ASTREAM_QUEUE steps' results.
+ASTREAM_STEP_MESSAGES = 2048     # path input: messages per step
+ASTREAM_READ_BYTES = 256 << 10   # reader input: bytes per read (and per step)
+ASTREAM_QUEUE = 8
+
+
+class ParseCache:
+    """Bounded LRU of parse results keyed by (raw, direction).
+
+    Classification and parsing depend only on those two, so identical APDUs
+    (STATUS polling, repeated FETCH / ENVELOPE) share one ParseNode tree.
+    The shared tree must be treated as read-only.
+    """
+
+    def __init__(self, maxsize: int = DEFAULT_PARSE_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._d: "OrderedDict[Tuple[str, str], ParseResult]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key) -> Optional[ParseResult]:
+        pr = self._d.get(key)
+        if pr is None:
+            self.misses += 1
+            return None
+        self._d.move_to_end(key)
+        self.hits += 1
+        return pr
+
+    def put(self, key, pr: ParseResult):
+        self._d[key] = pr
+        if len(self._d) > self.maxsize:
+            self._d.popitem(last=False)
+
+    def clear(self):
+        self._d.clear()
+        self.hits = self.misses = 0
+
+    def stats(self) -> Dict[str, float]:
+        total = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._d),
+                "hit_rate": self.hits / total if total else 0.0}
+
+
 class Pipeline:
-    def __init__(self, prefer_mtk: bool = True, show_normal_sim: bool = False):
+    def __init__(self, prefer_mtk: bool | None = True, show_normal_sim: bool = False, extract_workers: int = 1,
+                 cache: bool = False, parse_cache_size: int = DEFAULT_PARSE_CACHE_SIZE,
+                 compact_trees: bool = False, workers: int = 1, deferred: bool = False):
         self.extractor_mtk = MTKExtractor()
         self.extractor_generic = GenericExtractor()
-        self.prefer_mtk = prefer_mtk
+        self.extractor_pcap = PcapExtractor()
+        self.prefer_mtk = prefer_mtk  # None: sniff each input's first few hundred KB and pick the extractor
         self.show_normal_sim = show_normal_sim
+        self.extract_workers = extract_workers  # >1: split MTK logs and extract in a process pool
+        self.detected: FormatGuess | None = None  # last auto-detection result
+        self.cache = cache  # keep extracted messages in a "<log>.apdc" sidecar; reopening skips extraction
+        # repeated APDUs are parsed once (0 disables); see parse_cache.stats()
+        self.parse_cache = ParseCache(parse_cache_size) if parse_cache_size > 0 else None
+        # store each parse tree as a TreeArena (read-only ArenaNode views); see core.arena
+        self.compact_trees = compact_trees
+        # >1: classify/parse in a persistent process pool (0: one worker per CPU); pairing stays here.
+        # Each worker keeps its own parse cache, so parse_cache.stats() only covers serial runs.
+        self.workers = workers if workers > 0 else (os.cpu_count() or 1)
+        self._pool: Optional["ProcessPoolExecutor"] = None
+        # classify only: results get kind/title/tag/direction but root=None; detail() builds the
+        # tree on demand, and parse_cache then bounds how many built trees are kept
+        self.deferred = deferred
+        # astream() steps run in executor threads; one at a time per pipeline (parse cache, pool)
+        self._step_lock = None
+        self._parsers = {
+            MsgType.PROACTIVE: ProactiveParser(),
+            MsgType.ESIM: EsimParser(),
+        }
+        self._normal_parser = NormalSimParser()
+
+    def format_for(self, path: str) -> str:
+        """Extractor to use for path: fixed by prefer_mtk, or detected from a prefix sample."""
+        if self.prefer_mtk is None:
+            self.detected = detect_format(path)
+            return self._known(self.detected.name)
+        return "mtk" if self.prefer_mtk else "generic"
+
+    @staticmethod
+    def _known(name: str) -> str:
+        # undetectable input: fall back to the MTK extractor, the historical default
+        return name if name in EXTRACTOR_FORMATS else "mtk"
 
     def run_from_file(self, path: str) -> List[ParseResult]:
-        text = load_text(path)
-        if self.prefer_mtk:
-            messages = self.extractor_mtk.extract_from_text(text)
-        else:
-            messages = self.extractor_generic.extract(text.splitlines())
-        return self._run_messages(messages)
+        """path may also be a directory or a glob: rotated logs are merged by timestamp."""
+        if self.cache and not is_multi(path):
+            return self._run_cached(path, self.format_for(path))
+        return self._run_messages(self._messages_from(path))
+
+    def _messages_from(self, path: str, fmt: Optional[str] = None) -> Iterable[Message]:
+        if is_multi(path):
+            paths = expand_inputs(path)
+            return self.iter_merged(paths, fmt or self.format_for(paths[0]))
+        return self._extract(path, fmt or self.format_for(path))
 
-    def _run_messages(self, messages: List[Message]) -> List[ParseResult]:
+    async def astream(self, source, fmt: Optional[str] = None, queue_size: int = ASTREAM_QUEUE,
+                      executor=None) -> AsyncIterator[ParseResult]:
+        """``async for r in pipeline.astream(path_or_reader)``: run_from_file for asyncio services.
+
+        source is a path (file, directory or glob, as for run_from_file) or a reader whose
+        read(n) returns bytes or str; an async read (asyncio.StreamReader, ...) is awaited on
+        the loop, a blocking one runs in the executor. Extraction and parsing always run in
+        the executor (default: the loop's thread pool), in small steps. A producer task puts
+        each step's results on a queue of at most queue_size steps and waits when it is
+        full, so a slow consumer pauses the reading instead of buffering the log. Results
+        come in input order with pairing as in run_from_file: a command still waiting for
+        its response (or for a GET RESPONSE) is held back, with everything after it, until
+        its command/responses/sw are final. The extraction cache is not used.
+        """
+        import asyncio
+        import threading
+        if self._step_lock is None:
+            self._step_lock = threading.Lock()
+        loop = asyncio.get_running_loop()
+        job = _StreamJob(self, source, fmt)
+        queue = asyncio.Queue(queue_size)
+        producer = loop.create_task(job.produce(loop, executor, queue))
+        try:
+            while True:
+                item = await queue.get()
+                if item is None:
+                    break
+                if isinstance(item, BaseException):
+                    raise item
+                for r in item:
+                    yield r
+        finally:
+            producer.cancel()
+            with suppress(asyncio.CancelledError):
+                await producer
+
+    def _extractor(self, fmt: str):
+        return {"mtk": self.extractor_mtk, "pcap": self.extractor_pcap}.get(fmt, self.extractor_generic)
+
+    def _extract(self, path: str, fmt: str) -> Iterable[Message]:
+        if fmt == "mtk":
+            return self.extractor_mtk.iter_file(path, self.extract_workers)
+        if fmt == "pcap":
+            return self.extractor_pcap.iter_file(path)
+        return self._iter_path(path, self.extractor_generic)
+
+    @staticmethod
+    def _iter_path(path: str, extractor) -> Iterable[Message]:
+        with open_binary(path) as f:
+            yield from extractor.iter_messages(f)
+
+    def _run_cached(self, path: str, fmt: str) -> List[ParseResult]:
+        key = self._extractor(fmt).cache_key
+        messages = load_messages(path, key)
+        if messages is not None:
+            return self._run_messages(messages)
+        stamp = source_key(path, key)  # taken before reading: a log that grows meanwhile won't match it
+        results = self._run_messages(self._extract(path, fmt))
+        try:
+            save_messages(path, key, (r.message for r in results), stamp)
+        except OSError:
+            pass  # read-only log directory: just no cache
+        return results
+
+    def iter_messages(self, fileobj, fmt: Optional[str] = None) -> Iterable[Message]:
+        """Stream messages out of an open log file without loading it whole."""
+        if fmt is None:
+            if self.prefer_mtk is None:
+                return self._iter_sniffed(fileobj)
+            fmt = "mtk" if self.prefer_mtk else "generic"
+        if fmt == "mtk":
+            return self.extractor_mtk.iter_messages(fileobj)
+        if fmt == "pcap":
+            return self.extractor_pcap.iter_messages(fileobj)
+        return self.extractor_generic.iter_messages(fileobj)
+
+    def _iter_sniffed(self, fileobj) -> Iterable[Message]:
+        # detect on the first block, then keep feeding the same stream: nothing is read twice
+        sample = fileobj.read(SNIFF_BYTES)
+        raw = sample.encode("utf-8", errors="ignore") if isinstance(sample, str) else sample
+        self.detected = sniff(raw, complete=len(sample) < SNIFF_BYTES)
+        stream = self.new_stream(self._known(self.detected.name))
+        yield from stream.feed(sample)
+        while True:
+            chunk = fileobj.read(self.extractor_mtk.chunk_size)
+            if not chunk:
+                break
+            yield from stream.feed(chunk)
+        yield from stream.close()
+
+    def iter_merged(self, paths: List[str], fmt: Optional[str] = None) -> Iterable[Message]:
+        """k-way merge of several logs on their timestamps; E2 chains continue across files."""
+        fmt = fmt or self.format_for(paths[0])
+        if fmt == "mtk":
+            return iter_merged_mtk(paths, self.extractor_mtk)
+        if fmt == "pcap":
+            return iter_merged_generic(paths, self.extractor_pcap)
+        return iter_merged_generic(paths, self.extractor_generic)
+
+    def new_stream(self, fmt: Optional[str] = None):
+        """Incremental extractor state: feed(chunk) / close() -> List[Message]."""
+        if fmt is None:
+            fmt = "generic" if self.prefer_mtk is False else "mtk"
+        if fmt == "mtk":
+            return self.extractor_mtk.new_stream()
+        if fmt == "pcap":
+            return self.extractor_pcap.new_stream()
+        return self.extractor_generic.new_stream()
+
+    def follow(self, path: str) -> "LogFollower":
+        """Tail a growing log; each poll() parses only the newly appended bytes."""
+        return LogFollower(self, path)
+
+    def _run_messages(self, messages: Iterable[Message], pairer: Optional[Pairer] = None) -> List[ParseResult]:
+        """Parse and pair in one pass; pass a Pairer to continue numbering across calls."""
+        pairer = pairer or Pairer()
         results: List[ParseResult] = []
-        for m in messages:
-            msg_type, direction, tag, title = classify_message(m)
-            if msg_type == MsgType.PROACTIVE:
-                parser = ProactiveParser()
-            elif msg_type == MsgType.ESIM:
-                parser = EsimParser()
-            elif msg_type == MsgType.NORMAL_SIM:
-                parser = NormalSimParser()
-            else:
-                parser = NormalSimParser()
-            pr = parser.parse(m)
-            # For proactive messages, keep the detailed title from the parser
-            # For other message types, use the title from classify_message
-            if msg_type != MsgType.PROACTIVE:
-                pr.title = title
-            pr.direction_hint = direction
-            pr.tag = tag
-            results.append(pr)
+        # deferred summaries cost less than shipping them between processes
+        parallel = self.workers > 1 and not self.deferred
+        parsed = self._iter_parallel(messages) if parallel else map(self._process, messages)
+        for r in parsed:
+            pairer.add(r)
+            results.append(r)
         return results
 
+    def _pool_for(self) -> "ProcessPoolExecutor":
+        if self._pool is None:
+            from concurrent.futures import ProcessPoolExecutor
+            cache_size = self.parse_cache.maxsize if self.parse_cache is not None else 0
+            self._pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                             initargs=(cache_size,))
+        return self._pool
+
+    def _iter_parallel(self, messages: Iterable[Message]) -> Iterator[ParseResult]:
+        """Parse in the process pool; results come back in input order, each with its original Message."""
+        pool = self._pool_for()
+        pending = deque()  # (batch, future) in submission order
+        limit = self.workers * INFLIGHT_PER_WORKER
+        for batch in _batches(messages):
+            work = [(m.data, m.direction) for m in batch]
+            pending.append((batch, pool.submit(_parse_batch, work)))
+            if len(pending) >= limit:
+                yield from self._collect(*pending.popleft())
+        while pending:
+            yield from self._collect(*pending.popleft())
+
+    def _collect(self, batch: List[Message], future) -> List[ParseResult]:
+        results = future.result()
+        unpacked = {}  # cache hits in a batch share one tree, as in a serial run
+        for m, r in zip(batch, results):
+            r.message = m  # workers get only data/direction; reattach the caller's object
+            if not self.compact_trees and isinstance(r.root, ArenaNode):
+                key = id(r.root.arena)
+                if key not in unpacked:
+                    unpacked[key] = r.root.arena.unpack()
+                r.root = unpacked[key]
+            _note_gap(r, m)
+        return results
+
+    def close(self):
+        """Shut down the parse pool (if one was started); the pipeline stays usable."""
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def __enter__(self) -> "Pipeline":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _process(self, m: Message) -> ParseResult:
+        pr = self._summarize(m) if self.deferred else self._parse_cached(m)
+        _note_gap(pr, m)
+        return pr
+
+    def detail(self, r: ParseResult) -> ParseResult:
+        """r with its parse tree. Deferred results get a parsed copy (r itself stays tree-less)."""
+        if r.root is not None:
+            return r
+        full = self._parse_cached(r.message)
+        _note_gap(full, r.message)
+        full.command, full.responses, full.sw = r.command, r.responses, r.sw
+        return full
+
+    def _parse_cached(self, m: Message) -> ParseResult:
+        cache = self.parse_cache
+        if cache is None:
+            return self._parse(m)
+        key = (m.data, m.direction)
+        shared = cache.get(key)
+        if shared is None:
+            shared = self._parse(m)
+            cache.put(key, shared)
+        # per-message copy: own message, warning lists and pairing fields; root/apdu are shared
+        return replace(shared, message=m, warnings=list(shared.warnings), errors=list(shared.errors))
+
+    def _parse(self, m: Message) -> ParseResult:
+        # one table lookup classifies the message and picks the parser entry; the decoded header is handed on
+        route, hdr = route_message(m)
+        parser = self._parsers.get(route.msg_type, self._normal_parser)
+        pr = parser.parse(m, hdr, route)
+        # For proactive messages, keep the detailed title from the parser
+        # For other message types, use the title from the route
+        if route.msg_type != MsgType.PROACTIVE:
+            pr.title = route.title
+        pr.direction_hint = route.direction
+        pr.tag = route.tag
+        if self.compact_trees:
+            pr.root = pack_tree(pr.root)
+        return pr
+
+    def _summarize(self, m: Message) -> ParseResult:
+        """Deferred mode: the result _parse() would give, without the tree."""
+        route, hdr = route_message(m)
+        msg_type = route.msg_type if route.msg_type in self._parsers else MsgType.NORMAL_SIM
+        if msg_type == MsgType.PROACTIVE:
+            title = self._parsers[msg_type].title(m, hdr, route)
+        else:
+            title = route.title
+        return ParseResult(msg_type=msg_type, message=m, apdu=hdr, root=None, title=title,
+                           direction_hint=route.direction, tag=route.tag)
+
     def run_for_gui(self, path: str):
         res = self.run_from_file(path)
         return to_gui_events(res, show_normal_sim=self.show_normal_sim)
+
+
+def _batches(messages: Iterable[Message]) -> Iterator[List[Message]]:
+    """Split into batches of about BATCH_COST; a message costing more than that goes alone."""
+    batch: List[Message] = []
+    cost = 0
+    for m in messages:
+        c = MESSAGE_COST + len(m.data)
+        if batch and cost + c > BATCH_COST:
+            yield batch
+            batch, cost = [], 0
+        batch.append(m)
+        cost += c
+    if batch:
+        yield batch
+
+
+def _note_gap(pr: ParseResult, m: Message):
+    gap = m.meta.get("gap")
+    if gap:
+        pr.warnings.append(
+            f"Incomplete STORE DATA chain ({gap['reason']}): {gap['segments']} segment(s), "
+            f"block {gap['expected_block']:02X} not found")
+
+
+# worker side of the parse pool: one Pipeline per process, built once by the initializer.
+# Trees always travel packed (core.arena): a few flat columns pickle far cheaper than
+# one object per node, and the parent unpacks them unless it keeps compact trees anyway.
+_worker: Optional[Pipeline] = None
+
+
+def _init_worker(parse_cache_size: int):
+    global _worker
+    _worker = Pipeline(parse_cache_size=parse_cache_size, compact_trees=True)
+
+
+def _parse_batch(work: List[Tuple[bytes, str]]) -> List[ParseResult]:
+    out = []
+    for data, direction in work:
+        r = _worker._parse_cached(Message(None, direction, None, data))
+        r.message = None
+        out.append(r)
+    return out
+
+
+class _StreamJob:
+    """One astream(): extraction/pairing state plus the producer that feeds the queue.
+
+    Blocking steps hold the pipeline's step lock, so close() (run when the consumer stops
+    early) waits for a step still running in the executor before closing the input.
+    """
+
+    def __init__(self, pipeline: Pipeline, source, fmt: Optional[str]):
+        self.pipeline = pipeline
+        self.source = source
+        self.fmt = fmt
+        self.pairer = Pairer()
+        self._held: List[ParseResult] = []  # parsed, but pairing may still change them
+        self._held_from = 0                 # pairer index of _held[0]
+        self._messages: Optional[Iterator[Message]] = None  # path input
+        self._stream = None                                 # reader input
+
+    async def produce(self, loop, executor, queue: "asyncio.Queue"):
+        import asyncio
+        try:
+            if isinstance(self.source, (str, os.PathLike)):
+                while True:
+                    batch = await loop.run_in_executor(executor, self.step_path)
+                    if batch is None:
+                        break
+                    await queue.put(batch)
+            else:
+                await self._produce_reader(loop, executor, queue)
+            await queue.put(None)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:  # handed to the consumer, raised at its position in the stream
+            if self._held:
+                await queue.put(self._release([], final=True))
+            await queue.put(e)
+        finally:
+            await loop.run_in_executor(executor, self.close)
+
+    async def _produce_reader(self, loop, executor, queue: "asyncio.Queue"):
+        import inspect
+        read = self.source.read
+        if inspect.iscoroutinefunction(read):
+            async def next_chunk(n):
+                return await read(n)
+        else:
+            async def next_chunk(n):
+                return await loop.run_in_executor(executor, read, n)
+        first = await next_chunk(ASTREAM_READ_BYTES)
+        if self.fmt is None and self.pipeline.prefer_mtk is None:
+            # detect on the first SNIFF_BYTES, as iter_messages() does for open files
+            while first and len(first) < SNIFF_BYTES:
+                more = await next_chunk(ASTREAM_READ_BYTES)
+                if not more:
+                    break
+                first += more
+        chunk = first
+        while chunk:
+            await queue.put(await loop.run_in_executor(executor, self.step_reader, chunk))
+            chunk = await next_chunk(ASTREAM_READ_BYTES)
+        await queue.put(await loop.run_in_executor(executor, self.step_reader, None))
+
+    def step_path(self) -> Optional[List[ParseResult]]:
+        pl = self.pipeline
+        with pl._step_lock:
+            if self._messages is None:
+                self._messages = iter(pl._messages_from(os.fspath(self.source), self.fmt))
+            batch = list(islice(self._messages, ASTREAM_STEP_MESSAGES))
+            if not batch:
+                return self._release([], final=True) or None
+            return self._release(pl._run_messages(batch, self.pairer))
+
+    def step_reader(self, chunk) -> List[ParseResult]:
+        """Feed one chunk (None: end of input) and parse what it completed."""
+        pl = self.pipeline
+        with pl._step_lock:
+            if self._stream is None:
+                fmt = self.fmt
+                if fmt is None and pl.prefer_mtk is None:
+                    sample = chunk or b""
+                    raw = sample.encode("utf-8", errors="ignore") if isinstance(sample, str) else sample
+                    pl.detected = sniff(raw[:SNIFF_BYTES], complete=len(raw) < SNIFF_BYTES)
+                    fmt = pl._known(pl.detected.name)
+                self._stream = pl.new_stream(fmt)
+            messages = self._stream.feed(chunk) if chunk is not None else self._stream.close()
+            return self._release(pl._run_messages(messages, self.pairer), final=chunk is None)
+
+    def _release(self, results: List[ParseResult], final: bool = False) -> List[ParseResult]:
+        """Hold results from the first one whose pairing is still open; return the rest."""
+        held = self._held
+        held += results
+        n = len(held) if final else self.pairer.settled() - self._held_from
+        out = held[:n]
+        del held[:n]
+        self._held_from += n
+        return out
+
+    def close(self):
+        with self.pipeline._step_lock:
+            if self._messages is not None and hasattr(self._messages, "close"):
+                self._messages.close()  # generator: closes the file it has open
+            self._messages = None
+
+
+class LogFollower:
+    """Follow mode: extraction state (open group, partial E2 chains, line/offset
+    counters) survives between polls, so each poll costs only the new bytes."""
+
+    def __init__(self, pipeline: Pipeline, path: str):
+        self.pipeline = pipeline
+        self.path = path
+        self._tail = FileTail(path)
+        # auto mode detects once up front (an empty file falls back to MTK)
+        self.format = pipeline.format_for(path)
+        self._stream = pipeline.new_stream(self.format)
+        self._pairer = Pairer()  # command/response pairing continues across polls too
+        self.reset = False  # last poll restarted from the top (file truncated/rotated)
+
+    def poll(self, max_bytes: Optional[int] = DEFAULT_POLL_BYTES) -> List[ParseResult]:
+        data = self._tail.read_new(max_bytes)
+        self.reset = self._tail.reset
+        if self.reset:
+            self._stream = self.pipeline.new_stream(self.format)
+            self._pairer = Pairer()
+        if not data:
+            return []
+        return self.pipeline._run_messages(self._stream.feed(data), self._pairer)
+
+    @property
+    def pending(self) -> bool:
+        return self._tail.pending
+
+    def close(self) -> List[ParseResult]:
+        """Stop following: flush the last group and any unfinished chains."""
+        self._tail.close()
+        return self.pipeline._run_messages(self._stream.close(), self._pairer)
@@ -1,26 +1,183 @@
-
-from typing import List, Dict
+from array import array
+from bisect import bisect_right
+from itertools import compress
+from typing import Dict, Iterable, Iterator, List, Optional
 from core.models import ParseResult, MsgType
 
-def to_gui_events(results: List[ParseResult], show_normal_sim: bool = False, allowed_types: list[str] | None = None) -> List[Dict]:
-    events: List[Dict] = []
+def to_gui_event(r: ParseResult, i: int) -> Dict:
+    # GUI expects: kind, direction, tag, title, raw, parser_hint (+ index/line/ts for source lookup)
+    return {
+        "kind": r.msg_type.value,
+        "direction": r.direction_hint,   # ASCII arrows, used by GUI for colors
+        "tag": r.tag or "",
+        "title": r.title,
+        "raw": r.message.raw,
+        "parser_hint": (r.tag or "").lower(),
+        "index": i,                      # position in results (source lookup)
+        "line": r.message.meta.get("line"),
+        "ts": r.message.meta.get("ts"),
+    }
+
+def shown_kinds(show_normal_sim: bool = False, allowed_types: list[str] | None = None) -> set:
+    """Kinds that to_gui_events keeps: allowed_types if given, else all but normal SIM; never UNKNOWN."""
     allowed = set([t.lower() for t in (allowed_types or [])])
-    for r in results:
-        if allowed:
-            if r.msg_type.value not in allowed:
-                continue
-        else:
-            if r.msg_type == MsgType.NORMAL_SIM and not show_normal_sim:
-                continue
-        if r.msg_type == MsgType.UNKNOWN:
-            continue
-        # GUI expects: kind, direction, tag, title, raw, parser_hint
-        events.append({
-            "kind": r.msg_type.value,
-            "direction": r.direction_hint,   # ASCII arrows, used by GUI for colors
-            "tag": r.tag or "",
-            "title": r.title,
-            "raw": r.message.raw,
-            "parser_hint": (r.tag or "").lower()
-        })
-    return events
+    if allowed:
+        kinds = {k for k in MsgType if k.value in allowed}
+    else:
+        kinds = {k for k in MsgType if k != MsgType.NORMAL_SIM or show_normal_sim}
+    kinds.discard(MsgType.UNKNOWN)
+    return kinds
+
+def to_gui_events(results: List[ParseResult], show_normal_sim: bool = False, allowed_types: list[str] | None = None,
+                  start: int = 0) -> List[Dict]:
+    kinds = shown_kinds(show_normal_sim, allowed_types)
+    return [to_gui_event(r, i) for i, r in enumerate(results, start) if r.msg_type in kinds]
+
+
+# Filtered views over a large result list. Each result gets a small code per column (kind,
+# direction, tag); a filter turns a column into a 0/1 byte mask with bytes.translate and the
+# masks are AND-ed, so a filter change costs a few ms per million results and no event dicts.
+_KINDS = list(MsgType)
+_MAX_BYTE_CODES = 256
+
+class EventIndex:
+    """Per-result kind / direction / tag codes, built once at load and extended on append."""
+
+    def __init__(self, results: Iterable[ParseResult] = ()):
+        self.kinds = bytearray()
+        self.directions = bytearray()
+        self.tags = bytearray()          # becomes array('H') past 256 distinct tags
+        self._direction_codes: Dict[str, int] = {}
+        self._tag_codes: Dict[str, int] = {}
+        self.add(results)
+
+    def __len__(self) -> int:
+        return len(self.kinds)
+
+    @staticmethod
+    def _code(codes: Dict[str, int], value: str) -> int:
+        c = codes.get(value)
+        if c is None:
+            c = codes[value] = len(codes)
+        return c
+
+    def add(self, results: Iterable[ParseResult]):
+        kind_code = {k: i for i, k in enumerate(_KINDS)}
+        dirs, tags = self._direction_codes, self._tag_codes
+        kinds, directions = self.kinds, self.directions
+        for r in results:
+            kinds.append(kind_code[r.msg_type])
+            d = dirs.get(r.direction_hint)
+            directions.append(d if d is not None else self._code(dirs, r.direction_hint))
+            t = r.tag or ""
+            c = tags.get(t)
+            if c is None:
+                c = self._code(tags, t)
+                if c == _MAX_BYTE_CODES and isinstance(self.tags, bytearray):
+                    self.tags = array("H", list(self.tags))
+            self.tags.append(c)
+
+    @staticmethod
+    def _select(column, codes: Dict, wanted, start: int) -> bytes:
+        table = bytearray(max(_MAX_BYTE_CODES, len(codes)))
+        for v in wanted:
+            c = codes.get(v)
+            if c is not None:
+                table[c] = 1
+        if isinstance(column, bytearray):
+            return bytes(column[start:]).translate(table)
+        return bytes(table[c] for c in column[start:])  # > 256 distinct tags: slow path
+
+    def mask(self, kinds=None, directions=None, tags=None, start: int = 0) -> bytes:
+        """0/1 per result from ``start`` on: kind in kinds and direction in directions and tag in tags.
+
+        None leaves a column unfiltered; kinds are MsgType members, tags compare upper-cased ("" = no tag).
+        """
+        n = len(self.kinds) - start
+        parts = []
+        if kinds is not None:
+            parts.append(self._select(self.kinds, {k: i for i, k in enumerate(_KINDS)}, kinds, start))
+        if directions is not None:
+            parts.append(self._select(self.directions, self._direction_codes, directions, start))
+        if tags is not None:
+            wanted = {t.upper() for t in tags}
+            wanted = [t for t in self._tag_codes if t.upper() in wanted]
+            parts.append(self._select(self.tags, self._tag_codes, wanted, start))
+        if not parts:
+            return b"\x01" * n
+        if len(parts) == 1:
+            return parts[0]
+        acc = int.from_bytes(parts[0], "little")
+        for p in parts[1:]:
+            acc &= int.from_bytes(p, "little")
+        return acc.to_bytes(n, "little")
+
+class EventView:
+    """The events of the results whose mask byte is 1, as a read-only sequence.
+
+    Event dicts are built when a row is read, not kept. Row <-> result index lookups go
+    through per-block counts of the mask; a block's result indices are listed on first use.
+    """
+    BLOCK = 4096
+
+    def __init__(self, results: List[ParseResult], mask: bytes):
+        self._results = results
+        self._mask = bytearray()
+        self._ends = array("q")            # rows up to the end of each block
+        self._blocks: Dict[int, List[int]] = {}
+        self.extend(mask)
+
+    def extend(self, mask: bytes):
+        """Results were appended to the list: add their mask bytes (the view is updated in place)."""
+        B = self.BLOCK
+        first = len(self._mask) // B       # the last block may have been partial
+        del self._ends[first:]
+        self._blocks.pop(first, None)
+        self._mask += mask
+        total = self._ends[-1] if self._ends else 0
+        m = self._mask
+        for s in range(first * B, len(m), B):
+            total += m.count(1, s, s + B)
+            self._ends.append(total)
+
+    def __len__(self) -> int:
+        return self._ends[-1] if self._ends else 0
+
+    def _block(self, b: int) -> List[int]:
+        rows = self._blocks.get(b)
+        if rows is None:
+            s = b * self.BLOCK
+            e = min(s + self.BLOCK, len(self._mask))
+            rows = self._blocks[b] = list(compress(range(s, e), self._mask[s:e]))
+        return rows
+
+    def index_at(self, pos: int) -> int:
+        """Result index of row ``pos``."""
+        n = len(self)
+        if pos < 0:
+            pos += n
+        if not 0 <= pos < n:
+            raise IndexError("event index out of range")
+        b = bisect_right(self._ends, pos)
+        return self._block(b)[pos - (self._ends[b - 1] if b else 0)]
+
+    def position(self, index: int) -> Optional[int]:
+        """Row of result ``index``, or None when the filter hides it."""
+        if not 0 <= index < len(self._mask) or not self._mask[index]:
+            return None
+        b = index // self.BLOCK
+        return (self._ends[b - 1] if b else 0) + self._mask.count(1, b * self.BLOCK, index)
+
+    def __getitem__(self, pos):
+        if isinstance(pos, slice):
+            return [self[i] for i in range(*pos.indices(len(self)))]
+        i = self.index_at(pos)
+        return to_gui_event(self._results[i], i)
+
+    def __iter__(self) -> Iterator[Dict]:
+        results = self._results
+        for i in compress(range(len(self._mask)), self._mask):
+            yield to_gui_event(results[i], i)
+
+    def __bool__(self) -> bool:
+        return len(self) > 0
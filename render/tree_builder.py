@@ -1,5 +1,6 @@
 
-from core.models import ParseResult, ParseNode
+from typing import Dict, List
+from core.models import ParseResult, ParseNode, LazyParseNode
 
 def to_tree_dict(result: ParseResult):
     def walk(n: ParseNode):
@@ -11,12 +12,29 @@ def to_tree_dict(result: ParseResult):
         }
     return walk(result.root) if result.root else {}
 
-def to_tree_for_gui(result: ParseResult):
+def _gui_node(n: ParseNode, lazy: bool) -> Dict:
+    text = n.name if n.value is None else f"{n.name}: {n.value}"
+    if lazy and isinstance(n, LazyParseNode) and not n.loaded:
+        # not decoded yet: expand_gui_node() decodes it when the UI opens the node
+        return {"text": text, "hint": n.hint, "children": [], "pending": n}
+    return {"text": text, "hint": n.hint, "children": [_gui_node(c, lazy) for c in n.children]}
+
+def to_tree_for_gui(result: ParseResult, lazy: bool = False):
     """
     Convert to a shape friendly to a TreeWidget-like UI:
     Each node -> {"text": name or "name: value", "hint": hint, "children":[...]}
+    lazy=True stops at undecoded LazyParseNodes, marking them with "pending".
     """
-    def walk(n: ParseNode):
-        text = n.name if n.value is None else f"{n.name}: {n.value}"
-        return {"text": text, "hint": n.hint, "children": [walk(c) for c in n.children]}
-    return walk(result.root) if result.root else {"text":"(empty)","children":[]}
+    tree = _gui_node(result.root, lazy) if result.root else {"text":"(empty)","children":[]}
+    for w in result.warnings:
+        tree["children"].append({"text": f"Warning: {w}", "hint": None, "children": []})
+    return tree
+
+def expand_gui_node(node: Dict) -> List[Dict]:
+    """Decode a "pending" node from to_tree_for_gui(lazy=True); returns its children."""
+    n = node.pop("pending", None)
+    if n is not None:
+        if node.get("hint") is None:
+            node["hint"] = n.hint
+        node["children"] = [_gui_node(c, True) for c in n.children]
+    return node["children"]